@@ -85,7 +85,15 @@ function Alarms() {
 
   const syncWithZabbix = async () => {
     try {
-      await axios.post('/api/v1/alarms/sync');
+      // The sync runs as a background job; poll it before refreshing
+      let { data: job } = await axios.post('/api/v1/alarms/sync');
+      while (job.status === 'queued' || job.status === 'running') {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        ({ data: job } = await axios.get(`/api/v1/jobs/${job.id}`));
+      }
+      if (job.status === 'failed') {
+        throw new Error(job.error);
+      }
       fetchAlarms();
     } catch (err) {
       setError('Error al sincronizar con Zabbix');
@@ -76,7 +76,15 @@ function Equipment() {
 
   const syncWithZabbix = async () => {
     try {
-      await axios.post('/api/v1/equipment/sync');
+      // The sync runs as a background job; poll it before refreshing
+      let { data: job } = await axios.post('/api/v1/equipment/sync');
+      while (job.status === 'queued' || job.status === 'running') {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        ({ data: job } = await axios.get(`/api/v1/jobs/${job.id}`));
+      }
+      if (job.status === 'failed') {
+        throw new Error(job.error);
+      }
       fetchEquipment();
     } catch (err) {
       setError('Error al sincronizar con Zabbix');
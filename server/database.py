@@ -28,5 +28,10 @@ def get_db():
 
 
 def init_db():
-    """Initialize database tables"""
-    Base.metadata.create_all(bind=engine) 
\ No newline at end of file
+    """Migrate the database schema to the latest revision"""
+    from .migrations import upgrade
+    from .services.retention_service import MetricPartitions
+    
+    upgrade(engine)
+    if MetricPartitions.enabled(engine):
+        MetricPartitions.ensure(engine)
@@ -1,4 +1,4 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from contextlib import asynccontextmanager
@@ -7,8 +7,15 @@ from datetime import datetime
 
 from .config import settings
 from .database import init_db
-from .routes import equipment, alarms
-from .services.zabbix_service import ZabbixService
+from .routes import equipment, alarms, metrics, maintenance, changes, jobs
+from .services.zabbix_service import zabbix_service
+from .services.async_zabbix_service import async_zabbix_service
+from .services.zabbix_cache import cached_zabbix_service
+from .services.metrics_service import metrics_collector, live_metrics
+from .services.scheduler import scheduler
+from .services.job_service import job_manager
+from .services.response_cache import response_cache
+from .services.search_service import equipment_search
 from .schemas import HealthCheck
 
 # Configure logging
@@ -18,9 +25,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Initialize Zabbix service
-zabbix_service = ZabbixService()
-
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -36,19 +40,35 @@ async def lifespan(app: FastAPI):
         logger.error(f"Failed to initialize database: {e}")
         raise
     
+    # Build the equipment search index off the request path
+    equipment_search.warm()
+    
     # Test Zabbix connection
     try:
-        if zabbix_service.test_connection():
+        if await async_zabbix_service.test_connection():
             logger.info("Zabbix connection test successful")
         else:
             logger.warning("Zabbix connection test failed")
     except Exception as e:
         logger.warning(f"Zabbix connection test failed: {e}")
     
+    # Start metrics ingestion; collection itself is a scheduled job
+    if settings.metrics_collection_enabled:
+        metrics_collector.start(collect=False)
+    
+    # Start periodic syncs
+    if settings.scheduler_enabled:
+        scheduler.start()
+    
     yield
     
     # Shutdown
     logger.info("Shutting down Zabbix Monitor API...")
+    await scheduler.stop()
+    job_manager.shutdown()
+    metrics_collector.stop()
+    await async_zabbix_service.logout()
+    await async_zabbix_service.aclose()
 
 
 # Create FastAPI app
@@ -79,6 +99,10 @@ app.add_middleware(
 # Include routers
 app.include_router(equipment.router, prefix="/api/v1")
 app.include_router(alarms.router, prefix="/api/v1")
+app.include_router(metrics.router, prefix="/api/v1")
+app.include_router(maintenance.router, prefix="/api/v1")
+app.include_router(changes.router, prefix="/api/v1")
+app.include_router(jobs.router, prefix="/api/v1")
 
 
 @app.get("/", tags=["root"])
@@ -107,8 +131,11 @@ async def health_check():
         db_status = "unhealthy"
     
     try:
-        # Test Zabbix connection
-        zabbix_status = "healthy" if zabbix_service.test_connection() else "unhealthy"
+        # Test Zabbix connection, without waiting on it while the circuit is open
+        if async_zabbix_service.breaker.is_open:
+            zabbix_status = "degraded"
+        else:
+            zabbix_status = "healthy" if await async_zabbix_service.test_connection() else "unhealthy"
     except Exception as e:
         logger.error(f"Zabbix health check failed: {e}")
         zabbix_status = "unhealthy"
@@ -124,29 +151,34 @@ async def health_check():
     )
 
 
-@app.get("/api/v1/dashboard/stats", tags=["dashboard"])
-async def get_dashboard_stats():
-    """Get dashboard statistics"""
+def _dashboard_stats():
+    from .database import SessionLocal
+    from .services.equipment_service import EquipmentService
+    from .services.alarm_service import AlarmService
+    
+    db = SessionLocal()
     try:
-        from .database import SessionLocal
-        from .services.equipment_service import EquipmentService
-        from .services.alarm_service import AlarmService
-        
-        db = SessionLocal()
-        
         # Get equipment stats
         equipment_stats = EquipmentService.get_equipment_stats(db)
         
         # Get alarm stats
         alarm_stats = AlarmService.get_alarm_stats(db)
-        
+    finally:
         db.close()
-        
-        return {
-            "equipment": equipment_stats,
-            "alarms": alarm_stats,
-            "timestamp": datetime.utcnow().isoformat()
-        }
+    
+    return {
+        "equipment": equipment_stats,
+        "alarms": alarm_stats,
+        "metrics": live_metrics.fleet_summary(settings.metrics_live_window),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
+@app.get("/api/v1/dashboard/stats", tags=["dashboard"])
+def get_dashboard_stats(request: Request):
+    """Get dashboard statistics (cached; timestamp is when they were computed)"""
+    try:
+        return response_cache.cached(request, ("alarms", "equipment"), _dashboard_stats)
     
     except Exception as e:
         logger.error(f"Failed to get dashboard stats: {e}")
@@ -157,7 +189,7 @@ async def get_dashboard_stats():
 async def test_zabbix_connection():
     """Test Zabbix connection"""
     try:
-        success = zabbix_service.test_connection()
+        success = await async_zabbix_service.test_connection()
         return {
             "success": success,
             "message": "Zabbix connection test completed",
@@ -172,6 +204,24 @@ async def test_zabbix_connection():
         }
 
 
+@app.get("/api/v1/zabbix/stats", tags=["zabbix"])
+async def get_zabbix_client_stats():
+    """Get Zabbix API client counters"""
+    return {
+        "requests": {
+            "sync": zabbix_service.get_request_stats(),
+            "async": async_zabbix_service.get_request_stats()
+        },
+        "cache": cached_zabbix_service.get_cache_stats(),
+        "auth": zabbix_service.get_auth_stats(),
+        "resilience": {
+            "sync": zabbix_service.get_resilience_stats(),
+            "async": async_zabbix_service.get_resilience_stats()
+        },
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -0,0 +1,58 @@
+"""
+Alembic migrations for the application schema.
+
+``upgrade`` runs them from the app on startup; the ``alembic`` command with
+the repository's alembic.ini runs the same scripts by hand. Revisions skip
+tables, columns and indexes that already exist, so databases created by
+the ``create_all`` of earlier releases are brought to head in place.
+"""
+
+import logging
+import os
+from typing import Callable
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Serialises migrations of workers starting at the same time on PostgreSQL
+MIGRATION_LOCK_KEY = 0x7A6D6967  # "zmig"
+
+
+def object_filter(dialect_name: str) -> Callable[..., bool]:
+    """Autogenerate filter leaving out indexes created only on other databases (e.g. pg_trgm)"""
+    def include_object(obj, name, type_, reflected, compare_to) -> bool:
+        if type_ == "index" and not reflected:
+            ddl_if = getattr(obj, "_ddl_if", None)
+            if ddl_if is not None and ddl_if.dialect and ddl_if.dialect != dialect_name:
+                return False
+        return True
+    return include_object
+
+
+def alembic_config() -> Config:
+    """Alembic configuration pointing at this package, without an ini file"""
+    config = Config()
+    config.set_main_option("script_location", os.path.dirname(__file__))
+    return config
+
+
+def upgrade(engine: Engine, revision: str = "head") -> None:
+    """Migrate the database to revision"""
+    config = alembic_config()
+    with engine.connect() as connection:
+        locked = connection.dialect.name == "postgresql"
+        if locked:
+            connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            connection.commit()
+        try:
+            config.attributes["connection"] = connection
+            command.upgrade(config, revision)
+        finally:
+            if locked:
+                connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+                connection.commit()
+    logger.info(f"Database schema at {revision}")
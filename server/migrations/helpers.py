@@ -0,0 +1,44 @@
+"""Schema checks for migrations that must also run on databases created by create_all
+
+In offline (--sql) mode there is no database to inspect, so every object
+is assumed missing and the full DDL is emitted.
+"""
+
+from typing import List
+
+from alembic import op
+from sqlalchemy import inspect
+
+
+def _offline() -> bool:
+    return op.get_context().as_sql
+
+
+def is_postgresql() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def has_table(table: str) -> bool:
+    return not _offline() and inspect(op.get_bind()).has_table(table)
+
+
+def has_column(table: str, column: str) -> bool:
+    return not _offline() and column in {info["name"] for info in inspect(op.get_bind()).get_columns(table)}
+
+
+def has_index(table: str, name: str) -> bool:
+    return not _offline() and name in {info["name"] for info in inspect(op.get_bind()).get_indexes(table)}
+
+
+def create_index(name: str, table: str, columns: List[str], **kwargs) -> None:
+    """Create an index unless one with that name exists"""
+    if not has_index(table, name):
+        op.create_index(name, table, columns, **kwargs)
+
+
+def drop_index(name: str, table: str) -> None:
+    """Drop an index if it exists"""
+    if _offline():
+        op.drop_index(name, table_name=table, if_exists=True)
+    elif has_index(table, name):
+        op.drop_index(name, table_name=table)
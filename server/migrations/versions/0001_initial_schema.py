@@ -0,0 +1,153 @@
+"""Initial schema
+
+Tables of the first release. On PostgreSQL with metrics_partitioning,
+monitoring_metrics is created as a table partitioned by day instead.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from server.config import settings
+from server.migrations.helpers import has_table, is_postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The primary key has to include the partition key; the ORM keeps mapping
+# ``id`` alone, which stays unique.
+PARTITIONED_METRICS_DDL = """
+CREATE TABLE monitoring_metrics (
+    id BIGSERIAL,
+    equipment_id INTEGER REFERENCES equipment (id),
+    metric_name VARCHAR,
+    metric_value DOUBLE PRECISION,
+    unit VARCHAR,
+    timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+    zabbix_item_id VARCHAR,
+    zabbix_host_id VARCHAR,
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp)
+"""
+
+
+def upgrade() -> None:
+    if not has_table("equipment"):
+        op.create_table(
+            "equipment",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("zabbix_host_id", sa.String(), nullable=True),
+            sa.Column("name", sa.String(), nullable=True),
+            sa.Column("hostname", sa.String(), nullable=True),
+            sa.Column("ip_address", sa.String(), nullable=True),
+            sa.Column("equipment_type", sa.String(), nullable=True),
+            sa.Column("location", sa.String(), nullable=True),
+            sa.Column("client_name", sa.String(), nullable=True),
+            sa.Column("status", sa.String(), nullable=True),
+            sa.Column("last_seen", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+            sa.PrimaryKeyConstraint("id")
+        )
+        op.create_index("ix_equipment_id", "equipment", ["id"])
+        op.create_index("ix_equipment_zabbix_host_id", "equipment", ["zabbix_host_id"], unique=True)
+        op.create_index("ix_equipment_name", "equipment", ["name"])
+        op.create_index("ix_equipment_hostname", "equipment", ["hostname"])
+        op.create_index("ix_equipment_ip_address", "equipment", ["ip_address"])
+        op.create_index("ix_equipment_client_name", "equipment", ["client_name"])
+
+    if not has_table("alarms"):
+        op.create_table(
+            "alarms",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("zabbix_event_id", sa.String(), nullable=True),
+            sa.Column("equipment_id", sa.Integer(), sa.ForeignKey("equipment.id"), nullable=True),
+            sa.Column("alarm_type", sa.String(), nullable=True),
+            sa.Column("severity", sa.String(), nullable=True),
+            sa.Column("title", sa.String(), nullable=True),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("status", sa.String(), nullable=True),
+            sa.Column("acknowledged_by", sa.String(), nullable=True),
+            sa.Column("acknowledged_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("resolved_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("zabbix_trigger_id", sa.String(), nullable=True),
+            sa.Column("zabbix_item_id", sa.String(), nullable=True),
+            sa.Column("zabbix_host_id", sa.String(), nullable=True),
+            sa.PrimaryKeyConstraint("id")
+        )
+        op.create_index("ix_alarms_id", "alarms", ["id"])
+        op.create_index("ix_alarms_zabbix_event_id", "alarms", ["zabbix_event_id"], unique=True)
+
+    if not has_table("documentation"):
+        op.create_table(
+            "documentation",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("equipment_id", sa.Integer(), sa.ForeignKey("equipment.id"), nullable=True),
+            sa.Column("alarm_id", sa.Integer(), sa.ForeignKey("alarms.id"), nullable=True),
+            sa.Column("title", sa.String(), nullable=True),
+            sa.Column("content", sa.Text(), nullable=True),
+            sa.Column("doc_type", sa.String(), nullable=True),
+            sa.Column("author", sa.String(), nullable=True),
+            sa.Column("tags", sa.JSON(), nullable=True),
+            sa.Column("is_public", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+            sa.PrimaryKeyConstraint("id")
+        )
+        op.create_index("ix_documentation_id", "documentation", ["id"])
+
+    if not has_table("monitoring_metrics"):
+        if is_postgresql() and settings.metrics_partitioning:
+            op.execute(PARTITIONED_METRICS_DDL)
+            op.execute("CREATE TABLE monitoring_metrics_default PARTITION OF monitoring_metrics DEFAULT")
+        else:
+            op.create_table(
+                "monitoring_metrics",
+                sa.Column("id", sa.Integer(), nullable=False),
+                sa.Column("equipment_id", sa.Integer(), sa.ForeignKey("equipment.id"), nullable=True),
+                sa.Column("metric_name", sa.String(), nullable=True),
+                sa.Column("metric_value", sa.Float(), nullable=True),
+                sa.Column("unit", sa.String(), nullable=True),
+                sa.Column("timestamp", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+                sa.Column("zabbix_item_id", sa.String(), nullable=True),
+                sa.Column("zabbix_host_id", sa.String(), nullable=True),
+                sa.PrimaryKeyConstraint("id")
+            )
+            op.create_index("ix_monitoring_metrics_id", "monitoring_metrics", ["id"])
+        op.create_index("ix_monitoring_metrics_metric_name", "monitoring_metrics", ["metric_name"])
+
+    if not has_table("users"):
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("username", sa.String(), nullable=True),
+            sa.Column("email", sa.String(), nullable=True),
+            sa.Column("hashed_password", sa.String(), nullable=True),
+            sa.Column("full_name", sa.String(), nullable=True),
+            sa.Column("role", sa.String(), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column("last_login", sa.DateTime(timezone=True), nullable=True),
+            sa.PrimaryKeyConstraint("id")
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_username", "users", ["username"], unique=True)
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_table("users")
+    op.drop_table("monitoring_metrics")
+    op.drop_table("documentation")
+    op.drop_table("alarms")
+    op.drop_table("equipment")
@@ -0,0 +1,115 @@
+"""Sync state, rollups, change log, stats counters and search indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:01
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from server.migrations.helpers import create_index, drop_index, has_column, has_table, is_postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ROLLUP_TABLES = ("metric_rollups_1m", "metric_rollups_1h", "metric_rollups_1d")
+TRIGRAM_COLUMNS = ("name", "hostname", "ip_address", "client_name")
+
+
+def upgrade() -> None:
+    if not has_column("equipment", "zabbix_fingerprint"):
+        op.add_column("equipment", sa.Column("zabbix_fingerprint", sa.String(), nullable=True))
+
+    for table in ROLLUP_TABLES:
+        if not has_table(table):
+            op.create_table(
+                table,
+                sa.Column("id", sa.Integer(), nullable=False),
+                sa.Column("equipment_id", sa.Integer(), sa.ForeignKey("equipment.id"), nullable=True),
+                sa.Column("metric_name", sa.String(), nullable=True),
+                sa.Column("bucket", sa.DateTime(timezone=True), nullable=True),
+                sa.Column("min_value", sa.Float(), nullable=True),
+                sa.Column("max_value", sa.Float(), nullable=True),
+                sa.Column("sum_value", sa.Float(), nullable=True),
+                sa.Column("count", sa.Integer(), nullable=True),
+                sa.Column("last_value", sa.Float(), nullable=True),
+                sa.Column("last_timestamp", sa.DateTime(timezone=True), nullable=True),
+                sa.PrimaryKeyConstraint("id"),
+                sa.UniqueConstraint("equipment_id", "metric_name", "bucket", name=f"uq_{table}_series_bucket")
+            )
+            op.create_index(f"ix_{table}_id", table, ["id"])
+
+    if not has_table("sync_state"):
+        op.create_table(
+            "sync_state",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(), nullable=True),
+            sa.Column("last_event_id", sa.String(), nullable=True),
+            sa.Column("last_clock", sa.Integer(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.PrimaryKeyConstraint("id")
+        )
+        op.create_index("ix_sync_state_id", "sync_state", ["id"])
+        op.create_index("ix_sync_state_name", "sync_state", ["name"], unique=True)
+
+    if not has_table("change_log"):
+        op.create_table(
+            "change_log",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("entity_type", sa.String(), nullable=True),
+            sa.Column("entity_key", sa.String(), nullable=True),
+            sa.Column("change_type", sa.String(), nullable=True),
+            sa.Column("changes", sa.JSON(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.PrimaryKeyConstraint("id")
+        )
+        op.create_index("ix_change_log_id", "change_log", ["id"])
+        op.create_index("ix_change_log_entity_type", "change_log", ["entity_type"])
+
+    if not has_table("stats_counters"):
+        op.create_table(
+            "stats_counters",
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("value", sa.Integer(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.PrimaryKeyConstraint("name")
+        )
+
+    # Retention range scans and keyset pagination
+    create_index("ix_monitoring_metrics_timestamp", "monitoring_metrics", ["timestamp"])
+    create_index("ix_equipment_created_at_id", "equipment", ["created_at", "id"])
+    create_index("ix_alarms_created_at_id", "alarms", ["created_at", "id"])
+    # Superseded by ix_alarms_created_at_id
+    drop_index("ix_alarms_created_at", "alarms")
+    create_index("ix_alarms_resolved_at", "alarms", ["resolved_at"])
+
+    if is_postgresql():
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for column in TRIGRAM_COLUMNS:
+            create_index(
+                f"ix_equipment_{column}_trgm", "equipment", [column],
+                postgresql_using="gin", postgresql_ops={column: "gin_trgm_ops"}
+            )
+
+
+def downgrade() -> None:
+    if is_postgresql():
+        for column in TRIGRAM_COLUMNS:
+            drop_index(f"ix_equipment_{column}_trgm", "equipment")
+    drop_index("ix_alarms_resolved_at", "alarms")
+    drop_index("ix_alarms_created_at_id", "alarms")
+    drop_index("ix_equipment_created_at_id", "equipment")
+    drop_index("ix_monitoring_metrics_timestamp", "monitoring_metrics")
+    op.drop_table("stats_counters")
+    op.drop_table("change_log")
+    op.drop_table("sync_state")
+    for table in ROLLUP_TABLES:
+        op.drop_table(table)
+    with op.batch_alter_table("equipment") as batch:
+        batch.drop_column("zabbix_fingerprint")
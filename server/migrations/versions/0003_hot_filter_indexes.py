@@ -0,0 +1,44 @@
+"""Indexes for hot alarm, equipment, metric and documentation filters
+
+- alarms (status, alarm_type, created_at): list filters and stats grouping
+- alarms (equipment_id, status): per-equipment alarm lookups
+- monitoring_metrics (equipment_id, metric_name, timestamp): series reads
+- equipment (status): status filter counts and stats grouping
+- documentation (equipment_id), (alarm_id): per-equipment counts, and the
+  lookups made when deleting an equipment or alarm
+
+Range scans on alarms.created_at alone are served by ix_alarms_created_at_id.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:02
+
+"""
+from typing import Sequence, Union
+
+from server.migrations.helpers import create_index, drop_index
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    create_index("ix_alarms_status_type_created_at", "alarms", ["status", "alarm_type", "created_at"])
+    create_index("ix_alarms_equipment_id_status", "alarms", ["equipment_id", "status"])
+    create_index("ix_monitoring_metrics_series_timestamp", "monitoring_metrics",
+                 ["equipment_id", "metric_name", "timestamp"])
+    create_index("ix_equipment_status", "equipment", ["status"])
+    create_index("ix_documentation_equipment_id", "documentation", ["equipment_id"])
+    create_index("ix_documentation_alarm_id", "documentation", ["alarm_id"])
+
+
+def downgrade() -> None:
+    drop_index("ix_documentation_alarm_id", "documentation")
+    drop_index("ix_documentation_equipment_id", "documentation")
+    drop_index("ix_equipment_status", "equipment")
+    drop_index("ix_monitoring_metrics_series_timestamp", "monitoring_metrics")
+    drop_index("ix_alarms_equipment_id_status", "alarms")
+    drop_index("ix_alarms_status_type_created_at", "alarms")
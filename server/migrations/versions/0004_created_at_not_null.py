@@ -0,0 +1,44 @@
+"""Make equipment and alarms created_at NOT NULL
+
+Keyset pagination compares (created_at, id) as a tuple, which skips rows
+whose created_at is NULL. Existing NULLs are backfilled from updated_at,
+or the migration time when that is NULL too.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:03
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("equipment", "alarms")
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.execute(
+            f"UPDATE {table} SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP) WHERE created_at IS NULL"
+        )
+        with op.batch_alter_table(table) as batch:
+            batch.alter_column(
+                "created_at", existing_type=sa.DateTime(timezone=True),
+                existing_server_default=sa.func.now(), nullable=False
+            )
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch:
+            batch.alter_column(
+                "created_at", existing_type=sa.DateTime(timezone=True),
+                existing_server_default=sa.func.now(), nullable=True
+            )
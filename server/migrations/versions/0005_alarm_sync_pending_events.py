@@ -0,0 +1,30 @@
+"""Add sync_state.pending_events
+
+Problem events of hosts that are not synced as equipment yet are kept here
+and retried by event ID, instead of holding the alarm sync watermark below
+them.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:00:04
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("sync_state", sa.Column("pending_events", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("sync_state") as batch:
+        batch.drop_column("pending_events")
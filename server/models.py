@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Float, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Float, JSON, UniqueConstraint, Index, DDL, event
+from sqlalchemy.orm import relationship, declared_attr
 from sqlalchemy.sql import func
 from .database import Base
 
@@ -15,16 +15,34 @@ class Equipment(Base):
     equipment_type = Column(String)  # router, switch, server, etc.
     location = Column(String)
     client_name = Column(String, index=True)
-    status = Column(String)  # online, offline, maintenance
+    status = Column(String, index=True)  # online, offline, maintenance
     last_seen = Column(DateTime(timezone=True), server_default=func.now())
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    zabbix_fingerprint = Column(String, nullable=True)  # hash of the synced Zabbix attributes
+    
+    __table_args__ = (
+        # Keyset pagination order
+        Index("ix_equipment_created_at_id", "created_at", "id"),
+        # Trigram indexes for ranked substring/fuzzy search (pg_trgm)
+        *(
+            Index(f"ix_equipment_{column}_trgm", column, postgresql_using="gin",
+                  postgresql_ops={column: "gin_trgm_ops"}).ddl_if(dialect="postgresql")
+            for column in ("name", "hostname", "ip_address", "client_name")
+        ),
+    )
     
     # Relationships
     alarms = relationship("Alarm", back_populates="equipment")
     documentation = relationship("Documentation", back_populates="equipment")
 
 
+event.listen(
+    Equipment.__table__, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
+
+
 class Alarm(Base):
     __tablename__ = "alarms"
     
@@ -38,8 +56,8 @@ class Alarm(Base):
     status = Column(String)  # active, resolved, acknowledged
     acknowledged_by = Column(String, nullable=True)
     acknowledged_at = Column(DateTime(timezone=True), nullable=True)
-    resolved_at = Column(DateTime(timezone=True), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    resolved_at = Column(DateTime(timezone=True), nullable=True, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Zabbix specific fields
@@ -47,6 +65,15 @@ class Alarm(Base):
     zabbix_item_id = Column(String, nullable=True)
     zabbix_host_id = Column(String, nullable=True)
     
+    __table_args__ = (
+        # Keyset pagination order; also serves created_at range scans in retention
+        Index("ix_alarms_created_at_id", "created_at", "id"),
+        # List filters and stats grouping
+        Index("ix_alarms_status_type_created_at", "status", "alarm_type", "created_at"),
+        # Alarms of one equipment
+        Index("ix_alarms_equipment_id_status", "equipment_id", "status"),
+    )
+    
     # Relationships
     equipment = relationship("Equipment", back_populates="alarms")
     documentation = relationship("Documentation", back_populates="alarm")
@@ -56,8 +83,8 @@ class Documentation(Base):
     __tablename__ = "documentation"
     
     id = Column(Integer, primary_key=True, index=True)
-    equipment_id = Column(Integer, ForeignKey("equipment.id"))
-    alarm_id = Column(Integer, ForeignKey("alarms.id"), nullable=True)
+    equipment_id = Column(Integer, ForeignKey("equipment.id"), index=True)
+    alarm_id = Column(Integer, ForeignKey("alarms.id"), nullable=True, index=True)
     title = Column(String)
     content = Column(Text)
     doc_type = Column(String)  # procedure, troubleshooting, maintenance
@@ -80,11 +107,75 @@ class MonitoringMetrics(Base):
     metric_name = Column(String, index=True)
     metric_value = Column(Float)
     unit = Column(String)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     
     # Zabbix specific
     zabbix_item_id = Column(String, nullable=True)
     zabbix_host_id = Column(String, nullable=True)
+    
+    # Series reads of one equipment metric over a time range
+    __table_args__ = (Index("ix_monitoring_metrics_series_timestamp", "equipment_id", "metric_name", "timestamp"),)
+
+
+class MetricRollupMixin:
+    """Per-bucket aggregate of monitoring_metrics rows for one equipment metric"""
+    
+    id = Column(Integer, primary_key=True, index=True)
+    equipment_id = Column(Integer, ForeignKey("equipment.id"))
+    metric_name = Column(String)
+    bucket = Column(DateTime(timezone=True))  # start of the bucket, UTC
+    min_value = Column(Float)
+    max_value = Column(Float)
+    sum_value = Column(Float)
+    count = Column(Integer)
+    last_value = Column(Float)
+    last_timestamp = Column(DateTime(timezone=True))
+    
+    @declared_attr
+    def __table_args__(cls):
+        return (UniqueConstraint("equipment_id", "metric_name", "bucket", name=f"uq_{cls.__tablename__}_series_bucket"),)
+
+
+class MetricRollup1m(MetricRollupMixin, Base):
+    __tablename__ = "metric_rollups_1m"
+
+
+class MetricRollup1h(MetricRollupMixin, Base):
+    __tablename__ = "metric_rollups_1h"
+
+
+class MetricRollup1d(MetricRollupMixin, Base):
+    __tablename__ = "metric_rollups_1d"
+
+
+class SyncState(Base):
+    __tablename__ = "sync_state"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, index=True)  # e.g. alarm_events
+    last_event_id = Column(String, nullable=True)
+    last_clock = Column(Integer, nullable=True)  # Unix timestamp from Zabbix
+    pending_events = Column(JSON, nullable=True)  # {event ID: clock} retried until their host is synced
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class ChangeLog(Base):
+    __tablename__ = "change_log"
+    
+    id = Column(Integer, primary_key=True, index=True)  # sequence number consumers tail by
+    entity_type = Column(String, index=True)  # e.g. equipment
+    entity_key = Column(String)  # Zabbix ID of the entity
+    change_type = Column(String)  # created, updated, vanished
+    changes = Column(JSON)  # {field: [old, new]}
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class StatsCounter(Base):
+    __tablename__ = "stats_counters"
+    
+    name = Column(String, primary_key=True)  # e.g. alarms:active:critical, equipment:online
+    value = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 
 class User(Base):
@@ -1,11 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
 
+from ..config import settings
 from ..database import get_db
-from ..schemas import Alarm, AlarmCreate, AlarmUpdate, PaginatedResponse
+from ..schemas import Alarm, AlarmCreate, AlarmUpdate, PaginatedResponse, SyncWatermark
 from ..services.alarm_service import AlarmService
+from ..services.job_service import job_manager
+from ..services.response_cache import response_cache
+from ..utils.pagination import InvalidCursor
 
 router = APIRouter(prefix="/alarms", tags=["alarms"])
 
@@ -14,28 +18,45 @@ router = APIRouter(prefix="/alarms", tags=["alarms"])
 def get_alarms(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
     status: Optional[str] = None,
     alarm_type: Optional[str] = None,
     equipment_id: Optional[int] = None,
+    estimate_total: bool = False,
     db: Session = Depends(get_db)
 ):
-    """Get alarms with pagination and filtering"""
-    alarms = AlarmService.get_alarms(
-        db, skip=skip, limit=limit,
-        status=status, alarm_type=alarm_type, equipment_id=equipment_id
-    )
+    """Get alarms with pagination and filtering
+    
+    Pass the returned next_cursor as cursor to page without OFFSET; skip is
+    still accepted for jumping to a page number.
+    """
+    next_cursor = None
+    try:
+        if skip and not cursor:
+            alarms = AlarmService.get_alarms(
+                db, skip=skip, limit=limit,
+                status=status, alarm_type=alarm_type, equipment_id=equipment_id
+            )
+        else:
+            alarms, next_cursor = AlarmService.get_alarms_page(
+                db, limit=limit, cursor=cursor,
+                status=status, alarm_type=alarm_type, equipment_id=equipment_id
+            )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Get total count for pagination
-    total = AlarmService.get_alarms(db, skip=0, limit=10000,
-                                  status=status, alarm_type=alarm_type, equipment_id=equipment_id)
-    total_count = len(total)
+    total_count, estimated = AlarmService.count_alarms(
+        db, status=status, alarm_type=alarm_type, equipment_id=equipment_id, estimate=estimate_total
+    )
     
     return PaginatedResponse(
-        items=alarms,
+        items=[Alarm.model_validate(alarm) for alarm in alarms],
         total=total_count,
-        page=skip // limit + 1,
+        page=None if cursor else skip // limit + 1,
         size=limit,
-        pages=(total_count + limit - 1) // limit
+        pages=(total_count + limit - 1) // limit,
+        next_cursor=next_cursor,
+        total_estimated=estimated
     )
 
 
@@ -103,19 +124,43 @@ def resolve_alarm(alarm_id: int, db: Session = Depends(get_db)):
     return alarm
 
 
-@router.post("/sync")
-def sync_alarms_with_zabbix(db: Session = Depends(get_db)):
-    """Synchronize alarms with Zabbix"""
-    result = AlarmService.sync_alarms_with_zabbix(db)
-    if "error" in result:
-        raise HTTPException(status_code=500, detail=result["error"])
-    return result
+@router.post("/sync", status_code=202)
+def sync_alarms_with_zabbix(response: Response):
+    """Queue a sync with Zabbix, or attach to the one already running; poll /jobs/{id} for progress"""
+    job, _ = job_manager.submit("alarm_sync")
+    response.headers["Location"] = f"/api/v1/jobs/{job.id}"
+    return job.to_dict()
+
+
+@router.post("/reconcile", status_code=202)
+def reconcile_alarms_with_zabbix(response: Response):
+    """Queue a reconciliation of open alarms against the problems open in Zabbix"""
+    # In problems mode the regular sync is the reconciliation
+    job, _ = job_manager.submit("alarm_reconcile" if settings.alarm_sync_mode == "events" else "alarm_sync")
+    response.headers["Location"] = f"/api/v1/jobs/{job.id}"
+    return job.to_dict()
+
+
+@router.get("/sync/watermark", response_model=SyncWatermark)
+def get_alarm_sync_watermark(db: Session = Depends(get_db)):
+    """Get the event watermark used by incremental alarm sync"""
+    watermark = AlarmService.get_sync_watermark(db)
+    if not watermark:
+        raise HTTPException(status_code=404, detail="No alarm sync watermark stored")
+    return watermark
+
+
+@router.delete("/sync/watermark")
+def reset_alarm_sync_watermark(db: Session = Depends(get_db)):
+    """Reset the event watermark so the next sync re-reads the initial lookback window"""
+    AlarmService.reset_sync_watermark(db)
+    return {"message": "Alarm sync watermark reset successfully"}
 
 
 @router.get("/stats/summary")
-def get_alarm_stats(db: Session = Depends(get_db)):
-    """Get alarm statistics"""
-    return AlarmService.get_alarm_stats(db)
+def get_alarm_stats(request: Request, db: Session = Depends(get_db)):
+    """Get alarm statistics (cached)"""
+    return response_cache.cached(request, ("alarms",), lambda: AlarmService.get_alarm_stats(db))
 
 
 @router.get("/equipment/{equipment_id}", response_model=List[Alarm])
@@ -138,12 +183,12 @@ def get_recent_alarms(hours: int = 24, db: Session = Depends(get_db)):
 
 
 @router.get("/trends/{days}")
-def get_alarm_trends(days: int = 7, db: Session = Depends(get_db)):
-    """Get alarm trends over time"""
+def get_alarm_trends(request: Request, days: int = 7, db: Session = Depends(get_db)):
+    """Get alarm trends over time (cached)"""
     if days < 1 or days > 30:  # Max 30 days
         raise HTTPException(status_code=400, detail="Days must be between 1 and 30")
     
-    return AlarmService.get_alarm_trends(db, days)
+    return response_cache.cached(request, ("alarms",), lambda: AlarmService.get_alarm_trends(db, days))
 
 
 @router.get("/active/critical", response_model=List[Alarm])
@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from ..database import get_db
+from ..services.change_log_service import ChangeLogService
+
+router = APIRouter(prefix="/changes", tags=["changes"])
+
+
+@router.get("/")
+def get_changes(
+    after: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=10000),
+    entity_type: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Tail the change log; pass the returned next value as after to continue"""
+    return ChangeLogService.tail(db, after=after, limit=limit, entity_type=entity_type)
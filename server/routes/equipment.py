@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
@@ -6,6 +6,9 @@ from datetime import datetime
 from ..database import get_db
 from ..schemas import Equipment, EquipmentCreate, EquipmentUpdate, EquipmentWithAlarms, PaginatedResponse
 from ..services.equipment_service import EquipmentService
+from ..services.job_service import job_manager
+from ..services.response_cache import response_cache
+from ..utils.pagination import InvalidCursor
 
 router = APIRouter(prefix="/equipment", tags=["equipment"])
 
@@ -14,27 +17,59 @@ router = APIRouter(prefix="/equipment", tags=["equipment"])
 def get_equipment(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
     client_name: Optional[str] = None,
     status: Optional[str] = None,
+    search: Optional[str] = None,
+    estimate_total: bool = False,
     db: Session = Depends(get_db)
 ):
-    """Get equipment with pagination and filtering"""
-    equipment = EquipmentService.get_equipment(
-        db, skip=skip, limit=limit, 
-        client_name=client_name, status=status
-    )
+    """Get equipment with pagination and filtering
+    
+    Pass the returned next_cursor as cursor to page without OFFSET; skip is
+    still accepted for jumping to a page number. With search, the best
+    limit matches of /equipment/search (narrowed by client_name and status)
+    are returned as a single page.
+    """
+    if search:
+        equipment = EquipmentService.search_equipment(
+            db, search, limit, client_name=client_name, status=status
+        )
+        return PaginatedResponse(
+            items=[Equipment.model_validate(item) for item in equipment],
+            total=len(equipment),
+            page=1,
+            size=limit,
+            pages=1
+        )
     
-    # Get total count for pagination
-    total = EquipmentService.get_equipment(db, skip=0, limit=10000, 
-                                         client_name=client_name, status=status)
-    total_count = len(total)
+    next_cursor = None
+    try:
+        if skip and not cursor:
+            equipment = EquipmentService.get_equipment(
+                db, skip=skip, limit=limit, 
+                client_name=client_name, status=status
+            )
+        else:
+            equipment, next_cursor = EquipmentService.get_equipment_page(
+                db, limit=limit, cursor=cursor,
+                client_name=client_name, status=status
+            )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    total_count, estimated = EquipmentService.count_equipment(
+        db, client_name=client_name, status=status, estimate=estimate_total
+    )
     
     return PaginatedResponse(
-        items=equipment,
+        items=[Equipment.model_validate(item) for item in equipment],
         total=total_count,
-        page=skip // limit + 1,
+        page=None if cursor else skip // limit + 1,
         size=limit,
-        pages=(total_count + limit - 1) // limit
+        pages=(total_count + limit - 1) // limit,
+        next_cursor=next_cursor,
+        total_estimated=estimated
     )
 
 
@@ -89,25 +124,28 @@ def delete_equipment(equipment_id: int, db: Session = Depends(get_db)):
     return {"message": "Equipment deleted successfully"}
 
 
-@router.post("/sync")
-def sync_equipment_with_zabbix(db: Session = Depends(get_db)):
-    """Synchronize equipment with Zabbix"""
-    result = EquipmentService.sync_with_zabbix(db)
-    if "error" in result:
-        raise HTTPException(status_code=500, detail=result["error"])
-    return result
+@router.post("/sync", status_code=202)
+def sync_equipment_with_zabbix(response: Response):
+    """Queue a sync with Zabbix, or attach to the one already running; poll /jobs/{id} for progress"""
+    job, _ = job_manager.submit("equipment_sync")
+    response.headers["Location"] = f"/api/v1/jobs/{job.id}"
+    return job.to_dict()
 
 
 @router.get("/stats/summary")
-def get_equipment_stats(db: Session = Depends(get_db)):
-    """Get equipment statistics"""
-    return EquipmentService.get_equipment_stats(db)
+def get_equipment_stats(request: Request, db: Session = Depends(get_db)):
+    """Get equipment statistics (cached)"""
+    return response_cache.cached(request, ("equipment",), lambda: EquipmentService.get_equipment_stats(db))
 
 
 @router.get("/client/{client_name}", response_model=List[Equipment])
-def get_equipment_by_client(client_name: str, db: Session = Depends(get_db)):
-    """Get all equipment for a specific client"""
-    return EquipmentService.get_equipment_by_client(db, client_name)
+def get_equipment_by_client(
+    client_name: str,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """Get equipment for a client, closest client name first"""
+    return EquipmentService.get_equipment_by_client(db, client_name, limit)
 
 
 @router.get("/{equipment_id}/health")
@@ -119,7 +157,58 @@ def get_equipment_health(equipment_id: int, db: Session = Depends(get_db)):
     return health
 
 
+@router.get("/{equipment_id}/zabbix-status")
+def get_equipment_zabbix_status(equipment_id: int, db: Session = Depends(get_db)):
+    """Get the Zabbix host status, interfaces, items and triggers"""
+    status = EquipmentService.get_equipment_zabbix_status(db, equipment_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Equipment not found")
+    return status
+
+
+@router.get("/{equipment_id}/metrics")
+def get_equipment_metrics(
+    equipment_id: int,
+    hours: int = Query(1, ge=1, le=8760),
+    keys: Optional[List[str]] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """Get per-item metric time series from Zabbix"""
+    metrics = EquipmentService.get_equipment_metrics(db, equipment_id, hours, keys)
+    if metrics is None:
+        raise HTTPException(status_code=404, detail="Equipment not found")
+    return metrics
+
+
+@router.get("/{equipment_id}/metrics/history")
+def get_equipment_metric_history(
+    equipment_id: int,
+    hours: int = Query(24, ge=1, le=24 * 365),
+    metrics: Optional[List[str]] = Query(None),
+    max_points: Optional[int] = Query(None, ge=1, le=10000),
+    db: Session = Depends(get_db)
+):
+    """Get stored metric history, aggregated to fit max_points"""
+    history = EquipmentService.get_equipment_metric_history(db, equipment_id, hours, metrics, max_points)
+    if history is None:
+        raise HTTPException(status_code=404, detail="Equipment not found")
+    return history
+
+
+@router.get("/search/autocomplete/{prefix}")
+def autocomplete_equipment(prefix: str, limit: int = Query(10, ge=1, le=50), db: Session = Depends(get_db)):
+    """Suggest equipment names and hostnames starting with prefix"""
+    return EquipmentService.autocomplete_equipment(db, prefix, limit)
+
+
 @router.get("/search/{search_term}", response_model=List[Equipment])
-def search_equipment(search_term: str, db: Session = Depends(get_db)):
-    """Search equipment by name, hostname, IP, or client"""
-    return EquipmentService.search_equipment(db, search_term) 
\ No newline at end of file
+def search_equipment(
+    search_term: str,
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db)
+):
+    """Search equipment by name, hostname, IP, or client, best match first
+    
+    An IP address or numeric Zabbix hostid matching exactly is returned alone.
+    """
+    return EquipmentService.search_equipment(db, search_term, limit) 
\ No newline at end of file
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, HTTPException
+from typing import Optional
+
+from ..services.job_service import job_manager
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+@router.get("/")
+def get_jobs(name: Optional[str] = None):
+    """List queued, running and recently finished jobs"""
+    return {
+        "jobs": [job.to_dict() for job in job_manager.list(name)],
+        "stats": job_manager.stats()
+    }
+
+
+@router.get("/{job_id}")
+def get_job(job_id: str):
+    """Get a job's status, progress counts and result"""
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
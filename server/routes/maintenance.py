@@ -0,0 +1,44 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from ..services.response_cache import response_cache
+from ..services.retention_service import retention_service
+from ..services.scheduler import scheduler, JobBusy
+from ..services.search_service import equipment_search
+
+router = APIRouter(prefix="/maintenance", tags=["maintenance"])
+
+
+@router.post("/retention/run")
+async def run_retention():
+    """Purge data older than the configured retention and report reclaimed rows"""
+    try:
+        return await run_in_threadpool(scheduler.run_job, "retention")
+    except JobBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Retention failed: {str(e)}")
+
+
+@router.get("/retention/stats")
+def get_retention_stats():
+    """Get the last retention run's report"""
+    return retention_service.stats()
+
+
+@router.get("/response-cache")
+def get_response_cache_stats():
+    """Get dashboard/stats response cache hits, misses and invalidations"""
+    return response_cache.stats()
+
+
+@router.get("/search")
+def get_search_stats():
+    """Get equipment search counters and in-process index size"""
+    return equipment_search.stats()
+
+
+@router.get("/scheduler")
+def get_scheduler_stats():
+    """Get scheduled job run counts, durations and lag"""
+    return scheduler.stats()
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, HTTPException
+
+from ..database import engine
+from ..config import settings
+from ..services.metrics_service import metrics_collector, live_metrics
+from ..services.rollup_service import RollupService
+from ..services.scheduler import scheduler, JobBusy
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("/ingestion/stats")
+def get_ingestion_stats():
+    """Get metrics ingestion queue and throughput counters"""
+    return {**metrics_collector.stats(), "live": live_metrics.stats()}
+
+
+@router.get("/live")
+def get_live_metrics():
+    """Get per-metric aggregates over recent samples of all equipment"""
+    return live_metrics.fleet_summary(settings.metrics_live_window)
+
+
+@router.get("/live/{metric_name:path}")
+def get_live_metric(metric_name: str):
+    """Get recent aggregates of one metric for every equipment"""
+    return live_metrics.aggregate(metric_name, settings.metrics_live_window)
+
+
+@router.post("/ingestion/collect")
+def collect_metrics():
+    """Poll Zabbix once and queue new item values for writing"""
+    try:
+        if not metrics_collector.stats()["running"]:
+            metrics_collector.start(collect=False)
+        enqueued = scheduler.run_job("metrics_collect")
+        return {"message": "Metrics collection completed", "enqueued": enqueued}
+    except JobBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Metrics collection failed: {str(e)}")
+
+
+@router.post("/rollups/rebuild")
+def rebuild_rollups():
+    """Recompute 1m/1h/1d rollups from stored raw metrics"""
+    try:
+        return RollupService.rebuild(engine)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Rollup rebuild failed: {str(e)}")
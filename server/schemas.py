@@ -195,15 +195,39 @@ class ZabbixEvent(BaseModel):
     value: str
     acknowledged: str
     name: str
+    severity: str = "0"
+    hostid: Optional[str] = None  # first host of the event's trigger
+    r_eventid: Optional[str] = None  # recovery event of a problem; "0" while it is open
+
+
+class ZabbixProblem(BaseModel):
+    eventid: str
+    objectid: str
+    clock: str
+    name: str
+    severity: str = "0"
+    acknowledged: str = "0"
+
+
+class SyncWatermark(BaseModel):
+    name: str
+    last_event_id: Optional[str] = None
+    last_clock: Optional[int] = None
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
 
 
 # API Response Schemas
 class PaginatedResponse(BaseModel):
     items: List[Any]
     total: int
-    page: int
+    page: Optional[int] = None  # not set when paging by cursor
     size: int
     pages: int
+    next_cursor: Optional[str] = None  # pass as cursor to get the next page
+    total_estimated: bool = False
 
 
 class HealthCheck(BaseModel):
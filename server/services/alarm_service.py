@@ -1,23 +1,50 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc
-from typing import List, Optional, Dict, Any
+from sqlalchemy import func, desc, insert
+from typing import List, Optional, Dict, Any, Set, Tuple
+from collections import Counter
 from datetime import datetime, timedelta
 import logging
 
-from ..models import Alarm, Equipment
+from ..config import settings
+from ..models import Alarm, Equipment, SyncState
 from ..schemas import AlarmCreate, AlarmUpdate
+from ..utils.pagination import count_rows, keyset_page
+from ..utils.progress import report_progress
+from ..utils.upsert import chunked
 from .zabbix_service import zabbix_service
+from .zabbix_cache import cached_zabbix_service
+from .stats_service import StatsService, alarm_counter
+from .response_cache import response_cache
 
 logger = logging.getLogger(__name__)
 
+ALARM_SYNC_STATE = "alarm_events"
+
+# Zabbix event severity (0-5) to alarm type and severity
+ALARM_TYPE_BY_SEVERITY = {
+    "0": "info",
+    "1": "warning",
+    "2": "warning",
+    "3": "critical",
+    "4": "critical",
+    "5": "critical"
+}
+
+SEVERITY_BY_ZABBIX_SEVERITY = {
+    "0": "low",
+    "1": "low",
+    "2": "medium",
+    "3": "high",
+    "4": "high",
+    "5": "high"
+}
+
 
 class AlarmService:
     
     @staticmethod
-    def get_alarms(db: Session, skip: int = 0, limit: int = 100, 
-                  status: str = None, alarm_type: str = None, 
-                  equipment_id: int = None) -> List[Alarm]:
-        """Get alarms with optional filtering"""
+    def _alarms_query(db: Session, status: str = None, alarm_type: str = None,
+                      equipment_id: int = None):
         query = db.query(Alarm)
         
         if status:
@@ -29,7 +56,29 @@ class AlarmService:
         if equipment_id:
             query = query.filter(Alarm.equipment_id == equipment_id)
         
-        return query.order_by(desc(Alarm.created_at)).offset(skip).limit(limit).all()
+        return query
+    
+    @staticmethod
+    def get_alarms(db: Session, skip: int = 0, limit: int = 100, 
+                  status: str = None, alarm_type: str = None, 
+                  equipment_id: int = None) -> List[Alarm]:
+        """Get alarms with optional filtering"""
+        query = AlarmService._alarms_query(db, status, alarm_type, equipment_id)
+        return query.order_by(desc(Alarm.created_at), desc(Alarm.id)).offset(skip).limit(limit).all()
+    
+    @staticmethod
+    def get_alarms_page(db: Session, limit: int = 100, cursor: str = None,
+                        status: str = None, alarm_type: str = None,
+                        equipment_id: int = None) -> Tuple[List[Alarm], Optional[str]]:
+        """Get a page of alarms, newest first, after cursor; returns (alarms, next cursor)"""
+        query = AlarmService._alarms_query(db, status, alarm_type, equipment_id)
+        return keyset_page(query, Alarm, limit, cursor)
+    
+    @staticmethod
+    def count_alarms(db: Session, status: str = None, alarm_type: str = None,
+                     equipment_id: int = None, estimate: bool = False) -> Tuple[int, bool]:
+        """Count alarms matching the filters; returns (count, estimated)"""
+        return count_rows(AlarmService._alarms_query(db, status, alarm_type, equipment_id), estimate)
     
     @staticmethod
     def get_alarm_by_id(db: Session, alarm_id: int) -> Optional[Alarm]:
@@ -132,123 +181,313 @@ class AlarmService:
         logger.info(f"Alarm resolved: {db_alarm.title}")
         return db_alarm
     
+    @staticmethod
+    def get_sync_watermark(db: Session) -> Optional[SyncState]:
+        """Get the stored event watermark for alarm sync"""
+        return db.query(SyncState).filter(SyncState.name == ALARM_SYNC_STATE).first()
+    
+    @staticmethod
+    def reset_sync_watermark(db: Session) -> bool:
+        """Forget the event watermark so the next sync starts from the initial lookback"""
+        deleted = db.query(SyncState).filter(SyncState.name == ALARM_SYNC_STATE).delete()
+        db.commit()
+        logger.info("Alarm sync watermark reset")
+        return deleted > 0
+    
+    @staticmethod
+    def _existing_event_ids(db: Session, event_ids: List[str]) -> Set[str]:
+        """Get which of the given Zabbix event IDs already have alarms"""
+        existing = set()
+        for chunk in chunked(event_ids, settings.alarm_sync_chunk_size):
+            existing.update(
+                event_id for event_id, in db.query(Alarm.zabbix_event_id).filter(Alarm.zabbix_event_id.in_(chunk))
+            )
+        return existing
+    
     @staticmethod
     def sync_alarms_with_zabbix(db: Session) -> Dict[str, int]:
-        """Synchronize alarms with Zabbix events"""
+        """Synchronize alarms with Zabbix events newer than the stored watermark
+        
+        Problem events (value 1) become new alarms; recovery events (value 0)
+        resolve the open alarms of their trigger. Everything is computed in
+        memory and written with bulk statements in one transaction.
+        
+        Problem events of hosts not synced as equipment yet are kept in a
+        small pending set on the watermark row and fetched again by event ID
+        on later runs until the host exists, for up to
+        alarm_sync_initial_lookback_hours and at most
+        alarm_sync_max_pending_events of them. The watermark itself moves past
+        them, so one unknown host does not make every run re-read the window.
+        """
         try:
-            # Get recent events from Zabbix (last 24 hours)
-            zabbix_events = zabbix_service.get_events(
-                time_from=datetime.now() - timedelta(hours=24)
+            watermark = AlarmService.get_sync_watermark(db)
+            
+            if watermark and watermark.last_clock is not None:
+                # Re-read a small window before the watermark to catch late events
+                time_from = datetime.fromtimestamp(watermark.last_clock - settings.alarm_sync_overlap_seconds)
+                last_event_id = int(watermark.last_event_id or 0)
+            else:
+                time_from = datetime.now() - timedelta(hours=settings.alarm_sync_initial_lookback_hours)
+                last_event_id = 0
+            
+            max_event_id = last_event_id
+            max_clock = watermark.last_clock if watermark and watermark.last_clock is not None else 0
+            retry_cutoff = (datetime.now() - timedelta(hours=settings.alarm_sync_initial_lookback_hours)).timestamp()
+            
+            # Events of unsynced hosts left by earlier runs, until they age out
+            stored_pending = (watermark.pending_events if watermark else None) or {}
+            pending = {event_id: clock for event_id, clock in stored_pending.items() if clock >= retry_cutoff}
+            dropped_count = len(stored_pending) - len(pending)
+            
+            # Event IDs at or below the watermark were handled by a previous run
+            new_events = []
+            for zabbix_event in zabbix_service.iter_events(time_from=time_from):
+                event_id = int(zabbix_event.eventid)
+                max_clock = max(max_clock, int(zabbix_event.clock))
+                if event_id > last_event_id:
+                    new_events.append((event_id, zabbix_event))
+            new_events.sort(key=lambda pair: pair[0])
+            report_progress(events_read=len(new_events))
+            if new_events:
+                max_event_id = new_events[-1][0]
+            
+            # Pending events are all below the watermark, so they replay first
+            retried_events = []
+            if pending:
+                retried_events = sorted(
+                    ((int(zabbix_event.eventid), zabbix_event) for zabbix_event in zabbix_service.iter_events(
+                        time_from=datetime.fromtimestamp(min(pending.values())), eventids=sorted(pending)
+                    )),
+                    key=lambda pair: pair[0]
+                )
+                # Events Zabbix no longer returns (removed by housekeeping) are given up
+                returned = {zabbix_event.eventid for _, zabbix_event in retried_events}
+                dropped_count += len(pending.keys() - returned)
+                pending = {event_id: clock for event_id, clock in pending.items() if event_id in returned}
+            replay = retried_events + new_events
+            
+            equipment_ids = dict(db.query(Equipment.zabbix_host_id, Equipment.id))
+            existing_event_ids = AlarmService._existing_event_ids(
+                db, [zabbix_event.eventid for _, zabbix_event in replay if zabbix_event.value == "1"]
             )
             
-            synced_count = 0
-            created_count = 0
-            updated_count = 0
+            # Replay events in ID order: new alarms per trigger, and triggers
+            # whose alarms from earlier runs must be resolved
+            now = datetime.utcnow()
+            new_alarms: Dict[str, Dict[str, Any]] = {}
+            open_by_trigger: Dict[str, List[Dict[str, Any]]] = {}
+            recovered_triggers: Set[str] = set()
+            skipped_count = 0
             
-            for zabbix_event in zabbix_events:
-                # Check if alarm exists
-                existing_alarm = AlarmService.get_alarm_by_zabbix_event_id(db, zabbix_event.eventid)
+            for _, zabbix_event in replay:
+                trigger_id = zabbix_event.objectid
+                
+                if zabbix_event.value == "0":
+                    for alarm in open_by_trigger.pop(trigger_id, []):
+                        alarm["status"] = "resolved"
+                        alarm["resolved_at"] = now
+                    recovered_triggers.add(trigger_id)
+                    continue
+                
+                pending.pop(zabbix_event.eventid, None)
+                if zabbix_event.eventid in existing_event_ids:
+                    # Stored by an earlier run, after any recovery replayed here
+                    recovered_triggers.discard(trigger_id)
+                    skipped_count += 1
+                    continue
                 
-                if existing_alarm:
-                    # Update existing alarm if needed
-                    if existing_alarm.status != "resolved" and zabbix_event.value == "0":
-                        existing_alarm.status = "resolved"
-                        existing_alarm.resolved_at = datetime.utcnow()
-                        existing_alarm.updated_at = datetime.utcnow()
-                        updated_count += 1
-                else:
-                    # Create new alarm
-                    # Map Zabbix priority to alarm type
-                    priority_map = {
-                        "0": "info",
-                        "1": "warning", 
-                        "2": "warning",
-                        "3": "critical",
-                        "4": "critical",
-                        "5": "critical"
-                    }
-                    
-                    alarm_type = priority_map.get(zabbix_event.priority, "info")
-                    
-                    # Map priority to severity
-                    severity_map = {
-                        "0": "low",
-                        "1": "low",
-                        "2": "medium",
-                        "3": "high",
-                        "4": "high",
-                        "5": "high"
-                    }
-                    
-                    severity = severity_map.get(zabbix_event.priority, "low")
-                    
-                    # Find equipment by Zabbix host ID
-                    equipment = db.query(Equipment).filter(
-                        Equipment.zabbix_host_id == zabbix_event.objectid
-                    ).first()
-                    
-                    if equipment:
-                        alarm_data = AlarmCreate(
-                            equipment_id=equipment.id,
-                            zabbix_event_id=zabbix_event.eventid,
-                            zabbix_trigger_id=zabbix_event.objectid,
-                            zabbix_host_id=zabbix_event.objectid,
-                            alarm_type=alarm_type,
-                            severity=severity,
-                            title=zabbix_event.name or "Zabbix Event",
-                            description=f"Event from Zabbix: {zabbix_event.name}",
-                            status="active" if zabbix_event.value == "1" else "resolved"
-                        )
-                        
-                        AlarmService.create_alarm(db, alarm_data)
-                        created_count += 1
+                equipment_id = equipment_ids.get(zabbix_event.hostid)
+                if equipment_id is None:
+                    if int(zabbix_event.clock) >= retry_cutoff:
+                        pending[zabbix_event.eventid] = int(zabbix_event.clock)
+                    skipped_count += 1
+                    continue
                 
-                synced_count += 1
+                # A retried event may have recovered in a run that could not store it
+                recovered = zabbix_event.r_eventid not in (None, "", "0")
+                alarm = {
+                    "zabbix_event_id": zabbix_event.eventid,
+                    "equipment_id": equipment_id,
+                    "alarm_type": ALARM_TYPE_BY_SEVERITY.get(zabbix_event.severity, "info"),
+                    "severity": SEVERITY_BY_ZABBIX_SEVERITY.get(zabbix_event.severity, "low"),
+                    "title": zabbix_event.name or "Zabbix Event",
+                    "description": f"Event from Zabbix: {zabbix_event.name}",
+                    "status": "resolved" if recovered else "active",
+                    "resolved_at": now if recovered else None,
+                    "zabbix_trigger_id": trigger_id,
+                    "zabbix_host_id": zabbix_event.hostid
+                }
+                new_alarms[zabbix_event.eventid] = alarm
+                if not recovered:
+                    open_by_trigger.setdefault(trigger_id, []).append(alarm)
+            
+            # Resolve alarms stored by earlier runs before inserting this run's alarms
+            updated_count = 0
+            for chunk in chunked(sorted(recovered_triggers), settings.alarm_sync_chunk_size):
+                StatsService.alarm_transition(
+                    db, "resolved", Alarm.zabbix_trigger_id.in_(chunk), Alarm.status != "resolved"
+                )
+                updated_count += db.query(Alarm).filter(
+                    Alarm.zabbix_trigger_id.in_(chunk),
+                    Alarm.status != "resolved"
+                ).update({
+                    "status": "resolved",
+                    "resolved_at": now,
+                    "updated_at": now
+                }, synchronize_session=False)
+            
+            rows = list(new_alarms.values())
+            for chunk in chunked(rows, settings.alarm_sync_chunk_size):
+                db.execute(insert(Alarm.__table__), chunk)
+            StatsService.add(db, Counter(alarm_counter(row["status"], row["alarm_type"]) for row in rows))
+            created_count = len(rows)
+            synced_count = len(new_events)
+            
+            if len(pending) > settings.alarm_sync_max_pending_events:
+                # Keep the newest; the oldest are the least likely to find their host
+                newest = sorted(pending.items(), key=lambda item: int(item[0]))
+                newest = newest[len(newest) - settings.alarm_sync_max_pending_events:]
+                dropped_count += len(pending) - len(newest)
+                pending = dict(newest)
+            if dropped_count:
+                logger.warning(f"Alarm sync gave up on {dropped_count} events of hosts never synced as equipment")
+            
+            if max_event_id > last_event_id or pending != stored_pending:
+                if watermark is None:
+                    watermark = SyncState(name=ALARM_SYNC_STATE)
+                    db.add(watermark)
+                if max_event_id > last_event_id:
+                    watermark.last_event_id = str(max_event_id)
+                    watermark.last_clock = max_clock
+                watermark.pending_events = pending or None
+            db.commit()
             
-            logger.info(f"Alarm sync completed: {synced_count} synced, {created_count} created, {updated_count} updated")
+            # New events usually mean trigger states changed; host status includes them
+            if created_count or updated_count:
+                cached_zabbix_service.invalidate("get_host_status")
+                response_cache.invalidate("alarms")
+            
+            logger.info(f"Alarm sync completed: {synced_count} synced, {created_count} created, "
+                        f"{updated_count} updated, {skipped_count} skipped, "
+                        f"{len(pending)} pending until their host is synced")
             
             return {
                 "synced": synced_count,
                 "created": created_count,
-                "updated": updated_count
+                "updated": updated_count,
+                "skipped": skipped_count,
+                "pending": len(pending),
+                "dropped": dropped_count
             }
         
         except Exception as e:
+            db.rollback()
             logger.error(f"Failed to sync alarms with Zabbix: {e}")
             return {"error": str(e)}
     
     @staticmethod
-    def get_alarm_stats(db: Session) -> Dict[str, int]:
-        """Get alarm statistics"""
-        total_active = db.query(Alarm).filter(Alarm.status == "active").count()
-        total_acknowledged = db.query(Alarm).filter(Alarm.status == "acknowledged").count()
-        total_resolved = db.query(Alarm).filter(Alarm.status == "resolved").count()
-        
-        critical_active = db.query(Alarm).filter(
-            and_(Alarm.status == "active", Alarm.alarm_type == "critical")
-        ).count()
+    def reconcile_alarms_with_zabbix(db: Session) -> Dict[str, int]:
+        """Reconcile open alarms with the problems currently open in Zabbix
         
-        warning_active = db.query(Alarm).filter(
-            and_(Alarm.status == "active", Alarm.alarm_type == "warning")
-        ).count()
-        
-        # Resolved today
-        today = datetime.now().date()
-        resolved_today = db.query(Alarm).filter(
-            and_(
-                Alarm.status == "resolved",
-                func.date(Alarm.resolved_at) == today
-            )
-        ).count()
+        Only problem.get is read, so the cost follows the number of open
+        problems instead of event history. Open problems without an alarm
+        become alarms, open alarms whose problem is gone are resolved and
+        problems acknowledged in Zabbix acknowledge their alarm, each with
+        bulk statements in one transaction.
+        """
+        try:
+            problems = {problem.eventid: problem for problem in zabbix_service.iter_problems()}
+            report_progress(problems=len(problems))
+            
+            open_alarms = db.query(Alarm.id, Alarm.zabbix_event_id, Alarm.status).filter(
+                Alarm.status.in_(("active", "acknowledged")),
+                Alarm.zabbix_event_id.isnot(None)
+            ).all()
+            open_event_ids = {alarm.zabbix_event_id for alarm in open_alarms}
+            
+            resolved_ids = [alarm.id for alarm in open_alarms if alarm.zabbix_event_id not in problems]
+            acknowledged_ids = [
+                alarm.id for alarm in open_alarms
+                if alarm.status == "active" and alarm.zabbix_event_id in problems
+                and problems[alarm.zabbix_event_id].acknowledged == "1"
+            ]
+            
+            # Problems closed locally keep their alarm; only unseen events are created
+            unseen = [problem for event_id, problem in problems.items() if event_id not in open_event_ids]
+            existing_event_ids = AlarmService._existing_event_ids(db, [problem.eventid for problem in unseen])
+            unseen = [problem for problem in unseen if problem.eventid not in existing_event_ids]
+            
+            trigger_hosts: Dict[str, str] = {}
+            for chunk in chunked(sorted({problem.objectid for problem in unseen}), settings.alarm_sync_chunk_size):
+                trigger_hosts.update(zabbix_service.get_trigger_hosts(chunk))
+            equipment_ids = dict(db.query(Equipment.zabbix_host_id, Equipment.id)) if unseen else {}
+            
+            now = datetime.utcnow()
+            rows = []
+            skipped_count = 0
+            for problem in unseen:
+                host_id = trigger_hosts.get(problem.objectid)
+                equipment_id = equipment_ids.get(host_id)
+                if equipment_id is None:
+                    skipped_count += 1
+                    continue
+                rows.append({
+                    "zabbix_event_id": problem.eventid,
+                    "equipment_id": equipment_id,
+                    "alarm_type": ALARM_TYPE_BY_SEVERITY.get(problem.severity, "info"),
+                    "severity": SEVERITY_BY_ZABBIX_SEVERITY.get(problem.severity, "low"),
+                    "title": problem.name or "Zabbix Event",
+                    "description": f"Event from Zabbix: {problem.name}",
+                    "status": "acknowledged" if problem.acknowledged == "1" else "active",
+                    "acknowledged_at": now if problem.acknowledged == "1" else None,
+                    "zabbix_trigger_id": problem.objectid,
+                    "zabbix_host_id": host_id
+                })
+            
+            for chunk in chunked(rows, settings.alarm_sync_chunk_size):
+                db.execute(insert(Alarm.__table__), chunk)
+            StatsService.add(db, Counter(alarm_counter(row["status"], row["alarm_type"]) for row in rows))
+            for chunk in chunked(resolved_ids, settings.alarm_sync_chunk_size):
+                StatsService.alarm_transition(db, "resolved", Alarm.id.in_(chunk))
+                db.query(Alarm).filter(Alarm.id.in_(chunk)).update({
+                    "status": "resolved",
+                    "resolved_at": now,
+                    "updated_at": now
+                }, synchronize_session=False)
+            for chunk in chunked(acknowledged_ids, settings.alarm_sync_chunk_size):
+                StatsService.alarm_transition(db, "acknowledged", Alarm.id.in_(chunk))
+                db.query(Alarm).filter(Alarm.id.in_(chunk)).update({
+                    "status": "acknowledged",
+                    "acknowledged_at": now,
+                    "updated_at": now
+                }, synchronize_session=False)
+            db.commit()
+            
+            if rows or resolved_ids:
+                cached_zabbix_service.invalidate("get_host_status")
+            if rows or resolved_ids or acknowledged_ids:
+                response_cache.invalidate("alarms")
+            
+            logger.info(f"Alarm reconciliation completed: {len(problems)} open problems, {len(rows)} created, "
+                        f"{len(resolved_ids)} resolved, {len(acknowledged_ids)} acknowledged, {skipped_count} skipped")
+            
+            return {
+                "problems": len(problems),
+                "created": len(rows),
+                "resolved": len(resolved_ids),
+                "acknowledged": len(acknowledged_ids),
+                "skipped": skipped_count
+            }
         
-        return {
-            "active": total_active,
-            "acknowledged": total_acknowledged,
-            "resolved": total_resolved,
-            "critical_active": critical_active,
-            "warning_active": warning_active,
-            "resolved_today": resolved_today
-        }
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to reconcile alarms with Zabbix: {e}")
+            return {"error": str(e)}
+    
+    @staticmethod
+    def get_alarm_stats(db: Session) -> Dict[str, int]:
+        """Get alarm statistics"""
+        return StatsService.get_alarm_stats(db)
     
     @staticmethod
     def get_alarms_by_equipment(db: Session, equipment_id: int, 
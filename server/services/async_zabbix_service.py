@@ -0,0 +1,425 @@
+import asyncio
+import itertools
+import logging
+from typing import List, Dict, Any, Optional
+from datetime import datetime, timedelta
+
+import httpx
+
+from ..config import settings
+from ..schemas import ZabbixHost, ZabbixTrigger, ZabbixEvent
+from ..utils.singleflight import AsyncSingleFlight, request_key
+from .zabbix_auth import zabbix_tokens, is_session_error
+from ..utils.resilience import DeadlineExceeded
+from .zabbix_service import (
+    ZabbixService, UNAUTHENTICATED_METHODS, zabbix_breaker, zabbix_retry_policy, is_idempotent,
+    method_timeout, start_deadline, build_metric_requests, build_metric_series, event_hostid
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncZabbixService:
+    """Coroutine counterpart of ZabbixService built on a pooled httpx.AsyncClient.
+
+    Calls are limited by a semaphore rather than serialized, so independent
+    lookups can be issued together with ``asyncio.gather``.
+    """
+
+    def __init__(self):
+        self.url = settings.zabbix_url
+        self.username = settings.zabbix_user
+        self.password = settings.zabbix_password
+        self.tokens = zabbix_tokens
+        self.breaker = zabbix_breaker
+        self.retry_policy = zabbix_retry_policy
+        self.retries = 0
+        self.deadlines_exceeded = 0
+        self._client: Optional[httpx.AsyncClient] = None
+        self._request_ids = itertools.count(1)
+        self._auth_lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(settings.zabbix_max_concurrency)
+        self._inflight = AsyncSingleFlight()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Create the shared HTTP client on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=settings.zabbix_http2,
+                timeout=httpx.Timeout(settings.zabbix_timeout),
+                limits=httpx.Limits(
+                    max_connections=settings.zabbix_pool_size,
+                    max_keepalive_connections=settings.zabbix_keepalive_connections
+                ),
+                headers={
+                    'Content-Type': 'application/json-rpc',
+                    'Accept-Encoding': 'gzip',
+                    'User-Agent': 'ZabbixMonitor/1.0'
+                }
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _make_request(self, method: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Make a request to Zabbix API, sharing identical in-flight read calls"""
+        if not method.endswith(".get"):
+            return await self._send_request(method, params)
+        return await self._inflight.do(request_key(method, params), lambda: self._send_request(method, params))
+
+    @property
+    def auth_token(self) -> Optional[str]:
+        """Token shared with every other client in this process (or deployment)"""
+        return self.tokens.current()
+
+    async def _send_request(self, method: str, params: Dict[str, Any] = None,
+                            retry_auth: bool = True) -> Dict[str, Any]:
+        """Send a single JSON-RPC request to Zabbix API"""
+        if params is None:
+            params = {}
+
+        payload = {
+            "jsonrpc": "2.0",
+            "method": method,
+            "params": params,
+            "id": next(self._request_ids)
+        }
+
+        auth_token = None if method in UNAUTHENTICATED_METHODS else self.auth_token
+        if auth_token:
+            payload["auth"] = auth_token
+
+        try:
+            result = await self._post(method, payload)
+
+            if "error" in result:
+                if auth_token and retry_auth and is_session_error(result["error"]):
+                    # Session expired or was logged out elsewhere: log in again and retry once
+                    logger.info(f"Zabbix session expired during {method}, re-authenticating")
+                    self.tokens.invalidate(auth_token)
+                    if await self.authenticate():
+                        return await self._send_request(method, params, retry_auth=False)
+                logger.error(f"Zabbix API error: {result['error']}")
+                raise Exception(f"Zabbix API error: {result['error']}")
+
+            return result.get("result", {})
+
+        except httpx.HTTPError as e:
+            logger.error(f"Request to Zabbix API failed: {e}")
+            raise Exception(f"Failed to connect to Zabbix API: {e}")
+
+    async def _post(self, method: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """POST a JSON-RPC payload through the circuit breaker, retrying idempotent calls"""
+        deadline = start_deadline()
+        attempts = self.retry_policy.attempts if is_idempotent(method) else 1
+
+        for attempt in range(1, attempts + 1):
+            if deadline.expired:
+                self.deadlines_exceeded += 1
+                raise DeadlineExceeded(f"Deadline exceeded before Zabbix {method} call")
+
+            self.breaker.before_call()
+            try:
+                async with self._semaphore:
+                    response = await self._get_client().post(
+                        self.url, json=payload,
+                        timeout=min(method_timeout(method), deadline.remaining())
+                    )
+                response.raise_for_status()
+                result = response.json()
+            except (httpx.HTTPError, ValueError) as e:
+                self.breaker.record_failure(e)
+                delay = self.retry_policy.delay(attempt)
+                if attempt == attempts or delay >= deadline.remaining():
+                    raise
+                self.retries += 1
+                logger.warning(f"Zabbix {method} attempt {attempt} failed, retrying in {delay:.2f}s: {e}")
+                await asyncio.sleep(delay)
+                continue
+            except Exception as e:
+                self.breaker.record_failure(e)
+                raise
+            except BaseException:
+                # Cancelled: no verdict on Zabbix, but a half-open trial must not stay taken
+                self.breaker.abandon_call()
+                raise
+
+            self.breaker.record_success()
+            return result
+
+    async def authenticate(self) -> bool:
+        """Authenticate with Zabbix API, reusing the shared session when there is one"""
+        try:
+            if self.auth_token:
+                return True
+
+            async with self._auth_lock:
+                if self.auth_token:
+                    return True
+
+                params = {
+                    "user": self.username,
+                    "password": self.password
+                }
+
+                result = await self._make_request("user.login", params)
+                self.tokens.store_session(result)
+                logger.info("Successfully authenticated with Zabbix API")
+                return True
+
+        except Exception as e:
+            logger.error(f"Authentication failed: {e}")
+            return False
+
+    async def _ensure_authenticated(self) -> None:
+        """Make sure a token is available before an authenticated call"""
+        if not await self.authenticate():
+            raise Exception("Authentication failed")
+
+    async def check_authentication(self) -> bool:
+        """Check that the current token is still valid without creating a session"""
+        auth_token = self.auth_token
+        if not auth_token:
+            return False
+
+        params = {"token": auth_token} if self.tokens.uses_api_token else {"sessionid": auth_token}
+        try:
+            await self._make_request("user.checkAuthentication", params)
+            return True
+        except Exception as e:
+            logger.warning(f"Zabbix session check failed: {e}")
+            if is_session_error(e):
+                self.tokens.invalidate(auth_token)
+            return False
+
+    async def logout(self) -> None:
+        """End the Zabbix session created by user.login
+
+        API tokens, and sessions shared with other workers through Redis, are
+        left alone; a shared session expires on its own once idle.
+        """
+        auth_token = self.auth_token
+        if not self.tokens.owns_session() or not auth_token:
+            return
+        try:
+            await self._send_request("user.logout", [], retry_auth=False)
+            logger.info("Logged out from Zabbix API")
+        except Exception as e:
+            logger.warning(f"Zabbix logout failed: {e}")
+        finally:
+            self.tokens.invalidate(auth_token, expired=False)
+
+    async def get_hosts(self, filter_params: Dict[str, Any] = None) -> List[ZabbixHost]:
+        """Get all hosts from Zabbix"""
+        try:
+            await self._ensure_authenticated()
+
+            params = {
+                "output": ["hostid", "host", "name", "status", "available"],
+                "selectInterfaces": ["ip"],
+                "selectGroups": ["name"],
+                "selectTags": ["tag", "value"]
+            }
+
+            if filter_params:
+                params.update(filter_params)
+
+            result = await self._make_request("host.get", params)
+
+            return [
+                ZabbixHost(
+                    hostid=host_data["hostid"],
+                    host=host_data["host"],
+                    name=host_data["name"],
+                    status=host_data["status"],
+                    available=host_data["available"]
+                )
+                for host_data in result
+            ]
+
+        except Exception as e:
+            logger.error(f"Failed to get hosts: {e}")
+            return []
+
+    async def get_triggers(self, hostids: List[str] = None, only_active: bool = True) -> List[ZabbixTrigger]:
+        """Get triggers from Zabbix"""
+        try:
+            await self._ensure_authenticated()
+
+            params = {
+                "output": ["triggerid", "description", "expression", "priority", "value", "lastchange"],
+                "expandDescription": True,
+                "selectHosts": ["hostid", "name"],
+                "selectItems": ["itemid", "name"]
+            }
+
+            if hostids:
+                params["hostids"] = hostids
+
+            if only_active:
+                params["only_true"] = True
+                params["active"] = True
+
+            result = await self._make_request("trigger.get", params)
+
+            return [
+                ZabbixTrigger(
+                    triggerid=trigger_data["triggerid"],
+                    description=trigger_data["description"],
+                    expression=trigger_data["expression"],
+                    priority=trigger_data["priority"],
+                    value=trigger_data["value"],
+                    lastchange=trigger_data["lastchange"]
+                )
+                for trigger_data in result
+            ]
+
+        except Exception as e:
+            logger.error(f"Failed to get triggers: {e}")
+            return []
+
+    async def get_events(self, time_from: datetime = None, time_till: datetime = None,
+                         objectids: List[str] = None) -> List[ZabbixEvent]:
+        """Get events from Zabbix"""
+        try:
+            await self._ensure_authenticated()
+
+            params = ZabbixService._event_params(time_from, time_till, objectids)
+            result = await self._make_request("event.get", params)
+
+            return [
+                ZabbixEvent(
+                    eventid=event_data["eventid"],
+                    source=event_data["source"],
+                    object=event_data["object"],
+                    objectid=event_data["objectid"],
+                    clock=event_data["clock"],
+                    value=event_data["value"],
+                    acknowledged=event_data["acknowledged"],
+                    name=event_data["name"],
+                    severity=event_data.get("severity", "0"),
+                    hostid=event_hostid(event_data),
+                    r_eventid=event_data.get("r_eventid")
+                )
+                for event_data in result
+            ]
+
+        except Exception as e:
+            logger.error(f"Failed to get events: {e}")
+            return []
+
+    async def get_host_metrics(self, hostid: str, item_keys: List[str] = None,
+                               time_from: datetime = None, time_till: datetime = None) -> List[Dict[str, Any]]:
+        """Get per-item time series for a specific host"""
+        try:
+            await self._ensure_authenticated()
+
+            if time_from is None:
+                time_from = datetime.now() - timedelta(hours=1)
+
+            if time_till is None:
+                time_till = datetime.now()
+
+            # First get items
+            item_params = {
+                "output": ["itemid", "name", "key_", "value_type", "units"],
+                "hostids": [hostid],
+                "sortfield": "name"
+            }
+
+            if item_keys:
+                item_params["search"] = {"key_": item_keys}
+                item_params["searchByAny"] = True
+
+            items = await self._make_request("item.get", item_params)
+
+            if not items:
+                return []
+
+            # Fetch history/trends for each value_type and itemid chunk concurrently
+            requests_plan = build_metric_requests(items, time_from, time_till)
+            results = await asyncio.gather(*[
+                self._make_request(planned["method"], planned["params"])
+                for planned in requests_plan
+            ])
+
+            return build_metric_series(items, requests_plan, results)
+
+        except Exception as e:
+            logger.error(f"Failed to get host metrics: {e}")
+            return []
+
+    async def acknowledge_event(self, eventid: str, message: str = "") -> bool:
+        """Acknowledge an event in Zabbix"""
+        try:
+            await self._ensure_authenticated()
+
+            params = {
+                "eventids": [eventid],
+                "message": message,
+                "action": 6  # Acknowledge
+            }
+
+            await self._make_request("event.acknowledge", params)
+            logger.info(f"Successfully acknowledged event {eventid}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to acknowledge event {eventid}: {e}")
+            return False
+
+    async def get_host_status(self, hostid: str) -> Dict[str, Any]:
+        """Get detailed status of a host"""
+        try:
+            await self._ensure_authenticated()
+
+            params = {
+                "output": ["hostid", "host", "name", "status", "available"],
+                "hostids": [hostid],
+                "selectInterfaces": ["ip", "port", "type"],
+                "selectItems": ["itemid", "name", "key_", "status", "lastvalue", "lastclock"],
+                "selectTriggers": ["triggerid", "description", "priority", "value"]
+            }
+
+            result = await self._make_request("host.get", params)
+
+            if result:
+                return result[0]
+            return {}
+
+        except Exception as e:
+            logger.error(f"Failed to get host status: {e}")
+            return {}
+
+    def get_request_stats(self) -> Dict[str, int]:
+        """Get counters of issued and coalesced read calls"""
+        return self._inflight.stats()
+
+    def get_resilience_stats(self) -> Dict[str, Any]:
+        """Get circuit breaker state and retry counters"""
+        return {
+            "breaker": self.breaker.stats(),
+            "retries": self.retries,
+            "deadlines_exceeded": self.deadlines_exceeded
+        }
+
+    async def test_connection(self) -> bool:
+        """Test connection to Zabbix API"""
+        try:
+            # Only log in when there is no session yet or Zabbix rejected the current one
+            if not self.auth_token:
+                return await self.authenticate()
+            if await self.check_authentication():
+                return True
+            return not self.auth_token and await self.authenticate()
+        except Exception as e:
+            logger.error(f"Connection test failed: {e}")
+            return False
+
+
+# Global instance
+async_zabbix_service = AsyncZabbixService()
@@ -0,0 +1,47 @@
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from typing import List, Optional, Dict, Any
+import logging
+
+from ..config import settings
+from ..models import ChangeLog
+from ..utils.upsert import chunked
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeLogService:
+    
+    @staticmethod
+    def append(db: Session, entity_type: str, entries: List[Dict[str, Any]]) -> int:
+        """Append change entries ({entity_key, change_type, changes}) without committing"""
+        rows = [{**entry, "entity_type": entity_type} for entry in entries]
+        for chunk in chunked(rows, settings.equipment_sync_chunk_size):
+            db.execute(insert(ChangeLog.__table__), chunk)
+        return len(rows)
+    
+    @staticmethod
+    def tail(db: Session, after: int = 0, limit: int = 1000,
+             entity_type: Optional[str] = None) -> Dict[str, Any]:
+        """Get changes with a sequence number greater than after, oldest first"""
+        query = db.query(ChangeLog).filter(ChangeLog.id > after)
+        
+        if entity_type:
+            query = query.filter(ChangeLog.entity_type == entity_type)
+        
+        changes = query.order_by(ChangeLog.id).limit(limit).all()
+        
+        return {
+            "changes": [
+                {
+                    "seq": change.id,
+                    "entity_type": change.entity_type,
+                    "entity_key": change.entity_key,
+                    "change_type": change.change_type,
+                    "changes": change.changes,
+                    "created_at": change.created_at
+                }
+                for change in changes
+            ],
+            "next": changes[-1].id if changes else after
+        }
@@ -1,31 +1,96 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
-from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
+from sqlalchemy import and_, func, update
+from typing import List, Optional, Dict, Any, Tuple
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+import hashlib
 import logging
 
+from ..config import settings
 from ..models import Equipment, Alarm, Documentation
-from ..schemas import EquipmentCreate, EquipmentUpdate, EquipmentWithAlarms
+from ..schemas import EquipmentCreate, EquipmentUpdate, EquipmentWithAlarms, ZabbixHost
+from ..utils.pagination import count_rows, keyset_page
+from ..utils.progress import report_progress
+from ..utils.upsert import chunked, upsert_insert
 from .zabbix_service import zabbix_service
+from .zabbix_cache import cached_zabbix_service
+from .rollup_service import RollupService
+from .metrics_service import live_metrics
+from .change_log_service import ChangeLogService
+from .stats_service import StatsService, equipment_counter
+from .response_cache import response_cache
+from .search_service import equipment_search
 
 logger = logging.getLogger(__name__)
 
+# Equipment columns taken from Zabbix host attributes during sync
+SYNCED_FIELDS = ("name", "hostname", "status")
+# Columns sync rewrites on known hosts; the rest of the row is user-edited
+SYNCED_COLUMNS = (*SYNCED_FIELDS, "zabbix_fingerprint", "last_seen", "updated_at")
+
+
+def host_fingerprint(zabbix_host: ZabbixHost) -> str:
+    """Hash the Zabbix attributes that sync writes to an equipment row"""
+    content = "\x1f".join((zabbix_host.name or "", zabbix_host.host or "", zabbix_host.status or ""))
+    return hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+
+
+def status_deltas(changes: List[Dict[str, Any]]) -> Counter:
+    """Equipment status counter deltas for change log entries"""
+    deltas = Counter()
+    for change in changes:
+        if "status" in change["changes"]:
+            old, new = change["changes"]["status"]
+            if old is not None:
+                deltas[equipment_counter(old)] -= 1
+            deltas[equipment_counter(new)] += 1
+    return deltas
+
+
+def naive_utc(value: datetime) -> datetime:
+    """Drop the timezone of an aware datetime after converting it to UTC"""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
 
 class EquipmentService:
     
     @staticmethod
-    def get_equipment(db: Session, skip: int = 0, limit: int = 100, 
-                     client_name: str = None, status: str = None) -> List[Equipment]:
-        """Get equipment with optional filtering"""
-        query = db.query(Equipment)
+    def _filters(client_name: str = None, status: str = None) -> List[Any]:
+        filters = []
         
         if client_name:
-            query = query.filter(Equipment.client_name.ilike(f"%{client_name}%"))
+            filters.append(Equipment.client_name.ilike(f"%{client_name}%"))
         
         if status:
-            query = query.filter(Equipment.status == status)
+            filters.append(Equipment.status == status)
         
-        return query.offset(skip).limit(limit).all()
+        return filters
+    
+    @staticmethod
+    def _equipment_query(db: Session, client_name: str = None, status: str = None):
+        return db.query(Equipment).filter(*EquipmentService._filters(client_name, status))
+    
+    @staticmethod
+    def get_equipment(db: Session, skip: int = 0, limit: int = 100, 
+                     client_name: str = None, status: str = None) -> List[Equipment]:
+        """Get equipment with optional filtering"""
+        query = EquipmentService._equipment_query(db, client_name, status)
+        return query.order_by(Equipment.created_at.desc(), Equipment.id.desc()).offset(skip).limit(limit).all()
+    
+    @staticmethod
+    def get_equipment_page(db: Session, limit: int = 100, cursor: str = None,
+                           client_name: str = None, status: str = None) -> Tuple[List[Equipment], Optional[str]]:
+        """Get a page of equipment, newest first, after cursor; returns (equipment, next cursor)"""
+        query = EquipmentService._equipment_query(db, client_name, status)
+        return keyset_page(query, Equipment, limit, cursor)
+    
+    @staticmethod
+    def count_equipment(db: Session, client_name: str = None, status: str = None,
+                        estimate: bool = False) -> Tuple[int, bool]:
+        """Count equipment matching the filters; returns (count, estimated)"""
+        return count_rows(EquipmentService._equipment_query(db, client_name, status), estimate)
     
     @staticmethod
     def get_equipment_by_id(db: Session, equipment_id: int) -> Optional[Equipment]:
@@ -76,63 +141,160 @@ class EquipmentService:
         logger.info(f"Deleted equipment: {db_equipment.name}")
         return True
     
+    @staticmethod
+    def _write_hosts(db: Session, rows: List[Dict[str, Any]], existing_ids: Dict[str, int]) -> None:
+        """Insert new and rewrite changed hosts"""
+        table = Equipment.__table__
+        dialect_insert = upsert_insert(db.get_bind().dialect.name)
+        if dialect_insert is None:
+            # Generic path: plain inserts, and updates by primary key for known hosts
+            new_rows = [row for row in rows if row["zabbix_host_id"] not in existing_ids]
+            changed_rows = [
+                {"id": existing_ids[row["zabbix_host_id"]], **{column: row[column] for column in SYNCED_COLUMNS}}
+                for row in rows if row["zabbix_host_id"] in existing_ids
+            ]
+            for chunk in chunked(new_rows, settings.equipment_sync_chunk_size):
+                db.execute(table.insert(), chunk)
+            for chunk in chunked(changed_rows, settings.equipment_sync_chunk_size):
+                db.execute(update(Equipment), chunk)
+            return
+        
+        # One compiled statement, executed per chunk as a batched executemany
+        statement = dialect_insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.zabbix_host_id],
+            set_={column: statement.excluded[column] for column in SYNCED_COLUMNS}
+        )
+        for chunk in chunked(rows, settings.equipment_sync_chunk_size):
+            db.execute(statement, chunk)
+    
     @staticmethod
     def sync_with_zabbix(db: Session) -> Dict[str, int]:
-        """Synchronize equipment with Zabbix hosts"""
+        """Synchronize equipment with Zabbix hosts in a single transaction
+        
+        Only hosts whose fingerprint changed are written; each write is
+        recorded in the change log. Unchanged hosts only get last_seen
+        refreshed once it is older than equipment_last_seen_interval.
+        """
         try:
-            # Get hosts from Zabbix
-            zabbix_hosts = zabbix_service.get_hosts()
-            
             synced_count = 0
             created_count = 0
             updated_count = 0
+            now = datetime.utcnow()
+            touch_before = now - timedelta(seconds=settings.equipment_last_seen_interval)
             
-            for zabbix_host in zabbix_hosts:
-                # Check if equipment exists
-                existing_equipment = EquipmentService.get_equipment_by_zabbix_id(db, zabbix_host.hostid)
+            # Current state of every Zabbix-backed row, loaded once
+            existing = {
+                row.zabbix_host_id: row
+                for row in db.query(
+                    Equipment.id, Equipment.zabbix_host_id, Equipment.name, Equipment.hostname,
+                    Equipment.status, Equipment.zabbix_fingerprint, Equipment.last_seen
+                ).filter(Equipment.zabbix_host_id.isnot(None))
+            }
+            existing_ids = {zabbix_host_id: row.id for zabbix_host_id, row in existing.items()}
+            seen = set()
+            touched_ids = []
+            written_host_ids = []
+            
+            # Stream hosts from Zabbix one page at a time
+            for zabbix_hosts in zabbix_service.iter_hosts(page_size=settings.zabbix_host_page_size):
+                rows = []
+                changes = []
                 
-                if existing_equipment:
-                    # Update existing equipment
-                    existing_equipment.status = "online" if zabbix_host.status == "0" else "offline"
-                    existing_equipment.last_seen = datetime.utcnow()
-                    existing_equipment.updated_at = datetime.utcnow()
-                    updated_count += 1
-                else:
-                    # Create new equipment
-                    equipment_data = EquipmentCreate(
-                        zabbix_host_id=zabbix_host.hostid,
-                        name=zabbix_host.name,
-                        hostname=zabbix_host.host,
-                        ip_address="",  # Will be updated from interfaces
-                        equipment_type="unknown",
-                        location="",
-                        client_name="",
-                        status="online" if zabbix_host.status == "0" else "offline"
-                    )
+                for zabbix_host in zabbix_hosts:
+                    seen.add(zabbix_host.hostid)
+                    fingerprint = host_fingerprint(zabbix_host)
+                    current = existing.get(zabbix_host.hostid)
+                    
+                    if current is not None and current.zabbix_fingerprint == fingerprint:
+                        if current.last_seen is None or naive_utc(current.last_seen) < touch_before:
+                            touched_ids.append(current.id)
+                        continue
+                    
+                    row = {
+                        "zabbix_host_id": zabbix_host.hostid,
+                        "name": zabbix_host.name,
+                        "hostname": zabbix_host.host,
+                        "ip_address": "",  # Will be updated from interfaces
+                        "equipment_type": "unknown",
+                        "location": "",
+                        "client_name": "",
+                        "status": "online" if zabbix_host.status == "0" else "offline",
+                        "zabbix_fingerprint": fingerprint,
+                        "last_seen": now,
+                        "updated_at": now
+                    }
+                    rows.append(row)
                     
-                    EquipmentService.create_equipment(db, equipment_data)
-                    created_count += 1
+                    if current is None:
+                        created_count += 1
+                        changes.append({
+                            "entity_key": zabbix_host.hostid,
+                            "change_type": "created",
+                            "changes": {field: [None, row[field]] for field in SYNCED_FIELDS}
+                        })
+                        continue
+                    
+                    diff = {
+                        field: [getattr(current, field), row[field]]
+                        for field in SYNCED_FIELDS if getattr(current, field) != row[field]
+                    }
+                    # A missing fingerprint alone (first sync after upgrade) is not a change
+                    if diff:
+                        updated_count += 1
+                        changes.append({"entity_key": zabbix_host.hostid, "change_type": "updated", "changes": diff})
                 
-                synced_count += 1
+                EquipmentService._write_hosts(db, rows, existing_ids)
+                written_host_ids += [row["zabbix_host_id"] for row in rows]
+                ChangeLogService.append(db, "equipment", changes)
+                StatsService.add(db, status_deltas(changes))
+                synced_count += len(zabbix_hosts)
+                report_progress(synced=synced_count, created=created_count, updated=updated_count)
+            
+            for chunk in chunked(touched_ids, settings.equipment_sync_chunk_size):
+                db.query(Equipment).filter(Equipment.id.in_(chunk)).update(
+                    {"last_seen": now}, synchronize_session=False
+                )
             
             # Mark equipment as offline if not seen in Zabbix
-            zabbix_host_ids = [host.hostid for host in zabbix_hosts]
-            db.query(Equipment).filter(
-                ~Equipment.zabbix_host_id.in_(zabbix_host_ids)
-            ).update({
-                "status": "offline",
-                "updated_at": datetime.utcnow()
-            })
+            vanished = [
+                row for zabbix_host_id, row in existing.items()
+                if zabbix_host_id not in seen and row.status != "offline"
+            ]
+            for chunk in chunked(vanished, settings.equipment_sync_chunk_size):
+                db.query(Equipment).filter(Equipment.id.in_([row.id for row in chunk])).update({
+                    "status": "offline",
+                    "zabbix_fingerprint": None,
+                    "updated_at": now
+                }, synchronize_session=False)
+            vanished_changes = [
+                {"entity_key": row.zabbix_host_id, "change_type": "vanished", "changes": {"status": [row.status, "offline"]}}
+                for row in vanished
+            ]
+            ChangeLogService.append(db, "equipment", vanished_changes)
+            StatsService.add(db, status_deltas(vanished_changes))
+            db.commit()
             
-            logger.info(f"Sync completed: {synced_count} synced, {created_count} created, {updated_count} updated")
+            # Host inventory changed; drop cached lookups
+            if created_count or updated_count or vanished:
+                cached_zabbix_service.invalidate("get_host_status")
+                response_cache.invalidate("equipment")
+            equipment_search.refresh(db, written_host_ids)
+            
+            logger.info(f"Sync completed: {synced_count} synced, {created_count} created, "
+                        f"{updated_count} updated, {len(vanished)} marked offline, "
+                        f"{synced_count - created_count - updated_count} unchanged")
             
             return {
                 "synced": synced_count,
                 "created": created_count,
-                "updated": updated_count
+                "updated": updated_count,
+                "unchanged": synced_count - created_count - updated_count,
+                "marked_offline": len(vanished)
             }
         
         except Exception as e:
+            db.rollback()
             logger.error(f"Failed to sync with Zabbix: {e}")
             return {"error": str(e)}
     
@@ -168,24 +330,12 @@ class EquipmentService:
     @staticmethod
     def get_equipment_stats(db: Session) -> Dict[str, int]:
         """Get equipment statistics"""
-        total = db.query(Equipment).count()
-        online = db.query(Equipment).filter(Equipment.status == "online").count()
-        offline = db.query(Equipment).filter(Equipment.status == "offline").count()
-        maintenance = db.query(Equipment).filter(Equipment.status == "maintenance").count()
-        
-        return {
-            "total": total,
-            "online": online,
-            "offline": offline,
-            "maintenance": maintenance
-        }
+        return StatsService.get_equipment_stats(db)
     
     @staticmethod
-    def get_equipment_by_client(db: Session, client_name: str) -> List[Equipment]:
-        """Get all equipment for a specific client"""
-        return db.query(Equipment).filter(
-            Equipment.client_name.ilike(f"%{client_name}%")
-        ).all()
+    def get_equipment_by_client(db: Session, client_name: str, limit: int = None) -> List[Equipment]:
+        """Get equipment whose client name contains client_name, best match first"""
+        return equipment_search.search(db, client_name, limit, fields=("client_name",), fuzzy=False)
     
     @staticmethod
     def get_equipment_health(db: Session, equipment_id: int) -> Dict[str, Any]:
@@ -218,17 +368,60 @@ class EquipmentService:
             "critical_alarms": critical_alarms,
             "warning_alarms": warning_alarms,
             "uptime_percentage": uptime_percentage,
-            "health_score": "good" if uptime_percentage > 90 else "warning" if uptime_percentage > 70 else "critical"
+            "health_score": "good" if uptime_percentage > 90 else "warning" if uptime_percentage > 70 else "critical",
+            "metrics": live_metrics.summary(equipment_id, settings.metrics_live_window)
         }
     
     @staticmethod
-    def search_equipment(db: Session, search_term: str) -> List[Equipment]:
-        """Search equipment by name, hostname, IP, or client"""
-        return db.query(Equipment).filter(
-            or_(
-                Equipment.name.ilike(f"%{search_term}%"),
-                Equipment.hostname.ilike(f"%{search_term}%"),
-                Equipment.ip_address.ilike(f"%{search_term}%"),
-                Equipment.client_name.ilike(f"%{search_term}%")
-            )
-        ).all() 
\ No newline at end of file
+    def get_equipment_zabbix_status(db: Session, equipment_id: int) -> Optional[Dict[str, Any]]:
+        """Get the Zabbix host status for an equipment"""
+        equipment = EquipmentService.get_equipment_by_id(db, equipment_id)
+        if not equipment:
+            return None
+        
+        return cached_zabbix_service.get_host_status(equipment.zabbix_host_id)
+    
+    @staticmethod
+    def get_equipment_metrics(db: Session, equipment_id: int, hours: int = 1,
+                              item_keys: List[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """Get Zabbix time series for an equipment's items"""
+        equipment = EquipmentService.get_equipment_by_id(db, equipment_id)
+        if not equipment:
+            return None
+        
+        return zabbix_service.get_host_metrics(
+            equipment.zabbix_host_id,
+            item_keys=item_keys,
+            time_from=datetime.now() - timedelta(hours=hours)
+        )
+    
+    @staticmethod
+    def get_equipment_metric_history(db: Session, equipment_id: int, hours: int = 24,
+                                     metric_names: List[str] = None,
+                                     max_points: int = None) -> Optional[Dict[str, Any]]:
+        """Get stored metric history from the rollup that fits the point budget"""
+        equipment = EquipmentService.get_equipment_by_id(db, equipment_id)
+        if not equipment:
+            return None
+        
+        time_till = datetime.now(timezone.utc)
+        return RollupService.get_series(
+            db, equipment_id,
+            time_from=time_till - timedelta(hours=hours),
+            time_till=time_till,
+            metric_names=metric_names,
+            max_points=max_points
+        )
+    
+    @staticmethod
+    def search_equipment(db: Session, search_term: str, limit: int = None,
+                         client_name: str = None, status: str = None) -> List[Equipment]:
+        """Search equipment by name, hostname, IP, or client, best match first, narrowed by the list filters"""
+        return equipment_search.search(
+            db, search_term, limit, criteria=EquipmentService._filters(client_name, status)
+        )
+    
+    @staticmethod
+    def autocomplete_equipment(db: Session, prefix: str, limit: int = 10) -> List[Dict[str, str]]:
+        """Suggest equipment names and hostnames starting with prefix"""
+        return equipment_search.autocomplete(db, prefix, limit) 
\ No newline at end of file
@@ -0,0 +1,155 @@
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..config import settings
+from ..utils.progress import progress_sink
+from .scheduler import JobBusy, scheduler
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """One background run of a named scheduler job"""
+
+    def __init__(self, name: str):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.status = "queued"
+        self.progress: Dict[str, Any] = {}
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.requests = 1  # submissions attached to this run
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.finished = None  # monotonic time, for expiry
+
+    def update_progress(self, counts: Dict[str, Any]) -> None:
+        self.progress = {**self.progress, **counts}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            "requests": self.requests,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class JobManager:
+    """Runs scheduler jobs on a worker pool and keeps their status for polling
+
+    Submitting a job that is already queued or running in this process
+    attaches to that run instead of starting another. Runs go through
+    ``Scheduler.run_job``, so they share the scheduler's lease: a run that
+    finds the job busy in another worker ends with status ``busy``.
+    Finished jobs stay queryable for ``job_retention`` seconds.
+    """
+
+    def __init__(self, runner: Callable[[str], Any] = None, workers: int = None):
+        self._runner = runner or scheduler.run_job
+        self._workers = workers or settings.job_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Job] = {}
+        self._active: Dict[str, Job] = {}
+        self.submitted = 0
+        self.attached = 0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="job")
+        return self._executor
+
+    def submit(self, name: str) -> Tuple[Job, bool]:
+        """Queue a run of name, or attach to the active one; returns (job, created)"""
+        with self._lock:
+            self._prune()
+            job = self._active.get(name)
+            if job is not None:
+                job.requests += 1
+                self.attached += 1
+                return job, False
+            job = Job(name)
+            self._jobs[job.id] = job
+            self._active[name] = job
+            self.submitted += 1
+        self.executor.submit(self._run, job)
+        logger.info(f"Queued job {name} ({job.id})")
+        return job, True
+
+    def _run(self, job: Job) -> None:
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        try:
+            with progress_sink(job.update_progress):
+                job.result = self._runner(job.name)
+            job.status = "succeeded"
+        except JobBusy as e:
+            job.status = "busy"
+            job.error = str(e)
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = datetime.utcnow()
+            job.finished = time.monotonic()
+            with self._lock:
+                if self._active.get(job.name) is job:
+                    del self._active[job.name]
+            logger.info(f"Job {job.name} ({job.id}) {job.status}")
+
+    def _prune(self) -> None:
+        expire_before = time.monotonic() - settings.job_retention
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished is not None and job.finished < expire_before]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get a job by ID"""
+        with self._lock:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def list(self, name: Optional[str] = None) -> List[Job]:
+        """Get known jobs, newest first"""
+        with self._lock:
+            self._prune()
+            jobs = [job for job in self._jobs.values() if name is None or job.name == name]
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+    def shutdown(self) -> None:
+        """Drop queued jobs; runs already in progress finish in their threads"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Get submission counters and jobs per status"""
+        with self._lock:
+            statuses: Dict[str, int] = {}
+            for job in self._jobs.values():
+                statuses[job.status] = statuses.get(job.status, 0) + 1
+            return {
+                "workers": self._workers,
+                "submitted": self.submitted,
+                "attached": self.attached,
+                "active": list(self._active),
+                "jobs": statuses
+            }
+
+
+# Global instance
+job_manager = JobManager()
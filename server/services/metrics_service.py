@@ -0,0 +1,277 @@
+import csv
+import io
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.engine import Engine
+
+from ..config import settings
+from ..database import SessionLocal, engine
+from ..models import Equipment, MonitoringMetrics
+from ..utils.resilience import Deadline
+from ..utils.ring_buffer import SeriesRingBuffer
+from .rollup_service import RollupService
+from .zabbix_service import ZabbixService, zabbix_service
+
+logger = logging.getLogger(__name__)
+
+METRIC_COLUMNS = [
+    "equipment_id", "metric_name", "metric_value", "unit",
+    "timestamp", "zabbix_item_id", "zabbix_host_id"
+]
+
+
+def bulk_insert_metrics(bind: Engine, rows: List[Dict[str, Any]]) -> int:
+    """Insert metric rows in one round trip per batch
+
+    PostgreSQL gets a COPY; other databases get SQLAlchemy's batched
+    multi-row INSERT ... VALUES. ORM objects are never created.
+    """
+    if not rows:
+        return 0
+
+    if bind.dialect.name == "postgresql":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([row[column] for column in METRIC_COLUMNS])
+        buffer.seek(0)
+
+        raw_connection = bind.raw_connection()
+        try:
+            with raw_connection.cursor() as cursor:
+                cursor.copy_expert(
+                    f"COPY {MonitoringMetrics.__tablename__} ({', '.join(METRIC_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                    buffer
+                )
+            raw_connection.commit()
+        finally:
+            raw_connection.close()
+    else:
+        with bind.begin() as connection:
+            connection.execute(insert(MonitoringMetrics.__table__), rows)
+
+    return len(rows)
+
+
+# Recent samples per (equipment_id, metric_name), fed by MetricsCollector
+live_metrics = SeriesRingBuffer(slots=settings.metrics_live_slots)
+
+
+class MetricsCollector:
+    """Pulls latest item values from Zabbix and writes them to monitoring_metrics in batches
+
+    A collector thread polls Zabbix every ``metrics_collect_interval`` seconds
+    and puts samples on a bounded queue; a writer thread drains it in batches
+    of up to ``metrics_batch_size`` rows. When the writer falls behind, the
+    collector blocks on the full queue (backpressure) for at most
+    ``metrics_enqueue_timeout`` seconds per collection, then drops the rest
+    of that collection's samples. Queued samples are also kept
+    in the ``live`` ring buffer for reads that should not touch the database.
+    """
+
+    def __init__(self, service: ZabbixService = None, bind: Engine = None, live: SeriesRingBuffer = None):
+        self.service = service or zabbix_service
+        self.bind = bind or engine
+        self.live = live or live_metrics
+        self.queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=settings.metrics_queue_size)
+        self.batch_size = settings.metrics_batch_size
+        self.flush_interval = settings.metrics_flush_interval
+        self._last_clock: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self.started_at: Optional[float] = None
+        self.collections = 0
+        self.collection_errors = 0
+        self.rows_enqueued = 0
+        self.rows_dropped = 0
+        self.rows_unmapped = 0
+        self.rows_written = 0
+        self.batches_written = 0
+        self.write_errors = 0
+        self.rollup_errors = 0
+        self.write_seconds = 0.0
+        self.last_batch_rows_per_sec = 0.0
+
+    def _equipment_ids(self) -> Dict[str, int]:
+        """Map Zabbix host IDs to equipment IDs with a single query"""
+        db = SessionLocal()
+        try:
+            return dict(db.query(Equipment.zabbix_host_id, Equipment.id).all())
+        finally:
+            db.close()
+
+    def collect_once(self) -> int:
+        """Fetch latest item values and enqueue samples not seen before"""
+        equipment_ids = self._equipment_ids()
+        enqueued = 0
+        # One backpressure budget for the whole pass, not one per sample
+        deadline = Deadline(settings.metrics_enqueue_timeout)
+        live_owners, live_metrics_names, live_clocks, live_values = [], [], [], []
+
+        for item in self.service.iter_item_values():
+            clock = int(item.get("lastclock") or 0)
+            itemid = item["itemid"]
+            if not clock or self._last_clock.get(itemid) == clock:
+                continue
+
+            equipment_id = equipment_ids.get(item["hostid"])
+            if equipment_id is None:
+                with self._lock:
+                    self.rows_unmapped += 1
+                continue
+
+            row = {
+                "equipment_id": equipment_id,
+                "metric_name": item["key_"],
+                "metric_value": float(item["lastvalue"]),
+                "unit": item.get("units", ""),
+                "timestamp": datetime.fromtimestamp(clock, tz=timezone.utc),
+                "zabbix_item_id": itemid,
+                "zabbix_host_id": item["hostid"]
+            }
+            if self.enqueue(row, deadline.remaining()):
+                self._last_clock[itemid] = clock
+                enqueued += 1
+                live_owners.append(equipment_id)
+                live_metrics_names.append(row["metric_name"])
+                live_clocks.append(clock)
+                live_values.append(row["metric_value"])
+
+        self.live.append_many(live_owners, live_metrics_names, live_clocks, live_values)
+
+        with self._lock:
+            self.collections += 1
+        return enqueued
+
+    def enqueue(self, row: Dict[str, Any], timeout: float = None) -> bool:
+        """Queue one sample, blocking up to timeout seconds while the queue is full"""
+        if timeout is None:
+            timeout = settings.metrics_enqueue_timeout
+        try:
+            if timeout > 0:
+                self.queue.put(row, timeout=timeout)
+            else:
+                self.queue.put_nowait(row)
+        except queue.Full:
+            with self._lock:
+                self.rows_dropped += 1
+            return False
+        with self._lock:
+            self.rows_enqueued += 1
+        return True
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        """Collect up to batch_size rows, waiting at most flush_interval for the first"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                if batch and timeout <= 0:
+                    batch.append(self.queue.get_nowait())
+                else:
+                    batch.append(self.queue.get(timeout=max(timeout, 0.01)))
+            except queue.Empty:
+                break
+        return batch
+
+    def write_batch(self, rows: List[Dict[str, Any]]) -> None:
+        """Bulk insert one batch and update throughput counters"""
+        started = time.perf_counter()
+        try:
+            written = bulk_insert_metrics(self.bind, rows)
+        except Exception as e:
+            with self._lock:
+                self.write_errors += 1
+            logger.error(f"Failed to write {len(rows)} metric rows: {e}")
+            return
+
+        elapsed = time.perf_counter() - started
+
+        if settings.metrics_rollups_enabled:
+            try:
+                RollupService.apply(self.bind, rows)
+            except Exception as e:
+                with self._lock:
+                    self.rollup_errors += 1
+                logger.error(f"Failed to update metric rollups for {len(rows)} rows: {e}")
+
+        with self._lock:
+            self.rows_written += written
+            self.batches_written += 1
+            self.write_seconds += elapsed
+            self.last_batch_rows_per_sec = written / elapsed if elapsed > 0 else 0.0
+
+    def _collector_loop(self) -> None:
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                enqueued = self.collect_once()
+                logger.debug(f"Metrics collection enqueued {enqueued} samples")
+            except Exception as e:
+                with self._lock:
+                    self.collection_errors += 1
+                logger.error(f"Metrics collection failed: {e}")
+            self._stop.wait(max(0.0, settings.metrics_collect_interval - (time.monotonic() - started)))
+
+    def _writer_loop(self) -> None:
+        while not self._stop.is_set() or not self.queue.empty():
+            batch = self._drain()
+            if batch:
+                self.write_batch(batch)
+
+    def start(self, collect: bool = True) -> None:
+        """Start the writer thread and, unless collect is False, the Zabbix collector thread"""
+        if self._threads:
+            return
+        self._stop.clear()
+        self.started_at = time.monotonic()
+        targets = [("metrics-writer", self._writer_loop)]
+        if collect:
+            targets.append(("metrics-collector", self._collector_loop))
+        for name, target in targets:
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info("Metrics ingestion started")
+
+    def stop(self, timeout: float = 30) -> None:
+        """Stop collecting and flush queued rows"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        logger.info("Metrics ingestion stopped")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue depth, row counters and throughput"""
+        with self._lock:
+            uptime = time.monotonic() - self.started_at if self.started_at else 0.0
+            return {
+                "running": bool(self._threads),
+                "queue_depth": self.queue.qsize(),
+                "queue_capacity": self.queue.maxsize,
+                "collections": self.collections,
+                "collection_errors": self.collection_errors,
+                "rows_enqueued": self.rows_enqueued,
+                "rows_dropped": self.rows_dropped,
+                "rows_unmapped": self.rows_unmapped,
+                "rows_written": self.rows_written,
+                "batches_written": self.batches_written,
+                "write_errors": self.write_errors,
+                "rollup_errors": self.rollup_errors,
+                "write_rows_per_sec": self.rows_written / self.write_seconds if self.write_seconds else 0.0,
+                "last_batch_rows_per_sec": self.last_batch_rows_per_sec,
+                "ingest_rows_per_sec": self.rows_written / uptime if uptime else 0.0
+            }
+
+
+# Global instance
+metrics_collector = MetricsCollector()
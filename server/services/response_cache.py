@@ -0,0 +1,156 @@
+import logging
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, Set
+from urllib.parse import urlencode
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models import Alarm, Equipment
+from ..utils.cache import create_cache_backend
+from ..utils.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Tag versions outlive any entry keyed on them
+TAG_TTL = 86400
+
+# Tags invalidated by ORM writes of each model
+MODEL_TAGS = {
+    Alarm: "alarms",
+    Equipment: "equipment"
+}
+
+
+class ResponseCache:
+    """Cache of read-heavy endpoint responses, invalidated by tag
+
+    Entries are keyed by route path and query string plus the current
+    version of every tag the response depends on; invalidating a tag gives
+    it a new version, so every entry built from it misses from then on and
+    expires by TTL. With the Redis backend, versions and entries are shared
+    by all workers; the local fallback only sees invalidations made in its
+    own process and relies on the short TTL for the others. Concurrent
+    misses for the same key in a process are collapsed into one computation.
+    The backend is created on first use, so importing the app does not
+    connect to Redis.
+    """
+
+    def __init__(self, backend=None):
+        self._backend = backend
+        self.ttl = 0 if settings.response_cache_backend == "none" else settings.response_cache_ttl
+        self._loads = SingleFlight()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = create_cache_backend(
+                        settings.response_cache_backend, "responses",
+                        max_entries=settings.response_cache_max_entries
+                    )
+        return self._backend
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _tag_version(self, tag: str) -> str:
+        entry = self.backend.get(f"tag:{tag}")
+        if entry is not None:
+            return entry[0]
+        # Unknown tag (first use or evicted): start a version so entries can be keyed on it
+        version = uuid.uuid4().hex
+        self.backend.set(f"tag:{tag}", version, TAG_TTL)
+        return version
+
+    def get_or_compute(self, key: str, tags: Iterable[str], compute: Callable[[], Any]) -> Any:
+        """Serve a cached response for key, or compute and store it"""
+        if self.ttl <= 0:
+            return compute()
+
+        try:
+            versions = ",".join(f"{tag}={self._tag_version(tag)}" for tag in sorted(tags))
+            cache_key = f"entry:{key}|{versions}"
+            entry = self.backend.get(cache_key)
+        except Exception as e:
+            logger.warning(f"Failed to read response cache: {e}")
+            return compute()
+
+        if entry is not None and entry[1] > time.time():
+            self._count("hits")
+            return entry[0]
+
+        def load():
+            value = compute()
+            try:
+                self.backend.set(cache_key, value, self.ttl)
+            except Exception as e:
+                logger.warning(f"Failed to store response in cache: {e}")
+            return value
+
+        self._count("misses")
+        return self._loads.do(cache_key, load)
+
+    def cached(self, request: Request, tags: Iterable[str], compute: Callable[[], Any]) -> Any:
+        """get_or_compute keyed by the request's route path and sorted query params"""
+        query = urlencode(sorted(request.query_params.multi_items()))
+        return self.get_or_compute(f"{request.url.path}?{query}", tags, compute)
+
+    def invalidate(self, *tags: str) -> None:
+        """Make every cached response that depends on any of tags miss"""
+        if self.ttl <= 0:
+            return
+        for tag in tags:
+            try:
+                self.backend.set(f"tag:{tag}", uuid.uuid4().hex, TAG_TTL)
+            except Exception as e:
+                logger.warning(f"Failed to invalidate response cache tag {tag}: {e}")
+        self._count("invalidations")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and backend stats"""
+        with self._lock:
+            counters = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations
+            }
+        counters.update(self.backend.stats())
+        counters["ttl"] = self.ttl
+        counters["collapsed"] = self._loads.stats()["coalesced"]
+        return counters
+
+
+# Global instance
+response_cache = ResponseCache()
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_written_tags(session: Session, flush_context, instances) -> None:
+    tags: Set[str] = session.info.setdefault("response_cache_tags", set())
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        tag = MODEL_TAGS.get(type(instance))
+        if tag:
+            tags.add(tag)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_written_tags(session: Session) -> None:
+    tags = session.info.pop("response_cache_tags", None)
+    if tags:
+        response_cache.invalidate(*tags)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_written_tags(session: Session) -> None:
+    session.info.pop("response_cache_tags", None)
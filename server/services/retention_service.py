@@ -0,0 +1,272 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, exists, or_, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models import Alarm, ChangeLog, Documentation, MonitoringMetrics, MetricRollup1m, MetricRollup1h, MetricRollup1d
+from .response_cache import response_cache
+from .stats_service import StatsService
+
+logger = logging.getLogger(__name__)
+
+METRICS_TABLE = MonitoringMetrics.__tablename__
+PARTITION_PREFIX = f"{METRICS_TABLE}_p"
+
+
+def _utc_day(value: datetime) -> datetime:
+    value = value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class MetricPartitions:
+    """Daily range partitions of monitoring_metrics on PostgreSQL"""
+
+    @staticmethod
+    def enabled(bind: Engine) -> bool:
+        return settings.metrics_partitioning and bind.dialect.name == "postgresql"
+
+    @staticmethod
+    def is_partitioned(connection: Connection) -> bool:
+        return connection.execute(
+            text("SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :name"),
+            {"name": METRICS_TABLE}
+        ).first() is not None
+
+    @staticmethod
+    def list(connection: Connection) -> List[Tuple[str, datetime]]:
+        """Get (partition name, day) for every daily partition, oldest first"""
+        rows = connection.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent "
+                "WHERE p.relname = :name AND c.relname LIKE :prefix"
+            ),
+            {"name": METRICS_TABLE, "prefix": f"{PARTITION_PREFIX}%"}
+        ).scalars()
+        partitions = []
+        for name in rows:
+            try:
+                day = datetime.strptime(name[len(PARTITION_PREFIX):], "%Y%m%d").replace(tzinfo=timezone.utc)
+            except ValueError:
+                continue
+            partitions.append((name, day))
+        return sorted(partitions, key=lambda partition: partition[1])
+
+    @staticmethod
+    def ensure(bind: Engine, days_ahead: Optional[int] = None) -> int:
+        """Create daily partitions from today through days_ahead"""
+        days_ahead = settings.metrics_partition_premake_days if days_ahead is None else days_ahead
+        created = 0
+        with bind.begin() as connection:
+            if not MetricPartitions.is_partitioned(connection):
+                return 0
+            existing = {name for name, _ in MetricPartitions.list(connection)}
+            today = _utc_day(datetime.now(timezone.utc))
+            for offset in range(days_ahead + 1):
+                day = today + timedelta(days=offset)
+                name = f"{PARTITION_PREFIX}{day:%Y%m%d}"
+                if name in existing:
+                    continue
+                connection.execute(text(
+                    f"CREATE TABLE {name} PARTITION OF {METRICS_TABLE} "
+                    f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"
+                ))
+                created += 1
+        if created:
+            logger.info(f"Created {created} {METRICS_TABLE} partitions")
+        return created
+
+    @staticmethod
+    def drop_before(bind: Engine, cutoff: datetime) -> Dict[str, int]:
+        """Drop daily partitions that end at or before cutoff"""
+        dropped = 0
+        rows = 0
+        with bind.connect() as connection:
+            if not MetricPartitions.is_partitioned(connection):
+                return {"partitions_dropped": 0, "rows_dropped": 0}
+            expired = [name for name, day in MetricPartitions.list(connection) if day + timedelta(days=1) <= cutoff]
+
+        for name in expired:
+            # One short transaction per partition; DETACH first so readers of the
+            # parent are not blocked while the storage is released
+            with bind.begin() as connection:
+                rows += connection.execute(text(f"SELECT count(*) FROM {name}")).scalar()
+                connection.execute(text(f"ALTER TABLE {METRICS_TABLE} DETACH PARTITION {name}"))
+                connection.execute(text(f"DROP TABLE {name}"))
+            dropped += 1
+            logger.info(f"Dropped partition {name}")
+
+        return {"partitions_dropped": dropped, "rows_dropped": rows}
+
+
+def delete_in_batches(bind: Engine, table, condition, batch_size: Optional[int] = None,
+                      pause: Optional[float] = None) -> int:
+    """Delete matching rows by primary key in short transactions of at most batch_size rows"""
+    batch_size = batch_size or settings.retention_batch_size
+    pause = settings.retention_batch_pause if pause is None else pause
+    deleted = 0
+
+    while True:
+        batch = select(table.c.id).where(condition).limit(batch_size).scalar_subquery()
+        with bind.begin() as connection:
+            count = connection.execute(delete(table).where(table.c.id.in_(batch))).rowcount
+        deleted += count
+        if count < batch_size:
+            return deleted
+        if pause:
+            time.sleep(pause)
+
+
+def vacuum(bind: Engine, table) -> bool:
+    """Run VACUUM (ANALYZE) on a table after a purge, on PostgreSQL only"""
+    if bind.dialect.name != "postgresql":
+        return False
+    with bind.connect() as connection:
+        # VACUUM cannot run inside a transaction block
+        connection.execution_options(isolation_level="AUTOCOMMIT")
+        connection.execute(text(f"VACUUM (ANALYZE) {table.name}"))
+    return True
+
+
+class RetentionService:
+    """Enforces history retention on metrics, rollups, resolved alarms and the change log
+
+    On PostgreSQL, whole expired monitoring_metrics partitions are dropped. Rows
+    that are not in a daily partition (default partition, unpartitioned table,
+    SQLite) are deleted in batches keyed on the timestamp index, so no statement
+    holds locks for long.
+    
+    alarms is deliberately not partitioned: retention only removes resolved,
+    undocumented alarms, so an old day can never be dropped whole while it
+    still holds open or documented ones, and documentation references alarm
+    IDs, which a partitioned table can only key together with created_at. Its
+    batched deletes are followed by VACUUM (ANALYZE) on PostgreSQL so the
+    freed space and index entries are reused right away, and the alarm
+    listings read through the (status, alarm_type, created_at) and
+    (equipment_id, status) indexes rather than the whole history.
+    """
+
+    def __init__(self, bind: Engine = None):
+        self._bind = bind
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.last_report: Optional[Dict[str, Any]] = None
+
+    @property
+    def bind(self) -> Engine:
+        if self._bind is None:
+            from ..database import engine
+            self._bind = engine
+        return self._bind
+
+    @staticmethod
+    def _cutoff(days: int, now: datetime) -> datetime:
+        return now - timedelta(days=days)
+
+    def purge_metrics(self, now: datetime) -> Dict[str, Any]:
+        """Drop or delete raw metrics older than history_retention_days"""
+        cutoff = self._cutoff(settings.history_retention_days, now)
+        report = {"cutoff": cutoff.isoformat(), "partitions_dropped": 0, "rows_deleted": 0}
+
+        if MetricPartitions.enabled(self.bind):
+            dropped = MetricPartitions.drop_before(self.bind, cutoff)
+            report["partitions_dropped"] = dropped["partitions_dropped"]
+            report["rows_deleted"] += dropped["rows_dropped"]
+            MetricPartitions.ensure(self.bind)
+
+        table = MonitoringMetrics.__table__
+        report["rows_deleted"] += delete_in_batches(self.bind, table, table.c.timestamp < cutoff)
+        return report
+
+    def purge_rollups(self, now: datetime) -> Dict[str, Any]:
+        """Delete rollup buckets older than their resolution's retention"""
+        report = {}
+        for model, days in (
+            (MetricRollup1m, settings.metrics_rollup_1m_retention_days),
+            (MetricRollup1h, settings.metrics_rollup_1h_retention_days),
+            (MetricRollup1d, settings.metrics_rollup_1d_retention_days)
+        ):
+            if not days:
+                continue
+            table = model.__table__
+            cutoff = self._cutoff(days, now)
+            report[table.name] = {
+                "cutoff": cutoff.isoformat(),
+                "rows_deleted": delete_in_batches(self.bind, table, table.c.bucket < cutoff)
+            }
+        return report
+
+    def purge_alarms(self, now: datetime) -> Dict[str, Any]:
+        """Delete resolved alarms older than alarm_retention_days that have no documentation"""
+        cutoff = self._cutoff(settings.alarm_retention_days or settings.history_retention_days, now)
+        table = Alarm.__table__
+        condition = and_(
+            table.c.created_at < cutoff,
+            table.c.status == "resolved",
+            or_(table.c.resolved_at.is_(None), table.c.resolved_at < cutoff),
+            ~exists().where(Documentation.alarm_id == table.c.id)
+        )
+        deleted = delete_in_batches(self.bind, table, condition)
+        return {
+            "cutoff": cutoff.isoformat(),
+            "rows_deleted": deleted,
+            "vacuumed": vacuum(self.bind, table) if deleted else False
+        }
+
+    def purge_change_log(self, now: datetime) -> Dict[str, Any]:
+        """Delete change log entries older than change_log_retention_days"""
+        cutoff = self._cutoff(settings.change_log_retention_days, now)
+        table = ChangeLog.__table__
+        return {"cutoff": cutoff.isoformat(), "rows_deleted": delete_in_batches(self.bind, table, table.c.created_at < cutoff)}
+
+    def run(self) -> Dict[str, Any]:
+        """Apply every retention rule and report the rows reclaimed"""
+        if not self._lock.acquire(blocking=False):
+            return {"skipped": "retention already running"}
+        try:
+            started = time.monotonic()
+            now = datetime.now(timezone.utc)
+            report = {
+                "started_at": now.isoformat(),
+                METRICS_TABLE: self.purge_metrics(now),
+                "rollups": self.purge_rollups(now),
+                Alarm.__tablename__: self.purge_alarms(now),
+                ChangeLog.__tablename__: self.purge_change_log(now)
+            }
+            if report[Alarm.__tablename__]["rows_deleted"]:
+                response_cache.invalidate("alarms")
+                if StatsService.enabled():
+                    # Purged alarms are not tracked one by one; recount instead
+                    with Session(self.bind) as db:
+                        StatsService.rebuild(db)
+            report["rows_reclaimed"] = (
+                report[METRICS_TABLE]["rows_deleted"]
+                + sum(rollup["rows_deleted"] for rollup in report["rollups"].values())
+                + report[Alarm.__tablename__]["rows_deleted"]
+                + report[ChangeLog.__tablename__]["rows_deleted"]
+            )
+            report["duration_seconds"] = round(time.monotonic() - started, 3)
+            self.runs += 1
+            self.last_report = report
+            logger.info(f"Retention reclaimed {report['rows_reclaimed']} rows in {report['duration_seconds']}s")
+            return report
+        finally:
+            self._lock.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the number of runs and the last run's report"""
+        return {
+            "runs": self.runs,
+            "last_report": self.last_report
+        }
+
+
+# Global instance
+retention_service = RetentionService()
@@ -0,0 +1,226 @@
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, delete, select, and_
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models import MonitoringMetrics, MetricRollup1m, MetricRollup1h, MetricRollup1d
+from ..utils.upsert import chunked, least_greatest, upsert_insert
+
+logger = logging.getLogger(__name__)
+
+# (name, bucket width in seconds, model), finest first
+ROLLUPS = (
+    ("1m", 60, MetricRollup1m),
+    ("1h", 3600, MetricRollup1h),
+    ("1d", 86400, MetricRollup1d)
+)
+
+UPSERT_CHUNK_SIZE = 1000
+
+SeriesKey = Tuple[int, str, datetime]
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def bucket_start(value: datetime, seconds: int) -> datetime:
+    """Get the start of the bucket a timestamp falls in"""
+    epoch = int(_as_utc(value).timestamp())
+    return datetime.fromtimestamp(epoch - epoch % seconds, tz=timezone.utc)
+
+
+def aggregate_rows(rows: Iterable[Dict[str, Any]], seconds: int) -> Dict[SeriesKey, Dict[str, Any]]:
+    """Fold raw metric rows into one partial aggregate per series and bucket"""
+    partials: Dict[SeriesKey, Dict[str, Any]] = {}
+    for row in rows:
+        value = row["metric_value"]
+        if value is None or row["equipment_id"] is None:
+            continue
+        timestamp = _as_utc(row["timestamp"])
+        key = (row["equipment_id"], row["metric_name"], bucket_start(timestamp, seconds))
+        partial = partials.get(key)
+        if partial is None:
+            partials[key] = {
+                "equipment_id": key[0],
+                "metric_name": key[1],
+                "bucket": key[2],
+                "min_value": value,
+                "max_value": value,
+                "sum_value": value,
+                "count": 1,
+                "last_value": value,
+                "last_timestamp": timestamp
+            }
+            continue
+        partial["min_value"] = min(partial["min_value"], value)
+        partial["max_value"] = max(partial["max_value"], value)
+        partial["sum_value"] += value
+        partial["count"] += 1
+        if timestamp >= partial["last_timestamp"]:
+            partial["last_value"] = value
+            partial["last_timestamp"] = timestamp
+    return partials
+
+
+def _upsert_partials(connection: Connection, model, partials: List[Dict[str, Any]]) -> None:
+    """Merge partial aggregates into a rollup table"""
+    table = model.__table__
+    dialect_insert = upsert_insert(connection.dialect.name)
+    if dialect_insert is None:
+        _merge_partials(connection, model, partials)
+        return
+    least, greatest = least_greatest(connection.dialect.name)
+
+    statement = dialect_insert(table)
+    excluded = statement.excluded
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.equipment_id, table.c.metric_name, table.c.bucket],
+        set_={
+            "min_value": least(table.c.min_value, excluded.min_value),
+            "max_value": greatest(table.c.max_value, excluded.max_value),
+            "sum_value": table.c.sum_value + excluded.sum_value,
+            "count": table.c.count + excluded.count,
+            "last_value": case(
+                (excluded.last_timestamp >= table.c.last_timestamp, excluded.last_value),
+                else_=table.c.last_value
+            ),
+            "last_timestamp": greatest(table.c.last_timestamp, excluded.last_timestamp)
+        }
+    )
+    for chunk in chunked(partials, UPSERT_CHUNK_SIZE):
+        connection.execute(statement, chunk)
+
+
+def _merge_partials(connection: Connection, model, partials: List[Dict[str, Any]]) -> None:
+    """Read-modify-write merge for databases without INSERT ... ON CONFLICT"""
+    table = model.__table__
+    for partial in partials:
+        existing = connection.execute(
+            select(table).where(and_(
+                table.c.equipment_id == partial["equipment_id"],
+                table.c.metric_name == partial["metric_name"],
+                table.c.bucket == partial["bucket"]
+            ))
+        ).mappings().first()
+        if existing is None:
+            connection.execute(table.insert().values(**partial))
+            continue
+        newer = _as_utc(partial["last_timestamp"]) >= _as_utc(existing["last_timestamp"])
+        connection.execute(
+            table.update().where(table.c.id == existing["id"]).values(
+                min_value=min(existing["min_value"], partial["min_value"]),
+                max_value=max(existing["max_value"], partial["max_value"]),
+                sum_value=existing["sum_value"] + partial["sum_value"],
+                count=existing["count"] + partial["count"],
+                last_value=partial["last_value"] if newer else existing["last_value"],
+                last_timestamp=partial["last_timestamp"] if newer else existing["last_timestamp"]
+            )
+        )
+
+
+def rollup_retention_days(resolution: str) -> int:
+    """Days of buckets kept for a resolution, 0 meaning forever"""
+    return getattr(settings, f"metrics_rollup_{resolution}_retention_days", 0)
+
+
+def choose_rollup(time_from: datetime, time_till: datetime, max_points: int):
+    """Pick the finest retained rollup whose bucket count for the range fits the point budget"""
+    span = max((_as_utc(time_till) - _as_utc(time_from)).total_seconds(), 0)
+    oldest_needed = datetime.now(timezone.utc) - _as_utc(time_from)
+    for rollup in ROLLUPS:
+        retention = rollup_retention_days(rollup[0])
+        if retention and oldest_needed.total_seconds() > retention * 86400:
+            continue
+        if span / rollup[1] <= max_points:
+            return rollup
+    return ROLLUPS[-1]
+
+
+class RollupService:
+    @staticmethod
+    def apply(bind: Engine, rows: List[Dict[str, Any]]) -> int:
+        """Fold newly written raw rows into every rollup table in one transaction"""
+        if not rows:
+            return 0
+        merged = 0
+        with bind.begin() as connection:
+            for _, seconds, model in ROLLUPS:
+                partials = list(aggregate_rows(rows, seconds).values())
+                _upsert_partials(connection, model, partials)
+                merged += len(partials)
+        return merged
+
+    @staticmethod
+    def rebuild(bind: Engine, batch_size: int = 50000) -> Dict[str, Any]:
+        """Recompute all rollups from monitoring_metrics"""
+        columns = [
+            MonitoringMetrics.equipment_id, MonitoringMetrics.metric_name,
+            MonitoringMetrics.metric_value, MonitoringMetrics.timestamp
+        ]
+        rows_read = 0
+        with bind.begin() as connection:
+            for _, _, model in ROLLUPS:
+                connection.execute(delete(model))
+
+            last_id = 0
+            while True:
+                batch = connection.execute(
+                    select(MonitoringMetrics.id, *columns)
+                    .where(MonitoringMetrics.id > last_id)
+                    .order_by(MonitoringMetrics.id)
+                    .limit(batch_size)
+                ).mappings().all()
+                if not batch:
+                    break
+                last_id = batch[-1]["id"]
+                rows_read += len(batch)
+                for _, seconds, model in ROLLUPS:
+                    _upsert_partials(connection, model, list(aggregate_rows(batch, seconds).values()))
+
+        logger.info(f"Rebuilt metric rollups from {rows_read} raw rows")
+        return {"rows_read": rows_read}
+
+    @staticmethod
+    def get_series(db: Session, equipment_id: int, time_from: datetime, time_till: datetime,
+                   metric_names: Optional[List[str]] = None,
+                   max_points: Optional[int] = None) -> Dict[str, Any]:
+        """Get aggregated series for an equipment at a resolution that fits max_points"""
+        max_points = max_points or settings.metrics_series_max_points
+        resolution, seconds, model = choose_rollup(time_from, time_till, max_points)
+
+        query = db.query(
+            model.metric_name, model.bucket, model.min_value, model.max_value,
+            model.sum_value, model.count, model.last_value
+        ).filter(
+            model.equipment_id == equipment_id,
+            model.bucket >= bucket_start(time_from, seconds),
+            model.bucket <= time_till
+        )
+        if metric_names:
+            query = query.filter(model.metric_name.in_(metric_names))
+
+        series: Dict[str, List[Dict[str, Any]]] = {}
+        for row in query.order_by(model.metric_name, model.bucket):
+            series.setdefault(row.metric_name, []).append({
+                "timestamp": _as_utc(row.bucket).isoformat(),
+                "min": row.min_value,
+                "max": row.max_value,
+                "avg": row.sum_value / row.count if row.count else None,
+                "count": row.count,
+                "last": row.last_value
+            })
+
+        return {
+            "resolution": resolution,
+            "bucket_seconds": seconds,
+            "time_from": _as_utc(time_from).isoformat(),
+            "time_till": _as_utc(time_till).isoformat(),
+            "series": series
+        }
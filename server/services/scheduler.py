@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from ..config import settings
+from ..database import SessionLocal, engine
+from ..utils.leases import LocalLeases, create_leases
+from .alarm_service import AlarmService
+from .equipment_service import EquipmentService
+from .metrics_service import metrics_collector
+from .retention_service import retention_service
+from .stats_service import StatsService
+
+logger = logging.getLogger(__name__)
+
+
+class JobBusy(Exception):
+    """Raised when a job is already running here or in another worker"""
+
+
+class PeriodicJob:
+    """A function run every ``interval`` seconds, with run statistics"""
+
+    def __init__(self, name: str, func: Callable[[], Any], interval: float):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.runs = 0
+        self.failures = 0
+        self.skipped_busy = 0  # another worker or a manual trigger held the lease
+        self.missed = 0  # scheduled slots dropped because the previous run overran
+        self.last_started_at: Optional[datetime] = None
+        self.last_duration: Optional[float] = None
+        self.last_lag: Optional[float] = None
+        self.max_lag = 0.0
+        self.last_error: Optional[str] = None
+        self.last_result: Any = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "interval": self.interval,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped_busy": self.skipped_busy,
+            "missed": self.missed,
+            "last_started_at": self.last_started_at.isoformat() if self.last_started_at else None,
+            "last_duration": self.last_duration,
+            "last_lag": self.last_lag,
+            "max_lag": self.max_lag,
+            "last_error": self.last_error,
+            "last_result": self.last_result
+        }
+
+
+class Scheduler:
+    """Runs periodic jobs on a fixed cadence with at most one run per job across the deployment
+
+    Each job is due at ``start + n * interval``; a run that overruns skips the
+    slots it covered instead of queueing them, so runs never overlap or bunch
+    up. Before running, a job takes a lease named after it: a PostgreSQL
+    advisory lock, a Redis lease or (single process) a local lock, depending
+    on ``scheduler_lock_backend``. Workers that do not get the lease skip that
+    slot. Manual triggers go through the same lease.
+    """
+
+    def __init__(self, leases=None):
+        self._leases = leases
+        self._local = LocalLeases()
+        self.jobs: Dict[str, PeriodicJob] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    @property
+    def leases(self):
+        if self._leases is None:
+            self._leases = create_leases(
+                settings.scheduler_lock_backend, engine=engine,
+                redis_url=settings.redis_url, ttl=settings.scheduler_lease_ttl
+            )
+        return self._leases
+
+    def add_job(self, name: str, func: Callable[[], Any], interval: float) -> PeriodicJob:
+        """Register a job; an interval of 0 registers it for manual runs only"""
+        job = PeriodicJob(name, func, interval)
+        self.jobs[name] = job
+        return job
+
+    def run_job(self, name: str, lag: float = 0.0) -> Any:
+        """Run a job now under its lease; raises JobBusy if it is already running"""
+        job = self.jobs[name]
+        # The local lock keeps a manual trigger from racing the scheduler in this
+        # process even when the distributed backend is re-entrant for it
+        if not self._local.acquire(name):
+            job.skipped_busy += 1
+            raise JobBusy(f"{name} is already running")
+        try:
+            if not self.leases.acquire(f"job:{name}"):
+                job.skipped_busy += 1
+                raise JobBusy(f"{name} is running in another worker")
+            try:
+                return self._execute(job, lag)
+            finally:
+                self.leases.release(f"job:{name}")
+        finally:
+            self._local.release(name)
+
+    def _execute(self, job: PeriodicJob, lag: float) -> Any:
+        started = time.monotonic()
+        job.last_started_at = datetime.utcnow()
+        job.last_lag = round(lag, 3)
+        job.max_lag = max(job.max_lag, job.last_lag)
+        try:
+            result = job.func()
+            if isinstance(result, dict) and "error" in result:
+                raise Exception(result["error"])
+        except Exception as e:
+            job.failures += 1
+            job.last_error = str(e)
+            logger.error(f"Scheduled job {job.name} failed: {e}")
+            raise
+        finally:
+            job.last_duration = round(time.monotonic() - started, 3)
+            job.runs += 1
+        job.last_error = None
+        job.last_result = result
+        logger.info(f"Scheduled job {job.name} finished in {job.last_duration}s (lag {job.last_lag}s)")
+        return result
+
+    async def _loop(self, job: PeriodicJob) -> None:
+        next_run = time.monotonic()
+        while True:
+            await asyncio.sleep(max(0.0, next_run - time.monotonic()))
+            lag = time.monotonic() - next_run
+            try:
+                await asyncio.to_thread(self.run_job, job.name, lag)
+            except JobBusy as e:
+                logger.debug(f"Skipping {job.name}: {e}")
+            except Exception:
+                pass  # already logged and counted by _execute
+
+            # Fixed cadence: advance to the next slot still in the future
+            next_run += job.interval
+            now = time.monotonic()
+            if next_run <= now:
+                missed = int((now - next_run) // job.interval) + 1
+                job.missed += missed
+                next_run += missed * job.interval
+
+    def start(self) -> None:
+        """Start a loop for every registered job on the running event loop"""
+        for name, job in self.jobs.items():
+            if name not in self._tasks and job.interval > 0:
+                self._tasks[name] = asyncio.create_task(self._loop(job), name=f"job-{name}")
+        logger.info(f"Scheduler started with jobs: {', '.join(self._tasks)}")
+
+    async def stop(self) -> None:
+        """Cancel job loops; runs already in progress finish in their threads"""
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks = {}
+
+    def stats(self) -> Dict[str, Any]:
+        """Get per-job run counters, durations and lag"""
+        return {
+            "running": bool(self._tasks),
+            "lock_backend": self.leases.backend,
+            "jobs": {name: job.stats() for name, job in self.jobs.items()}
+        }
+
+
+def _with_session(func: Callable) -> Callable[[], Any]:
+    def run():
+        db = SessionLocal()
+        try:
+            return func(db)
+        finally:
+            db.close()
+    return run
+
+
+def register_default_jobs(target: Scheduler) -> None:
+    """Add the Zabbix sync, metrics collection, retention and counter jobs; disabled jobs only run when triggered"""
+    target.add_job("equipment_sync", _with_session(EquipmentService.sync_with_zabbix), settings.equipment_sync_interval)
+    if settings.alarm_sync_mode == "events":
+        target.add_job("alarm_sync", _with_session(AlarmService.sync_alarms_with_zabbix), settings.alert_check_interval)
+        target.add_job("alarm_reconcile", _with_session(AlarmService.reconcile_alarms_with_zabbix), 0)
+    else:
+        target.add_job("alarm_sync", _with_session(AlarmService.reconcile_alarms_with_zabbix), settings.alert_check_interval)
+    target.add_job(
+        "metrics_collect", metrics_collector.collect_once,
+        settings.metrics_collect_interval if settings.metrics_collection_enabled else 0
+    )
+    target.add_job("retention", retention_service.run, settings.retention_interval if settings.retention_enabled else 0)
+    # Also runs at startup, which builds the counters the first time
+    target.add_job(
+        "stats_counters", _with_session(StatsService.rebuild),
+        settings.stats_counters_rebuild_interval if settings.stats_counters_enabled else 0
+    )
+
+
+# Global instance
+scheduler = Scheduler()
+register_default_jobs(scheduler)
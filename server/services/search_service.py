@@ -0,0 +1,266 @@
+import ipaddress
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import case, event, func, literal, or_, select
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models import Equipment
+from ..utils.ngram_index import NgramIndex
+from ..utils.upsert import chunked
+
+logger = logging.getLogger(__name__)
+
+# Searchable equipment columns and their rank weight
+SEARCH_FIELDS = {
+    "name": 1.0,
+    "hostname": 1.0,
+    "ip_address": 1.0,
+    "client_name": 0.8
+}
+# Columns offered as autocomplete suggestions
+PREFIX_FIELDS = ("name", "hostname")
+
+
+def escape_like(term: str) -> str:
+    """Escape LIKE wildcards so a term matches literally"""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def exact_field(term: str) -> Optional[str]:
+    """Column a term can only mean an exact match on: an IP address or a Zabbix hostid"""
+    if term.isdigit():
+        return "zabbix_host_id"
+    try:
+        ipaddress.ip_address(term)
+        return "ip_address"
+    except ValueError:
+        return None
+
+
+class EquipmentSearch:
+    """Ranked, limited equipment search and name autocomplete
+
+    IPs and Zabbix hostids are first looked up by equality on their indexed
+    columns. Other terms are ranked substring matches (exact, then prefix,
+    then infix), followed by fuzzy trigram matches for typos. On PostgreSQL
+    the pg_trgm GIN indexes on the searchable columns serve both kinds; on
+    other databases an in-process trigram index is built on first use and
+    kept current by ORM writes and host syncs in this process.
+    """
+
+    def __init__(self):
+        self._index: Optional[NgramIndex] = None
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.exact_hits = 0
+        self.built_at: Optional[float] = None
+        self.build_seconds: Optional[float] = None
+
+    @staticmethod
+    def backend(db: Session) -> str:
+        """Search backend for a session: database (pg_trgm) or memory (in-process index)"""
+        if settings.search_backend != "auto":
+            return settings.search_backend
+        return "database" if db.get_bind().dialect.name == "postgresql" else "memory"
+
+    def index(self, db: Session) -> NgramIndex:
+        """The in-process index, built from the equipment table on first use"""
+        if self._index is not None:
+            return self._index
+        with self._lock:
+            if self._index is None:
+                started = time.monotonic()
+                index = NgramIndex(SEARCH_FIELDS, SEARCH_FIELDS, PREFIX_FIELDS, settings.search_max_candidates)
+                columns = [getattr(Equipment, field) for field in SEARCH_FIELDS]
+                index.load(
+                    (row[0], dict(zip(SEARCH_FIELDS, row[1:])))
+                    for row in db.execute(select(Equipment.id, *columns)).yield_per(5000)
+                )
+                self.build_seconds = round(time.monotonic() - started, 3)
+                self.built_at = time.time()
+                self._index = index
+                logger.info(f"Built equipment search index: {len(index)} rows in {self.build_seconds}s")
+        return self._index
+
+    def warm(self) -> None:
+        """Build the in-process index in the background, so the first search does not wait for it"""
+        def build():
+            db = SessionLocal()
+            try:
+                if self.backend(db) == "memory":
+                    self.index(db)
+            except Exception as e:
+                logger.warning(f"Failed to build equipment search index: {e}")
+            finally:
+                db.close()
+
+        threading.Thread(target=build, name="search-index", daemon=True).start()
+
+    def refresh(self, db: Session, zabbix_host_ids: Iterable[str]) -> None:
+        """Re-read rows written outside the ORM (host sync) into a built index"""
+        index = self._index
+        if index is None:
+            return
+        columns = [getattr(Equipment, field) for field in SEARCH_FIELDS]
+        for chunk in chunked(list(zabbix_host_ids), settings.equipment_sync_chunk_size):
+            for row in db.execute(select(Equipment.id, *columns).where(Equipment.zabbix_host_id.in_(chunk))):
+                index.add(row[0], dict(zip(SEARCH_FIELDS, row[1:])))
+
+    def apply(self, written: Dict[int, Dict[str, Any]], deleted: Iterable[int]) -> None:
+        """Apply committed ORM writes to a built index"""
+        index = self._index
+        if index is None:
+            return
+        for equipment_id, values in written.items():
+            index.add(equipment_id, values)
+        for equipment_id in deleted:
+            index.remove(equipment_id)
+
+    def _exact(self, db: Session, term: str, limit: int, criteria: Sequence = ()) -> List[Equipment]:
+        field = exact_field(term)
+        if field is None:
+            return []
+        rows = (
+            db.query(Equipment).filter(getattr(Equipment, field) == term, *criteria)
+            .order_by(Equipment.id).limit(limit).all()
+        )
+        if rows:
+            self.exact_hits += 1
+        return rows
+
+    @staticmethod
+    def _database_search(db: Session, term: str, limit: int, fields: Tuple[str, ...],
+                         fuzzy: bool) -> List[Tuple[int, float]]:
+        columns = [(getattr(Equipment, field), SEARCH_FIELDS[field]) for field in fields]
+        pattern = f"%{escape_like(term)}%"
+        conditions = [column.ilike(pattern, escape="\\") for column, _ in columns]
+        # Substring matches first, then by weighted trigram similarity
+        substring = func.greatest(*[case((condition, 1), else_=0) for condition in conditions], 0)
+        # Typos are scored against the whole value or its closest word
+        score = func.greatest(*[
+            func.greatest(func.similarity(func.coalesce(column, ""), term),
+                          func.word_similarity(term, func.coalesce(column, ""))) * weight
+            for column, weight in columns
+        ], 0)
+        if fuzzy:
+            threshold = str(settings.search_similarity_threshold)
+            db.execute(select(func.set_config("pg_trgm.similarity_threshold", threshold, True),
+                              func.set_config("pg_trgm.word_similarity_threshold", threshold, True)))
+            conditions += [column.op("%")(term) for column, _ in columns]
+            conditions += [literal(term).op("<%")(column) for column, _ in columns]
+        rows = db.execute(
+            select(Equipment.id, (substring + score).label("score"))
+            .where(or_(*conditions))
+            .order_by(substring.desc(), score.desc(), Equipment.id)
+            .limit(limit)
+        ).all()
+        return [(row.id, row.score) for row in rows]
+
+    def search(self, db: Session, term: str, limit: int = None, fields: Iterable[str] = None,
+               fuzzy: bool = True, criteria: Sequence = ()) -> List[Equipment]:
+        """Get up to limit equipment matching term, best match first
+
+        Rows must also meet every SQL expression in criteria; with criteria,
+        up to search_max_candidates ranked matches are narrowed by them.
+        """
+        term = term.strip()
+        limit = limit or settings.search_default_limit
+        fields = tuple(fields or SEARCH_FIELDS)
+        self.queries += 1
+        if not term:
+            return []
+
+        if fields == tuple(SEARCH_FIELDS):
+            exact = self._exact(db, term, limit, criteria)
+            if exact:
+                return exact
+
+        candidates = max(limit, settings.search_max_candidates) if criteria else limit
+        if self.backend(db) == "database":
+            ranked = self._database_search(db, term, candidates, fields, fuzzy)
+        else:
+            ranked = self.index(db).search(
+                term, candidates, fields, fuzzy=fuzzy, threshold=settings.search_similarity_threshold
+            )
+        if not ranked:
+            return []
+
+        rows = {
+            row.id: row for row in
+            db.query(Equipment).filter(Equipment.id.in_([doc_id for doc_id, _ in ranked]), *criteria)
+        }
+        return [rows[doc_id] for doc_id, _ in ranked if doc_id in rows][:limit]
+
+    def autocomplete(self, db: Session, prefix: str, limit: int = 10) -> List[Dict[str, str]]:
+        """Get up to limit distinct names and hostnames starting with prefix, in order"""
+        prefix = prefix.strip()
+        if not prefix:
+            return []
+        if self.backend(db) == "memory":
+            return self.index(db).complete(prefix, limit)
+
+        suggestions = []
+        for field in PREFIX_FIELDS:
+            column = getattr(Equipment, field)
+            values = db.execute(
+                select(column).where(column.ilike(f"{escape_like(prefix)}%", escape="\\"))
+                .distinct().order_by(column).limit(limit)
+            ).scalars()
+            suggestions += [{"value": value, "field": field} for value in values]
+        suggestions.sort(key=lambda suggestion: suggestion["value"].lower())
+        seen = set()
+        unique = []
+        for suggestion in suggestions:
+            if suggestion["value"].lower() not in seen:
+                seen.add(suggestion["value"].lower())
+                unique.append(suggestion)
+        return unique[:limit]
+
+    def stats(self) -> Dict[str, Any]:
+        """Get query counters and the in-process index size"""
+        return {
+            "backend": settings.search_backend,
+            "queries": self.queries,
+            "exact_hits": self.exact_hits,
+            "index": self._index.stats() if self._index is not None else None,
+            "index_build_seconds": self.build_seconds
+        }
+
+
+# Global instance
+equipment_search = EquipmentSearch()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_equipment_writes(session: Session, flush_context) -> None:
+    if equipment_search._index is None:
+        return
+    written = session.info.setdefault("search_written", {})
+    deleted = session.info.setdefault("search_deleted", set())
+    for instance in (*session.new, *session.dirty):
+        if isinstance(instance, Equipment) and instance.id is not None:
+            written[instance.id] = {field: getattr(instance, field) for field in SEARCH_FIELDS}
+            deleted.discard(instance.id)
+    for instance in session.deleted:
+        if isinstance(instance, Equipment):
+            written.pop(instance.id, None)
+            deleted.add(instance.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_equipment_writes(session: Session) -> None:
+    written = session.info.pop("search_written", None)
+    deleted = session.info.pop("search_deleted", None)
+    if written or deleted:
+        equipment_search.apply(written or {}, deleted or ())
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_equipment_writes(session: Session) -> None:
+    session.info.pop("search_written", None)
+    session.info.pop("search_deleted", None)
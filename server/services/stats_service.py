@@ -0,0 +1,253 @@
+from sqlalchemy import and_, case, delete, event, func, insert, text, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+from typing import Dict, Optional, Tuple
+from collections import Counter
+from datetime import datetime, time, timedelta
+import logging
+
+from ..config import settings
+from ..models import Alarm, Equipment, StatsCounter
+from ..utils.upsert import upsert_insert
+
+logger = logging.getLogger(__name__)
+
+# Present once the counters have been rebuilt; until then stats are aggregated
+READY_COUNTER = "meta:rebuilt"
+
+
+def alarm_counter(status: Optional[str], alarm_type: Optional[str]) -> str:
+    return f"alarms:{status or ''}:{alarm_type or ''}"
+
+
+def equipment_counter(status: Optional[str]) -> str:
+    return f"equipment:{status or ''}"
+
+
+def day_range(now: datetime = None) -> Tuple[datetime, datetime]:
+    """Start and end of the current local day, as a range an index can serve"""
+    start = datetime.combine((now or datetime.now()).date(), time.min)
+    return start, start + timedelta(days=1)
+
+
+def _committed(instance, attribute: str):
+    """Value of an attribute as last loaded from the database"""
+    history = get_history(instance, attribute)
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return getattr(instance, attribute)
+
+
+class StatsService:
+    """Alarm and equipment statistics
+
+    By default each table is summarised with one grouped, conditional
+    aggregate query. With stats_counters_enabled, per-status counts are
+    kept in stats_counters: ORM writes are tracked by a flush hook and bulk
+    sync writes add their deltas explicitly, both in the writer's
+    transaction, so reading stats is a lookup of a few rows. A periodic
+    rebuild corrects any drift.
+    """
+
+    @staticmethod
+    def enabled() -> bool:
+        return settings.stats_counters_enabled
+
+    @staticmethod
+    def alarm_counts(db: Session) -> Tuple[Dict[Tuple[str, str], int], int]:
+        """Count alarms per (status, alarm_type) and those resolved today, in one query"""
+        start, end = day_range()
+        resolved_today = func.count(case((and_(Alarm.resolved_at >= start, Alarm.resolved_at < end), Alarm.id)))
+        rows = db.query(Alarm.status, Alarm.alarm_type, func.count(Alarm.id), resolved_today).group_by(
+            Alarm.status, Alarm.alarm_type
+        ).all()
+        counts = {(status, alarm_type): count for status, alarm_type, count, _ in rows}
+        return counts, sum(today for status, _, _, today in rows if status == "resolved")
+
+    @staticmethod
+    def resolved_today(db: Session) -> int:
+        """Count alarms resolved today with a range scan on resolved_at"""
+        start, end = day_range()
+        return db.query(func.count(Alarm.id)).filter(
+            Alarm.resolved_at >= start,
+            Alarm.resolved_at < end,
+            Alarm.status == "resolved"
+        ).scalar()
+
+    @staticmethod
+    def equipment_counts(db: Session) -> Dict[str, int]:
+        """Count equipment per status in one query"""
+        return dict(db.query(Equipment.status, func.count(Equipment.id)).group_by(Equipment.status).all())
+
+    @staticmethod
+    def read_counters(db: Session) -> Optional[Dict[str, int]]:
+        """Get every counter, or None if counters are disabled or not built yet"""
+        if not StatsService.enabled():
+            return None
+        counters = dict(db.query(StatsCounter.name, StatsCounter.value))
+        return counters if READY_COUNTER in counters else None
+
+    @staticmethod
+    def get_alarm_stats(db: Session) -> Dict[str, int]:
+        """Get alarm counts by status, active counts by type and resolved today"""
+        counters = StatsService.read_counters(db)
+        if counters is None:
+            counts, resolved_today = StatsService.alarm_counts(db)
+        else:
+            counts = {}
+            for name, value in counters.items():
+                if name.startswith("alarms:"):
+                    _, status, alarm_type = name.split(":", 2)
+                    counts[(status, alarm_type)] = value
+            resolved_today = StatsService.resolved_today(db)
+
+        def total(status: str, alarm_type: str = None) -> int:
+            return sum(
+                count for (row_status, row_type), count in counts.items()
+                if row_status == status and (alarm_type is None or row_type == alarm_type)
+            )
+
+        return {
+            "active": total("active"),
+            "acknowledged": total("acknowledged"),
+            "resolved": total("resolved"),
+            "critical_active": total("active", "critical"),
+            "warning_active": total("active", "warning"),
+            "resolved_today": resolved_today
+        }
+
+    @staticmethod
+    def get_equipment_stats(db: Session) -> Dict[str, int]:
+        """Get equipment counts in total and by status"""
+        counters = StatsService.read_counters(db)
+        if counters is None:
+            counts = StatsService.equipment_counts(db)
+        else:
+            counts = {
+                name.split(":", 1)[1]: value
+                for name, value in counters.items() if name.startswith("equipment:")
+            }
+
+        return {
+            "total": sum(counts.values()),
+            "online": counts.get("online", 0),
+            "offline": counts.get("offline", 0),
+            "maintenance": counts.get("maintenance", 0)
+        }
+
+    @staticmethod
+    def add(db: Session, deltas: Dict[str, int]) -> None:
+        """Add deltas to counters in the session's transaction, without committing"""
+        if not StatsService.enabled():
+            return
+        rows = [{"name": name, "value": value} for name, value in deltas.items() if value]
+        if not rows:
+            return
+
+        connection = db.connection()
+        table = StatsCounter.__table__
+        dialect_insert = upsert_insert(connection.dialect.name)
+        if dialect_insert is None:
+            for row in rows:
+                updated = connection.execute(
+                    update(table).where(table.c.name == row["name"]).values(value=table.c.value + row["value"])
+                ).rowcount
+                if not updated:
+                    connection.execute(insert(table), row)
+            return
+
+        statement = dialect_insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.name],
+            set_={"value": table.c.value + statement.excluded.value, "updated_at": func.now()}
+        )
+        connection.execute(statement, rows)
+
+    @staticmethod
+    def alarm_transition(db: Session, new_status: str, *criteria) -> None:
+        """Record that the alarms matching criteria are about to move to new_status
+
+        Call before the bulk UPDATE, in the same transaction.
+        """
+        if not StatsService.enabled():
+            return
+        deltas = Counter()
+        for status, alarm_type, count in db.query(Alarm.status, Alarm.alarm_type, func.count(Alarm.id)).filter(
+            *criteria
+        ).group_by(Alarm.status, Alarm.alarm_type):
+            deltas[alarm_counter(status, alarm_type)] -= count
+            deltas[alarm_counter(new_status, alarm_type)] += count
+        StatsService.add(db, deltas)
+
+    @staticmethod
+    def rebuild(db: Session) -> Dict[str, int]:
+        """Recompute every counter from the tables and commit"""
+        try:
+            connection = db.connection()
+            if connection.dialect.name == "postgresql":
+                # Writers adding deltas wait until the new counters are committed,
+                # and the counts below include every writer that committed first
+                connection.execute(text(f"LOCK TABLE {StatsCounter.__tablename__} IN EXCLUSIVE MODE"))
+
+            counts, _ = StatsService.alarm_counts(db)
+            rows = [{"name": alarm_counter(status, alarm_type), "value": count}
+                    for (status, alarm_type), count in counts.items()]
+            rows += [{"name": equipment_counter(status), "value": count}
+                     for status, count in StatsService.equipment_counts(db).items()]
+            rows.append({"name": READY_COUNTER, "value": int(datetime.utcnow().timestamp())})
+
+            connection.execute(delete(StatsCounter.__table__))
+            connection.execute(insert(StatsCounter.__table__), rows)
+            db.commit()
+            logger.info(f"Rebuilt {len(rows) - 1} stats counters")
+            return {"counters": len(rows) - 1}
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to rebuild stats counters: {e}")
+            return {"error": str(e)}
+
+
+@event.listens_for(Session, "before_flush")
+def _track_orm_writes(session: Session, flush_context, instances) -> None:
+    """Collect counter deltas from alarms and equipment added, changed or deleted through the ORM"""
+    if not StatsService.enabled():
+        return
+    deltas = Counter()
+
+    for instance in session.new:
+        if isinstance(instance, Alarm):
+            deltas[alarm_counter(instance.status, instance.alarm_type)] += 1
+        elif isinstance(instance, Equipment):
+            deltas[equipment_counter(instance.status)] += 1
+
+    for instance in session.deleted:
+        if isinstance(instance, Alarm):
+            deltas[alarm_counter(_committed(instance, "status"), _committed(instance, "alarm_type"))] -= 1
+        elif isinstance(instance, Equipment):
+            deltas[equipment_counter(_committed(instance, "status"))] -= 1
+
+    for instance in session.dirty:
+        if isinstance(instance, Alarm):
+            old = alarm_counter(_committed(instance, "status"), _committed(instance, "alarm_type"))
+            new = alarm_counter(instance.status, instance.alarm_type)
+        elif isinstance(instance, Equipment):
+            old = equipment_counter(_committed(instance, "status"))
+            new = equipment_counter(instance.status)
+        else:
+            continue
+        if old != new:
+            deltas[old] -= 1
+            deltas[new] += 1
+
+    if deltas:
+        session.info.setdefault("stats_deltas", Counter()).update(deltas)
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_orm_deltas(session: Session, flush_context) -> None:
+    deltas = session.info.pop("stats_deltas", None)
+    if deltas:
+        StatsService.add(session, deltas)
@@ -0,0 +1,119 @@
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from ..config import settings
+from ..utils.cache import LocalCacheBackend, create_cache_backend
+
+logger = logging.getLogger(__name__)
+
+SESSION_KEY = "session"
+
+# Error data Zabbix returns when a session id is unknown or expired
+SESSION_ERROR_MARKERS = ("Session terminated", "Not authorised", "Not authorized")
+
+
+def is_session_error(error: Any) -> bool:
+    """Check whether a JSON-RPC error (or the exception raised for it) means the session must be re-established"""
+    if isinstance(error, dict):
+        text = f"{error.get('message', '')} {error.get('data', '')}"
+    else:
+        text = str(error)
+    return any(marker in text for marker in SESSION_ERROR_MARKERS)
+
+
+class ZabbixTokenManager:
+    """Holds the Zabbix auth token shared by every client in the process
+
+    With ``settings.zabbix_api_token`` set, that token is used as-is and no
+    session is ever created. Otherwise the session id from ``user.login`` is
+    kept in a cache backend; with the Redis backend all workers reuse the
+    same session instead of logging in separately, and none of them logs it
+    out on shutdown since the others are still using it. The store is
+    created on first use, so importing the service does not connect to Redis.
+    """
+
+    def __init__(self, store=None):
+        self.api_token = settings.zabbix_api_token
+        self._store = store
+        self._store_lock = threading.Lock()
+        self.ttl = settings.zabbix_session_ttl
+        self.login_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self.logins = 0
+        self.reauthentications = 0
+        self.logouts = 0
+
+    @property
+    def store(self):
+        if self._store is None:
+            with self._store_lock:
+                if self._store is None:
+                    self._store = create_cache_backend(
+                        settings.zabbix_session_backend, "zabbix-auth", max_entries=1
+                    )
+        return self._store
+
+    @property
+    def uses_api_token(self) -> bool:
+        return bool(self.api_token)
+
+    @property
+    def is_shared(self) -> bool:
+        """Whether the session lives in a store other workers also use"""
+        return not isinstance(self.store, LocalCacheBackend)
+
+    def owns_session(self) -> bool:
+        """Whether this process may end the session with user.logout"""
+        return not self.api_token and not self.is_shared
+
+    def current(self) -> Optional[str]:
+        """Get the token to send with requests, if one is known"""
+        if self.api_token:
+            return self.api_token
+        try:
+            entry = self.store.get(SESSION_KEY)
+        except Exception as e:
+            logger.warning(f"Failed to read Zabbix session from store: {e}")
+            return None
+        return entry[0] if entry else None
+
+    def store_session(self, token: str) -> None:
+        """Remember a session id obtained from user.login"""
+        with self._lock:
+            self.logins += 1
+        try:
+            self.store.set(SESSION_KEY, token, self.ttl)
+        except Exception as e:
+            logger.warning(f"Failed to store Zabbix session: {e}")
+
+    def invalidate(self, token: Optional[str], expired: bool = True) -> None:
+        """Forget a session id, unless another client already replaced it"""
+        if self.api_token or not token:
+            return
+        with self._lock:
+            if expired:
+                self.reauthentications += 1
+            else:
+                self.logouts += 1
+        if self.current() == token:
+            try:
+                self.store.delete_prefix(SESSION_KEY)
+            except Exception as e:
+                logger.warning(f"Failed to drop Zabbix session: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get session counters"""
+        with self._lock:
+            return {
+                "mode": "api_token" if self.api_token else "session",
+                "shared": self.is_shared,
+                "has_token": self.current() is not None,
+                "logins": self.logins,
+                "reauthentications": self.reauthentications,
+                "logouts": self.logouts
+            }
+
+
+# Global instance shared by ZabbixService and AsyncZabbixService
+zabbix_tokens = ZabbixTokenManager()
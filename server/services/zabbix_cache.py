@@ -0,0 +1,146 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable
+
+from ..config import settings
+from ..utils.cache import create_cache_backend
+from ..utils.singleflight import SingleFlight, request_key
+from .zabbix_service import ZabbixService, zabbix_service
+
+logger = logging.getLogger(__name__)
+
+
+class CachedZabbixService:
+    """Read-through TTL cache around ZabbixService host status lookups
+
+    Only get_host_status is cached; every other attribute is delegated to
+    the wrapped service. Empty results are never
+    cached because the wrapped methods return them on failure. The backend
+    is created on first use, so importing the service does not connect to
+    Redis.
+    """
+
+    def __init__(self, service: ZabbixService, backend=None):
+        self.service = service
+        self._backend = backend
+        self.ttls = {"get_host_status": settings.zabbix_cache_host_status_ttl}
+        if settings.zabbix_cache_backend == "none":
+            self.ttls = {method: 0 for method in self.ttls}
+        self.stale_seconds = settings.zabbix_cache_stale_seconds
+        self._loads = SingleFlight()
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="zabbix-cache")
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = create_cache_backend(
+                        settings.zabbix_cache_backend, "zabbix", max_entries=settings.zabbix_cache_max_entries
+                    )
+        return self._backend
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.service, name)
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _load(self, method: str, key: str, loader: Callable[[], Any]) -> Any:
+        """Call the wrapped service and store a non-empty result"""
+        def load():
+            value = loader()
+            if value:
+                try:
+                    self.backend.set(key, value, self.ttls[method], grace=self.stale_seconds)
+                except Exception as e:
+                    logger.warning(f"Failed to store {method} in cache: {e}")
+            return value
+
+        return self._loads.do(key, load)
+
+    def _schedule_refresh(self, method: str, key: str, loader: Callable[[], Any]) -> None:
+        """Reload a stale entry in the background, at most once at a time per key"""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._load(method, key, loader)
+            except Exception as e:
+                logger.warning(f"Background refresh of {method} failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._refresher.submit(refresh)
+
+    def _cached(self, method: str, args: Dict[str, Any], loader: Callable[[], Any]) -> Any:
+        """Serve a fresh entry, a stale one while refreshing it, or load on miss"""
+        if self.ttls[method] <= 0:
+            return loader()
+
+        key = request_key(method, args)
+        try:
+            entry = self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Failed to read {method} from cache: {e}")
+            entry = None
+
+        if entry is not None:
+            value, fresh_until = entry
+            if fresh_until > time.time():
+                self._count("hits")
+                return value
+            self._count("stale_hits")
+            self._schedule_refresh(method, key, loader)
+            return value
+
+        self._count("misses")
+        return self._load(method, key, loader)
+
+    def get_host_status(self, hostid: str) -> Dict[str, Any]:
+        """Get detailed status of a host (cached)"""
+        return self._cached(
+            "get_host_status", {"hostid": hostid},
+            lambda: self.service.get_host_status(hostid)
+        )
+
+    def invalidate(self, method: str = None) -> int:
+        """Drop cached entries for one method, or for all cached methods"""
+        try:
+            deleted = self.backend.delete_prefix(f"{method}:" if method else "")
+        except Exception as e:
+            logger.warning(f"Failed to invalidate Zabbix cache: {e}")
+            return 0
+        self._count("invalidations")
+        return deleted
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get hit/miss/eviction counters"""
+        with self._lock:
+            counters = {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations
+            }
+        counters.update(self.backend.stats())
+        counters["ttls"] = dict(self.ttls)
+        counters["stale_seconds"] = self.stale_seconds
+        return counters
+
+
+# Global instance
+cached_zabbix_service = CachedZabbixService(zabbix_service)
@@ -1,20 +1,160 @@
 import requests
 import json
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Iterator
 from datetime import datetime, timedelta
 from ..config import settings
-from ..schemas import ZabbixHost, ZabbixTrigger, ZabbixEvent
+from ..schemas import ZabbixHost, ZabbixTrigger, ZabbixEvent, ZabbixProblem
+from ..utils.singleflight import SingleFlight, request_key
+from ..utils.resilience import CircuitBreaker, RetryPolicy, Deadline, DeadlineExceeded, current_deadline
+from ..utils.json_stream import JsonRpcError, iter_result_items, loads
+from .zabbix_auth import zabbix_tokens, is_session_error
 
 logger = logging.getLogger(__name__)
 
+# Methods that must be called without an auth token
+UNAUTHENTICATED_METHODS = {"user.login", "user.checkAuthentication", "apiinfo.version"}
+
+# Read-only methods that are safe to retry
+IDEMPOTENT_METHODS = {"user.checkAuthentication", "apiinfo.version"}
+
+# Shared by every Zabbix client in the process so they all see the same outage
+zabbix_breaker = CircuitBreaker(
+    "zabbix",
+    failure_threshold=settings.zabbix_breaker_failure_threshold,
+    reset_timeout=settings.zabbix_breaker_reset_timeout
+)
+zabbix_retry_policy = RetryPolicy(
+    attempts=settings.zabbix_retry_attempts,
+    base_delay=settings.zabbix_retry_base_delay,
+    max_delay=settings.zabbix_retry_max_delay
+)
+
+
+def is_idempotent(method: str) -> bool:
+    """Check whether a JSON-RPC method may be retried"""
+    return method.endswith(".get") or method in IDEMPOTENT_METHODS
+
+
+def method_timeout(method: str) -> float:
+    """Get the HTTP timeout for a JSON-RPC method"""
+    return settings.zabbix_method_timeouts.get(method, settings.zabbix_timeout)
+
+
+def start_deadline() -> Deadline:
+    """Deadline for one call across retries, capped by any enclosing deadline_scope"""
+    return Deadline(settings.zabbix_request_deadline).earliest(current_deadline())
+
+
+# Zabbix item value types; trends are only kept for numeric items
+NUMERIC_VALUE_TYPES = {"0", "3"}  # float, unsigned
+
+
+def event_hostid(event_data: Dict[str, Any]) -> Optional[str]:
+    """Get the host ID from an event fetched with selectHosts"""
+    hosts = event_data.get("hosts") or []
+    return hosts[0]["hostid"] if hosts else None
+
+
+def build_metric_requests(items: List[Dict[str, Any]], time_from: datetime,
+                          time_till: datetime) -> List[Dict[str, Any]]:
+    """Plan the history.get/trend.get calls needed for a set of items
+    
+    Items are grouped by value_type (history.get reads one history table per
+    call) and itemids are chunked so no single call grows unbounded. Numeric
+    items are read from trends when the range starts before raw history
+    retention.
+    """
+    use_trends = time_from < datetime.now() - timedelta(days=settings.zabbix_history_retention_days)
+    chunk_size = settings.zabbix_history_chunk_size
+    
+    by_value_type: Dict[str, List[str]] = {}
+    for item in items:
+        by_value_type.setdefault(str(item["value_type"]), []).append(item["itemid"])
+    
+    requests_plan = []
+    for value_type, itemids in sorted(by_value_type.items()):
+        for start in range(0, len(itemids), chunk_size):
+            chunk = itemids[start:start + chunk_size]
+            if use_trends and value_type in NUMERIC_VALUE_TYPES:
+                requests_plan.append({
+                    "method": "trend.get",
+                    "params": {
+                        "output": ["itemid", "clock", "value_avg"],
+                        "itemids": chunk,
+                        "time_from": int(time_from.timestamp()),
+                        "time_till": int(time_till.timestamp())
+                    }
+                })
+            else:
+                requests_plan.append({
+                    "method": "history.get",
+                    "params": {
+                        "output": ["itemid", "clock", "value"],
+                        "history": int(value_type),
+                        "itemids": chunk,
+                        "time_from": int(time_from.timestamp()),
+                        "time_till": int(time_till.timestamp()),
+                        "sortfield": "clock",
+                        "sortorder": "ASC"
+                    }
+                })
+    
+    return requests_plan
+
+
+def build_metric_series(items: List[Dict[str, Any]], requests_plan: List[Dict[str, Any]],
+                        results: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Merge history/trend rows into one compact [clock, value] series per item"""
+    series = {
+        item["itemid"]: {
+            "itemid": item["itemid"],
+            "name": item["name"],
+            "key_": item["key_"],
+            "units": item.get("units", ""),
+            "value_type": str(item["value_type"]),
+            "source": "history",
+            "points": []
+        }
+        for item in items
+    }
+    
+    for planned, rows in zip(requests_plan, results):
+        from_trends = planned["method"] == "trend.get"
+        for row in rows:
+            entry = series.get(row["itemid"])
+            if entry is None:
+                continue
+            if from_trends:
+                entry["source"] = "trends"
+                value = float(row["value_avg"])
+            elif entry["value_type"] in NUMERIC_VALUE_TYPES:
+                value = float(row["value"])
+            else:
+                value = row["value"]
+            entry["points"].append([int(row["clock"]), value])
+    
+    for entry in series.values():
+        entry["points"].sort(key=lambda point: point[0])
+    
+    return list(series.values())
+
 
 class ZabbixService:
     def __init__(self):
         self.url = settings.zabbix_url
         self.username = settings.zabbix_user
         self.password = settings.zabbix_password
-        self.auth_token = None
+        self.tokens = zabbix_tokens
+        self.breaker = zabbix_breaker
+        self.retry_policy = zabbix_retry_policy
+        self._inflight = SingleFlight()
+        self._counter_lock = threading.Lock()
+        self.retries = 0
+        self.deadlines_exceeded = 0
         self.session = requests.Session()
         self.session.headers.update({
             'Content-Type': 'application/json-rpc',
@@ -22,7 +162,19 @@ class ZabbixService:
         })
     
     def _make_request(self, method: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Make a request to Zabbix API"""
+        """Make a request to Zabbix API, sharing identical in-flight read calls"""
+        if not method.endswith(".get"):
+            return self._send_request(method, params)
+        return self._inflight.do(request_key(method, params), lambda: self._send_request(method, params))
+    
+    @property
+    def auth_token(self) -> Optional[str]:
+        """Token shared with every other client in this process (or deployment)"""
+        return self.tokens.current()
+    
+    def _send_request(self, method: str, params: Dict[str, Any] = None,
+                      retry_auth: bool = True) -> Dict[str, Any]:
+        """Send a single JSON-RPC request to Zabbix API"""
         if params is None:
             params = {}
         
@@ -33,15 +185,20 @@ class ZabbixService:
             "id": 1
         }
         
-        if self.auth_token:
-            payload["auth"] = self.auth_token
+        auth_token = None if method in UNAUTHENTICATED_METHODS else self.auth_token
+        if auth_token:
+            payload["auth"] = auth_token
         
         try:
-            response = self.session.post(self.url, json=payload, timeout=30)
-            response.raise_for_status()
-            result = response.json()
+            result = self._post(method, payload)
             
             if "error" in result:
+                if auth_token and retry_auth and is_session_error(result["error"]):
+                    # Session expired or was logged out elsewhere: log in again and retry once
+                    logger.info(f"Zabbix session expired during {method}, re-authenticating")
+                    self.tokens.invalidate(auth_token)
+                    if self.authenticate():
+                        return self._send_request(method, params, retry_auth=False)
                 logger.error(f"Zabbix API error: {result['error']}")
                 raise Exception(f"Zabbix API error: {result['error']}")
             
@@ -51,23 +208,157 @@ class ZabbixService:
             logger.error(f"Request to Zabbix API failed: {e}")
             raise Exception(f"Failed to connect to Zabbix API: {e}")
     
+    def _post(self, method: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """POST a JSON-RPC payload through the circuit breaker, retrying idempotent calls"""
+        deadline = start_deadline()
+        attempts = self.retry_policy.attempts if is_idempotent(method) else 1
+        
+        for attempt in range(1, attempts + 1):
+            if deadline.expired:
+                with self._counter_lock:
+                    self.deadlines_exceeded += 1
+                raise DeadlineExceeded(f"Deadline exceeded before Zabbix {method} call")
+            
+            self.breaker.before_call()
+            try:
+                response = self.session.post(
+                    self.url, json=payload,
+                    timeout=min(method_timeout(method), deadline.remaining())
+                )
+                response.raise_for_status()
+                result = loads(response.content)
+            except (requests.exceptions.RequestException, ValueError) as e:
+                self.breaker.record_failure(e)
+                delay = self.retry_policy.delay(attempt)
+                if attempt == attempts or delay >= deadline.remaining():
+                    raise
+                with self._counter_lock:
+                    self.retries += 1
+                logger.warning(f"Zabbix {method} attempt {attempt} failed, retrying in {delay:.2f}s: {e}")
+                time.sleep(delay)
+                continue
+            except Exception as e:
+                self.breaker.record_failure(e)
+                raise
+            except BaseException:
+                self.breaker.abandon_call()
+                raise
+            
+            self.breaker.record_success()
+            return result
+    
+    def iter_results(self, method: str, params: Dict[str, Any] = None,
+                     retry_auth: bool = True) -> Iterator[Dict[str, Any]]:
+        """Stream the result array of a read call, decoding one record at a time
+        
+        The response body is never held in memory as a whole and records are
+        yielded while the download is still in progress. Streamed calls are
+        not retried or coalesced, since records may already have been consumed.
+        """
+        if params is None:
+            params = {}
+        
+        payload = {
+            "jsonrpc": "2.0",
+            "method": method,
+            "params": params,
+            "id": 1
+        }
+        
+        auth_token = None if method in UNAUTHENTICATED_METHODS else self.auth_token
+        if auth_token:
+            payload["auth"] = auth_token
+        
+        deadline = start_deadline()
+        self.breaker.before_call()
+        try:
+            response = self.session.post(
+                self.url, json=payload, stream=True,
+                timeout=min(method_timeout(method), deadline.remaining())
+            )
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            self.breaker.record_failure(e)
+            logger.error(f"Request to Zabbix API failed: {e}")
+            raise Exception(f"Failed to connect to Zabbix API: {e}")
+        except Exception as e:
+            self.breaker.record_failure(e)
+            raise
+        except BaseException:
+            self.breaker.abandon_call()
+            raise
+        self.breaker.record_success()
+        
+        with response:
+            try:
+                yield from iter_result_items(response.iter_content(chunk_size=settings.zabbix_stream_chunk_size))
+            except JsonRpcError as e:
+                if auth_token and retry_auth and is_session_error(e.error):
+                    logger.info(f"Zabbix session expired during {method}, re-authenticating")
+                    self.tokens.invalidate(auth_token)
+                    if self.authenticate():
+                        yield from self.iter_results(method, params, retry_auth=False)
+                        return
+                logger.error(f"Zabbix API error: {e.error}")
+                raise
+    
     def authenticate(self) -> bool:
-        """Authenticate with Zabbix API"""
+        """Authenticate with Zabbix API, reusing the shared session when there is one"""
         try:
-            params = {
-                "user": self.username,
-                "password": self.password
-            }
-            
-            result = self._make_request("user.login", params)
-            self.auth_token = result
-            logger.info("Successfully authenticated with Zabbix API")
-            return True
+            if self.auth_token:
+                return True
+            
+            with self.tokens.login_lock:
+                if self.auth_token:
+                    return True
+                
+                params = {
+                    "user": self.username,
+                    "password": self.password
+                }
+                
+                result = self._make_request("user.login", params)
+                self.tokens.store_session(result)
+                logger.info("Successfully authenticated with Zabbix API")
+                return True
         
         except Exception as e:
             logger.error(f"Authentication failed: {e}")
             return False
     
+    def check_authentication(self) -> bool:
+        """Check that the current token is still valid without creating a session"""
+        auth_token = self.auth_token
+        if not auth_token:
+            return False
+        
+        params = {"token": auth_token} if self.tokens.uses_api_token else {"sessionid": auth_token}
+        try:
+            self._make_request("user.checkAuthentication", params)
+            return True
+        except Exception as e:
+            logger.warning(f"Zabbix session check failed: {e}")
+            if is_session_error(e):
+                self.tokens.invalidate(auth_token)
+            return False
+    
+    def logout(self) -> None:
+        """End the Zabbix session created by user.login
+
+        API tokens, and sessions shared with other workers through Redis, are
+        left alone; a shared session expires on its own once idle.
+        """
+        auth_token = self.auth_token
+        if not self.tokens.owns_session() or not auth_token:
+            return
+        try:
+            self._send_request("user.logout", [], retry_auth=False)
+            logger.info("Logged out from Zabbix API")
+        except Exception as e:
+            logger.warning(f"Zabbix logout failed: {e}")
+        finally:
+            self.tokens.invalidate(auth_token, expired=False)
+    
     def get_hosts(self, filter_params: Dict[str, Any] = None) -> List[ZabbixHost]:
         """Get all hosts from Zabbix"""
         try:
@@ -104,6 +395,88 @@ class ZabbixService:
             logger.error(f"Failed to get hosts: {e}")
             return []
     
+    def iter_hosts(self, page_size: int = None, filter_params: Dict[str, Any] = None) -> Iterator[List[ZabbixHost]]:
+        """Iterate over Zabbix hosts in batches ordered by ascending hostid
+        
+        Only the hostid list is fetched up front; host details are requested
+        one page at a time so memory stays bounded regardless of fleet size.
+        With zabbix_stream_json enabled a single host.get is decoded
+        incrementally instead and cut into batches as records arrive.
+        Unlike get_hosts, errors are raised instead of ending the iteration
+        early, so callers never mistake a failed page for a smaller fleet.
+        """
+        if page_size is None:
+            page_size = settings.zabbix_host_page_size
+        
+        if not self.auth_token:
+            if not self.authenticate():
+                raise Exception("Authentication failed")
+        
+        if settings.zabbix_stream_json:
+            params = {
+                "output": ["hostid", "host", "name", "status", "available"],
+                "selectInterfaces": ["ip"],
+                "selectGroups": ["name"],
+                "selectTags": ["tag", "value"],
+                "sortfield": "hostid",
+                "sortorder": "ASC"
+            }
+            
+            if filter_params:
+                params.update(filter_params)
+            
+            batch = []
+            for host_data in self.iter_results("host.get", params):
+                # Records come straight from Zabbix, so skip pydantic validation
+                batch.append(ZabbixHost.model_construct(
+                    hostid=host_data["hostid"],
+                    host=host_data["host"],
+                    name=host_data["name"],
+                    status=host_data["status"],
+                    available=host_data["available"]
+                ))
+                if len(batch) >= page_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+            return
+        
+        id_params = {
+            "output": ["hostid"],
+            "sortfield": "hostid",
+            "sortorder": "ASC"
+        }
+        
+        if filter_params:
+            id_params.update(filter_params)
+        
+        hostids = sorted((host["hostid"] for host in self._make_request("host.get", id_params)), key=int)
+        
+        for start in range(0, len(hostids), page_size):
+            params = {
+                "output": ["hostid", "host", "name", "status", "available"],
+                "hostids": hostids[start:start + page_size],
+                "selectInterfaces": ["ip"],
+                "selectGroups": ["name"],
+                "selectTags": ["tag", "value"],
+                "sortfield": "hostid",
+                "sortorder": "ASC"
+            }
+            
+            result = self._make_request("host.get", params)
+            
+            yield [
+                ZabbixHost(
+                    hostid=host_data["hostid"],
+                    host=host_data["host"],
+                    name=host_data["name"],
+                    status=host_data["status"],
+                    available=host_data["available"]
+                )
+                for host_data in result
+            ]
+    
     def get_triggers(self, hostids: List[str] = None, only_active: bool = True) -> List[ZabbixTrigger]:
         """Get triggers from Zabbix"""
         try:
@@ -145,6 +518,34 @@ class ZabbixService:
             logger.error(f"Failed to get triggers: {e}")
             return []
     
+    @staticmethod
+    def _event_params(time_from: datetime = None, time_till: datetime = None,
+                      objectids: List[str] = None, eventids: List[str] = None) -> Dict[str, Any]:
+        """Build event.get params for a time range"""
+        if time_from is None:
+            time_from = datetime.now() - timedelta(hours=24)
+        
+        if time_till is None:
+            time_till = datetime.now()
+        
+        params = {
+            "output": ["eventid", "source", "object", "objectid", "clock", "value", "acknowledged", "name", "severity",
+                       "r_eventid"],
+            "selectHosts": ["hostid"],
+            "time_from": int(time_from.timestamp()),
+            "time_till": int(time_till.timestamp()),
+            "sortfield": "clock",
+            "sortorder": "DESC"
+        }
+        
+        if objectids:
+            params["objectids"] = objectids
+        
+        if eventids:
+            params["eventids"] = eventids
+        
+        return params
+    
     def get_events(self, time_from: datetime = None, time_till: datetime = None, 
                    objectids: List[str] = None) -> List[ZabbixEvent]:
         """Get events from Zabbix"""
@@ -153,23 +554,7 @@ class ZabbixService:
                 if not self.authenticate():
                     raise Exception("Authentication failed")
             
-            if time_from is None:
-                time_from = datetime.now() - timedelta(hours=24)
-            
-            if time_till is None:
-                time_till = datetime.now()
-            
-            params = {
-                "output": ["eventid", "source", "object", "objectid", "clock", "value", "acknowledged", "name"],
-                "time_from": int(time_from.timestamp()),
-                "time_till": int(time_till.timestamp()),
-                "sortfield": "clock",
-                "sortorder": "DESC"
-            }
-            
-            if objectids:
-                params["objectids"] = objectids
-            
+            params = self._event_params(time_from, time_till, objectids)
             result = self._make_request("event.get", params)
             
             events = []
@@ -182,7 +567,10 @@ class ZabbixService:
                     clock=event_data["clock"],
                     value=event_data["value"],
                     acknowledged=event_data["acknowledged"],
-                    name=event_data["name"]
+                    name=event_data["name"],
+                    severity=event_data.get("severity", "0"),
+                    hostid=event_hostid(event_data),
+                    r_eventid=event_data.get("r_eventid")
                 )
                 events.append(event)
             
@@ -192,9 +580,92 @@ class ZabbixService:
             logger.error(f"Failed to get events: {e}")
             return []
     
+    def iter_events(self, time_from: datetime = None, time_till: datetime = None,
+                    objectids: List[str] = None, eventids: List[str] = None) -> Iterator[ZabbixEvent]:
+        """Iterate over events from Zabbix, streaming the response when zabbix_stream_json is enabled
+        
+        Unlike get_events, errors are raised so callers can tell a failed
+        fetch from an empty time range.
+        """
+        if not self.auth_token:
+            if not self.authenticate():
+                raise Exception("Authentication failed")
+        
+        params = self._event_params(time_from, time_till, objectids, eventids)
+        if settings.zabbix_stream_json:
+            records = self.iter_results("event.get", params)
+        else:
+            records = self._make_request("event.get", params)
+        
+        for event_data in records:
+            yield ZabbixEvent.model_construct(
+                eventid=event_data["eventid"],
+                source=event_data["source"],
+                object=event_data["object"],
+                objectid=event_data["objectid"],
+                clock=event_data["clock"],
+                value=event_data["value"],
+                acknowledged=event_data["acknowledged"],
+                name=event_data["name"],
+                severity=event_data.get("severity", "0"),
+                hostid=event_hostid(event_data),
+                r_eventid=event_data.get("r_eventid")
+            )
+    
+    def iter_problems(self) -> Iterator[ZabbixProblem]:
+        """Iterate over currently open trigger problems
+        
+        problem.get only returns unresolved problems, so the result scales
+        with what is open now rather than with event history. Errors are
+        raised so callers can tell a failed fetch from no open problems.
+        """
+        if not self.auth_token:
+            if not self.authenticate():
+                raise Exception("Authentication failed")
+        
+        params = {
+            "output": ["eventid", "objectid", "clock", "name", "severity", "acknowledged"],
+            "source": 0,
+            "object": 0,
+            "sortfield": ["eventid"],
+            "sortorder": "ASC"
+        }
+        if settings.zabbix_stream_json:
+            records = self.iter_results("problem.get", params)
+        else:
+            records = self._make_request("problem.get", params)
+        
+        for problem_data in records:
+            yield ZabbixProblem.model_construct(
+                eventid=problem_data["eventid"],
+                objectid=problem_data["objectid"],
+                clock=problem_data["clock"],
+                name=problem_data["name"],
+                severity=problem_data.get("severity", "0"),
+                acknowledged=problem_data.get("acknowledged", "0")
+            )
+    
+    def get_trigger_hosts(self, triggerids: List[str]) -> Dict[str, str]:
+        """Map trigger IDs to the ID of their first host"""
+        if not triggerids:
+            return {}
+        if not self.auth_token:
+            if not self.authenticate():
+                raise Exception("Authentication failed")
+        
+        result = self._make_request("trigger.get", {
+            "output": ["triggerid"],
+            "triggerids": triggerids,
+            "selectHosts": ["hostid"]
+        })
+        return {
+            trigger_data["triggerid"]: trigger_data["hosts"][0]["hostid"]
+            for trigger_data in result if trigger_data.get("hosts")
+        }
+    
     def get_host_metrics(self, hostid: str, item_keys: List[str] = None, 
                         time_from: datetime = None, time_till: datetime = None) -> List[Dict[str, Any]]:
-        """Get metrics for a specific host"""
+        """Get per-item time series for a specific host"""
         try:
             if not self.auth_token:
                 if not self.authenticate():
@@ -208,39 +679,57 @@ class ZabbixService:
             
             # First get items
             item_params = {
-                "output": ["itemid", "name", "key_", "value_type"],
+                "output": ["itemid", "name", "key_", "value_type", "units"],
                 "hostids": [hostid],
                 "sortfield": "name"
             }
             
             if item_keys:
                 item_params["search"] = {"key_": item_keys}
+                item_params["searchByAny"] = True
             
             items = self._make_request("item.get", item_params)
             
             if not items:
                 return []
             
-            # Get history for items
-            itemids = [item["itemid"] for item in items]
-            history_params = {
-                "output": "extend",
-                "itemids": itemids,
-                "time_from": int(time_from.timestamp()),
-                "time_till": int(time_till.timestamp()),
-                "sortfield": "clock",
-                "sortorder": "DESC",
-                "limit": 100
-            }
-            
-            history = self._make_request("item.get", history_params)
+            # Fetch history/trends for each value_type and itemid chunk in parallel
+            requests_plan = build_metric_requests(items, time_from, time_till)
+            with ThreadPoolExecutor(max_workers=settings.zabbix_max_concurrency) as executor:
+                results = list(executor.map(
+                    lambda planned: self._make_request(planned["method"], planned["params"]),
+                    requests_plan
+                ))
             
-            return history
+            return build_metric_series(items, requests_plan, results)
         
         except Exception as e:
             logger.error(f"Failed to get host metrics: {e}")
             return []
     
+    def iter_item_values(self, hostids: List[str] = None) -> Iterator[Dict[str, Any]]:
+        """Iterate over the latest values of monitored numeric items
+        
+        Errors are raised so a failed fetch is not mistaken for no new values.
+        """
+        if not self.auth_token:
+            if not self.authenticate():
+                raise Exception("Authentication failed")
+        
+        params = {
+            "output": ["itemid", "hostid", "key_", "units", "value_type", "lastvalue", "lastclock"],
+            "monitored": True,
+            "filter": {"value_type": [int(value_type) for value_type in NUMERIC_VALUE_TYPES]}
+        }
+        
+        if hostids:
+            params["hostids"] = hostids
+        
+        if settings.zabbix_stream_json:
+            yield from self.iter_results("item.get", params)
+        else:
+            yield from self._make_request("item.get", params)
+    
     def acknowledge_event(self, eventid: str, message: str = "") -> bool:
         """Acknowledge an event in Zabbix"""
         try:
@@ -287,10 +776,32 @@ class ZabbixService:
             logger.error(f"Failed to get host status: {e}")
             return {}
     
+    def get_request_stats(self) -> Dict[str, int]:
+        """Get counters of issued and coalesced read calls"""
+        return self._inflight.stats()
+    
+    def get_resilience_stats(self) -> Dict[str, Any]:
+        """Get circuit breaker state and retry counters"""
+        with self._counter_lock:
+            return {
+                "breaker": self.breaker.stats(),
+                "retries": self.retries,
+                "deadlines_exceeded": self.deadlines_exceeded
+            }
+    
+    def get_auth_stats(self) -> Dict[str, Any]:
+        """Get session reuse counters"""
+        return self.tokens.stats()
+    
     def test_connection(self) -> bool:
         """Test connection to Zabbix API"""
         try:
-            return self.authenticate()
+            # Only log in when there is no session yet or Zabbix rejected the current one
+            if not self.auth_token:
+                return self.authenticate()
+            if self.check_authentication():
+                return True
+            return not self.auth_token and self.authenticate()
         except Exception as e:
             logger.error(f"Connection test failed: {e}")
             return False
@@ -0,0 +1,151 @@
+"""
+Key/value cache backends.
+
+Entries are stored with a fresh-until time plus an optional grace period
+during which a stale value may still be served while it is refreshed.
+``LocalCacheBackend`` is a bounded in-process LRU; ``RedisCacheBackend``
+shares entries between workers through ``settings.redis_url``.
+"""
+
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LocalCacheBackend:
+    """Process-local LRU cache with per-entry expiry"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Any, float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Get (value, fresh_until) or None when missing or past its grace period"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, fresh_until, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value, fresh_until
+
+    def set(self, key: str, value: Any, ttl: float, grace: float = 0) -> None:
+        """Store value as fresh for ttl seconds, then stale for grace seconds"""
+        now = time.time()
+        with self._lock:
+            self._entries[key] = (value, now + ttl, now + ttl + grace)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete_prefix(self, prefix: str) -> int:
+        """Delete every key starting with prefix"""
+        with self._lock:
+            keys = [key for key in self._entries if key.startswith(prefix)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get backend counters"""
+        with self._lock:
+            return {
+                "backend": "local",
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+
+class RedisCacheBackend:
+    """Redis cache shared across workers
+
+    Values are pickled, so the Redis instance must only be writable by
+    this application. Connects and reads time out after
+    ``settings.redis_connect_timeout`` / ``settings.redis_socket_timeout``
+    so an unreachable server fails fast instead of hanging callers.
+    """
+
+    def __init__(self, redis_url: str, namespace: str):
+        import redis
+
+        self.client = redis.Redis.from_url(
+            redis_url,
+            socket_connect_timeout=settings.redis_connect_timeout,
+            socket_timeout=settings.redis_socket_timeout
+        )
+        self.namespace = namespace
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Get (value, fresh_until) or None when missing or past its grace period"""
+        raw = self.client.get(self._key(key))
+        if raw is None:
+            return None
+        return pickle.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: float, grace: float = 0) -> None:
+        """Store value as fresh for ttl seconds, then stale for grace seconds"""
+        fresh_until = time.time() + ttl
+        self.client.set(
+            self._key(key),
+            pickle.dumps((value, fresh_until), protocol=pickle.HIGHEST_PROTOCOL),
+            px=max(1, int((ttl + grace) * 1000))
+        )
+
+    def delete_prefix(self, prefix: str) -> int:
+        """Delete every key starting with prefix"""
+        deleted = 0
+        batch = []
+        for key in self.client.scan_iter(match=self._key(prefix) + "*", count=500):
+            batch.append(key)
+            if len(batch) >= 500:
+                deleted += self.client.delete(*batch)
+                batch = []
+        if batch:
+            deleted += self.client.delete(*batch)
+        return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        """Get backend counters"""
+        try:
+            evictions = self.client.info("stats").get("evicted_keys", 0)
+        except Exception as e:
+            logger.warning(f"Failed to read Redis stats: {e}")
+            evictions = None
+        return {
+            "backend": "redis",
+            "namespace": self.namespace,
+            "evictions": evictions  # server-wide, not only this namespace
+        }
+
+
+def create_cache_backend(backend: str, namespace: str, max_entries: int = 1024):
+    """Create a cache backend by name, falling back to the local one if Redis is unavailable"""
+    if backend == "redis":
+        try:
+            redis_backend = RedisCacheBackend(settings.redis_url, namespace)
+            redis_backend.client.ping()
+            return redis_backend
+        except Exception as e:
+            logger.warning(f"Redis cache unavailable, using local cache for {namespace}: {e}")
+
+    return LocalCacheBackend(max_entries=max_entries)
@@ -0,0 +1,120 @@
+"""
+Incremental decoding of JSON-RPC ``result`` arrays.
+
+``iter_result_items`` consumes a response body chunk by chunk and yields the
+elements of its ``result`` array one at a time, so a large ``host.get`` or
+``event.get`` response is never held in memory as a whole. Each element is
+decoded with the C-accelerated stdlib scanner as soon as it is complete.
+Whole documents are decoded with orjson when it is installed.
+
+Bodies that are not a ``{"jsonrpc": "2.0", "result": [...]`` response, such
+as JSON-RPC errors, are decoded in full and raised as ``JsonRpcError``.
+"""
+
+import codecs
+import json
+import re
+from typing import Any, Iterable, Iterator
+
+try:
+    import orjson
+except ImportError:  # optional fast path
+    orjson = None
+
+# Zabbix always serializes "jsonrpc" before "result"
+_RESULT_ARRAY_HEADER = re.compile(rb'\s*\{\s*"jsonrpc"\s*:\s*"2\.0"\s*,\s*"result"\s*:\s*\[')
+_HEADER_PEEK_BYTES = 64
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+_NUMBER_CHARS = "0123456789+-.eE"
+
+
+class JsonRpcError(Exception):
+    """JSON-RPC response that carried an error instead of a result array"""
+
+    def __init__(self, error: Any):
+        super().__init__(f"Zabbix API error: {error}")
+        self.error = error
+
+
+def loads(data: bytes) -> Any:
+    """Decode a complete JSON document, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _iter_array_stdlib(chunks: Iterator[bytes]) -> Iterator[Any]:
+    """Yield array elements from chunks positioned just after the opening bracket"""
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    pos = 0
+    exhausted = False
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE + ",":
+            pos += 1
+
+        if pos < len(buffer) and buffer[pos] == "]":
+            return
+
+        if pos < len(buffer):
+            try:
+                item, end = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if exhausted:
+                    raise
+            else:
+                # A number running to the end of the buffer may still be
+                # incomplete ("1" of "12", "1." of "1.5", "1e" of "1e3")
+                incomplete = (
+                    isinstance(item, (int, float)) and not isinstance(item, bool)
+                    and not buffer[end:].lstrip(_NUMBER_CHARS)
+                )
+                if not incomplete or exhausted:
+                    yield item
+                    pos = end
+                    continue
+
+        if exhausted:
+            raise ValueError("Unterminated result array in JSON-RPC response")
+
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+            buffer = buffer[pos:] + text_decoder.decode(b"", final=True)
+        else:
+            buffer = buffer[pos:] + text_decoder.decode(chunk)
+        pos = 0
+
+
+def iter_result_items(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """Yield the elements of a JSON-RPC response's result array as they arrive"""
+    chunks = iter(chunks)
+
+    head = b""
+    while len(head) < _HEADER_PEEK_BYTES:
+        chunk = next(chunks, None)
+        if chunk is None:
+            break
+        head += chunk
+
+    match = _RESULT_ARRAY_HEADER.match(head)
+    if match is None:
+        # Error responses and unexpected layouts are small enough to decode whole
+        document = loads(head + b"".join(chunks))
+        if "error" in document:
+            raise JsonRpcError(document["error"])
+        result = document.get("result", [])
+        yield from (result if isinstance(result, list) else [result])
+        return
+
+    yield from _iter_array_stdlib(_prepend(head[match.end():], chunks))
+
+
+def _prepend(first: bytes, chunks: Iterator[bytes]) -> Iterator[bytes]:
+    if first:
+        yield first
+    yield from chunks
+
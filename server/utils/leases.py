@@ -0,0 +1,152 @@
+"""
+Named, non-blocking mutual exclusion across threads, processes and hosts.
+
+A lease is taken with ``acquire(name)`` and returned with ``release(name)``.
+``LocalLeases`` only excludes threads of one process. ``DatabaseLeases`` uses
+PostgreSQL session-level advisory locks, held on a dedicated connection for
+as long as the lease is held. ``RedisLeases`` stores a token with a TTL and
+renews it from a heartbeat thread until release, so a crashed holder loses
+its lease after ``ttl`` seconds.
+"""
+
+import hashlib
+import logging
+import threading
+import uuid
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class LocalLeases:
+    """Per-process leases backed by threading locks"""
+
+    backend = "local"
+
+    def __init__(self):
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def _lock(self, name: str) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def acquire(self, name: str) -> bool:
+        return self._lock(name).acquire(blocking=False)
+
+    def release(self, name: str) -> None:
+        lock = self._lock(name)
+        if lock.locked():
+            lock.release()
+
+
+def advisory_key(name: str) -> int:
+    """Stable signed 64-bit advisory lock key for a lease name"""
+    return int.from_bytes(hashlib.sha1(name.encode()).digest()[:8], "big", signed=True)
+
+
+class DatabaseLeases:
+    """PostgreSQL advisory-lock leases shared by every process using the database"""
+
+    backend = "database"
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._held: Dict[str, object] = {}
+        self._guard = threading.Lock()
+
+    def acquire(self, name: str) -> bool:
+        connection = self.engine.connect()
+        try:
+            acquired = connection.exec_driver_sql(
+                "SELECT pg_try_advisory_lock(%(key)s)", {"key": advisory_key(name)}
+            ).scalar()
+            # Session-level lock: end the transaction so the held connection is not idle in one
+            connection.commit()
+        except Exception:
+            connection.close()
+            raise
+        if not acquired:
+            connection.close()
+            return False
+        with self._guard:
+            self._held[name] = connection
+        return True
+
+    def release(self, name: str) -> None:
+        with self._guard:
+            connection = self._held.pop(name, None)
+        if connection is None:
+            return
+        try:
+            connection.exec_driver_sql("SELECT pg_advisory_unlock(%(key)s)", {"key": advisory_key(name)})
+            connection.commit()
+        except Exception as e:
+            logger.warning(f"Failed to release advisory lock {name}: {e}")
+        finally:
+            # Closing the session also drops the lock if the unlock failed
+            connection.close()
+
+
+# Delete or extend the key only while it still holds our token
+_RELEASE_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+_RENEW_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('pexpire', KEYS[1], ARGV[2]) else return 0 end"
+
+
+class RedisLeases:
+    """Redis leases with a TTL, renewed while held"""
+
+    backend = "redis"
+
+    def __init__(self, client, ttl: float = 600, namespace: str = "lease"):
+        self.client = client
+        self.ttl_ms = int(ttl * 1000)
+        self.namespace = namespace
+        self._held: Dict[str, Tuple[str, threading.Event]] = {}
+        self._guard = threading.Lock()
+
+    def _key(self, name: str) -> str:
+        return f"{self.namespace}:{name}"
+
+    def acquire(self, name: str) -> bool:
+        token = uuid.uuid4().hex
+        if not self.client.set(self._key(name), token, nx=True, px=self.ttl_ms):
+            return False
+        stop = threading.Event()
+        with self._guard:
+            self._held[name] = (token, stop)
+        threading.Thread(target=self._renew, args=(name, token, stop), name=f"lease-{name}", daemon=True).start()
+        return True
+
+    def _renew(self, name: str, token: str, stop: threading.Event) -> None:
+        while not stop.wait(self.ttl_ms / 3000):
+            try:
+                if not self.client.eval(_RENEW_SCRIPT, 1, self._key(name), token, self.ttl_ms):
+                    logger.warning(f"Lost Redis lease {name}")
+                    return
+            except Exception as e:
+                logger.warning(f"Failed to renew Redis lease {name}: {e}")
+
+    def release(self, name: str) -> None:
+        with self._guard:
+            held = self._held.pop(name, None)
+        if held is None:
+            return
+        token, stop = held
+        stop.set()
+        try:
+            self.client.eval(_RELEASE_SCRIPT, 1, self._key(name), token)
+        except Exception as e:
+            logger.warning(f"Failed to release Redis lease {name}: {e}")
+
+
+def create_leases(backend: str, engine=None, redis_url: Optional[str] = None, ttl: float = 600):
+    """Build the lease backend named by settings ("auto", "database", "redis" or "local")"""
+    if backend == "auto":
+        backend = "database" if engine is not None and engine.dialect.name == "postgresql" else "local"
+    if backend == "database":
+        return DatabaseLeases(engine)
+    if backend == "redis":
+        import redis
+        return RedisLeases(redis.Redis.from_url(redis_url), ttl=ttl, namespace="zabbix-monitor:lease")
+    return LocalLeases()
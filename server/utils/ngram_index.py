@@ -0,0 +1,243 @@
+"""
+In-process trigram index for ranked substring, fuzzy and prefix search.
+
+Every document is a few short text fields. Each field value, and each
+word in it, is lowercased, padded like pg_trgm does (two spaces before, one
+after) and split into trigrams; a posting set per trigram names the
+documents containing it.
+
+- A substring query intersects the postings of its own trigrams, smallest
+  first, and verifies the few survivors.
+- When nothing contains the term, a fuzzy query scores candidates by
+  trigram similarity (shared / total trigrams) to the whole value or its
+  closest word. Any document reaching the threshold must contain one of
+  the query's rarest trigrams, so only those postings are read.
+- Prefix completion bisects a sorted list of field values.
+
+Unselective queries are capped at ``max_candidates`` documents, preferring
+those with the shortest values (substring) or the most shared trigrams
+(fuzzy), so a lookup stays bounded on large fleets.
+"""
+
+import bisect
+import heapq
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+WORD = re.compile(r"[^\W_]+")
+
+
+def trigrams(value: str, padded: bool = True) -> Set[str]:
+    """Trigrams of a lowercased value; padded ones also mark its start and end"""
+    if padded:
+        value = f"  {value} "
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+
+def similarity(left: Set[str], right: Set[str]) -> float:
+    """Shared trigrams over all trigrams, as pg_trgm's similarity()"""
+    if not left or not right:
+        return 0.0
+    shared = len(left & right)
+    return shared / (len(left) + len(right) - shared)
+
+
+def value_trigrams(value: str) -> Set[str]:
+    """Trigrams indexed for a value: of the whole value and of each word in it"""
+    grams = trigrams(value)
+    for word in WORD.findall(value):
+        grams |= trigrams(word)
+    return grams
+
+
+def fuzzy_score(query: Set[str], value: str) -> float:
+    """Similarity of query trigrams to a value or its closest word"""
+    return max([similarity(query, trigrams(value))] +
+               [similarity(query, trigrams(word)) for word in WORD.findall(value)])
+
+
+def match_score(term: str, value: str) -> float:
+    """Rank of a substring match: exact > prefix > infix, closer lengths first"""
+    if value == term:
+        return 1.0
+    coverage = len(term) / len(value)
+    if value.startswith(term):
+        return 0.75 + 0.25 * coverage
+    return 0.5 + 0.25 * coverage
+
+
+class NgramIndex:
+    """Trigram index over named text fields of integer-keyed documents"""
+
+    def __init__(self, fields: Sequence[str], weights: Dict[str, float] = None,
+                 prefix_fields: Sequence[str] = None, max_candidates: int = 1000):
+        self.fields = tuple(fields)
+        self.weights = tuple((weights or {}).get(field, 1.0) for field in self.fields)
+        self.prefix_fields = tuple(prefix_fields if prefix_fields is not None else self.fields)
+        self.max_candidates = max_candidates
+        self._lock = threading.RLock()
+        self._values: Dict[int, Tuple[str, ...]] = {}  # lowercased, "" when missing
+        self._display: Dict[int, Tuple[str, ...]] = {}  # as stored, for completions
+        self._lengths: Dict[int, int] = {}  # shortest non-empty value, for capping
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        self._prefixes: List[Tuple[str, int, int]] = []  # (value, field position, doc id), sorted
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def _field_positions(self, fields: Optional[Iterable[str]]) -> Tuple[int, ...]:
+        if fields is None:
+            return tuple(range(len(self.fields)))
+        return tuple(self.fields.index(field) for field in fields)
+
+    def add(self, doc_id: int, values: Dict[str, Optional[str]]) -> None:
+        """Index a document, replacing any previous version of it"""
+        with self._lock:
+            self._add(doc_id, values, bisect.insort)
+
+    def load(self, documents: Iterable[Tuple[int, Dict[str, Optional[str]]]]) -> None:
+        """Index many (doc id, values) pairs, sorting prefix entries once at the end"""
+        with self._lock:
+            for doc_id, values in documents:
+                self._add(doc_id, values, list.append)
+            self._prefixes.sort()
+
+    def _add(self, doc_id: int, values: Dict[str, Optional[str]], insert) -> None:
+        display = tuple(values.get(field) or "" for field in self.fields)
+        lowered = tuple(value.lower() for value in display)
+        if self._values.get(doc_id) == lowered:
+            self._display[doc_id] = display
+            return
+        self._remove(doc_id)
+        self._values[doc_id] = lowered
+        self._display[doc_id] = display
+        self._lengths[doc_id] = min((len(value) for value in lowered if value), default=0)
+        for gram in set().union(*(value_trigrams(value) for value in lowered if value)):
+            self._postings[gram].add(doc_id)
+        for position, field in enumerate(self.fields):
+            if field in self.prefix_fields and lowered[position]:
+                insert(self._prefixes, (lowered[position], position, doc_id))
+
+    def remove(self, doc_id: int) -> None:
+        """Drop a document from the index"""
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id: int) -> None:
+        lowered = self._values.pop(doc_id, None)
+        if lowered is None:
+            return
+        self._display.pop(doc_id, None)
+        self._lengths.pop(doc_id, None)
+        for gram in set().union(*(value_trigrams(value) for value in lowered if value)):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(doc_id)
+                if not posting:
+                    del self._postings[gram]
+        for position, value in enumerate(lowered):
+            entry = (value, position, doc_id)
+            at = bisect.bisect_left(self._prefixes, entry)
+            if at < len(self._prefixes) and self._prefixes[at] == entry:
+                del self._prefixes[at]
+
+    def _cap(self, candidates: Set[int]) -> Iterable[int]:
+        if len(candidates) <= self.max_candidates:
+            return candidates
+        return heapq.nsmallest(self.max_candidates, candidates, key=self._lengths.__getitem__)
+
+    def _prefix_candidates(self, prefix: str, positions: Tuple[int, ...]) -> Set[int]:
+        candidates = set()
+        at = bisect.bisect_left(self._prefixes, (prefix,))
+        while at < len(self._prefixes) and len(candidates) < self.max_candidates:
+            value, position, doc_id = self._prefixes[at]
+            if not value.startswith(prefix):
+                break
+            if position in positions:
+                candidates.add(doc_id)
+            at += 1
+        return candidates
+
+    def search(self, term: str, limit: int, fields: Iterable[str] = None,
+               fuzzy: bool = True, threshold: float = 0.3) -> List[Tuple[int, float]]:
+        """Get up to limit (doc id, score) pairs, best first
+
+        Substring matches score from 0.5 (infix) to 1.0 (exact). Without
+        any, fuzzy matches score half their trigram similarity. Terms
+        shorter than a trigram match field prefixes only.
+        """
+        term = term.strip().lower()
+        if not term:
+            return []
+        positions = self._field_positions(fields)
+        scores: Dict[int, float] = {}
+
+        with self._lock:
+            grams = trigrams(term, padded=False)
+            if grams:
+                postings = sorted((self._postings.get(gram, set()) for gram in grams), key=len)
+                candidates = set.intersection(*postings) if postings[0] else set()
+            else:
+                candidates = self._prefix_candidates(term, positions)
+
+            for doc_id in self._cap(candidates):
+                values = self._values[doc_id]
+                best = max(
+                    (match_score(term, values[position]) * self.weights[position]
+                     for position in positions if term in values[position]),
+                    default=0.0
+                )
+                if best:
+                    scores[doc_id] = best
+
+            if fuzzy and not scores:
+                query = trigrams(term)
+                # similarity >= threshold needs at least this many shared trigrams
+                required = max(1, math.ceil(threshold * len(query)))
+                rarest = sorted(query, key=lambda gram: len(self._postings.get(gram, ())))
+                shared = Counter()
+                for gram in rarest[:len(query) - required + 1]:
+                    shared.update(self._postings.get(gram, ()))
+                # Candidates sharing the most trigrams come first; score only enough of them
+                for doc_id, _ in shared.most_common(min(self.max_candidates, limit * 20)):
+                    values = self._values[doc_id]
+                    best = max(
+                        (fuzzy_score(query, values[position]) * self.weights[position]
+                         for position in positions if values[position]),
+                        default=0.0
+                    )
+                    if best >= threshold:
+                        scores[doc_id] = best / 2
+
+        return heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+
+    def complete(self, prefix: str, limit: int) -> List[Dict[str, str]]:
+        """Get up to limit distinct field values starting with prefix, in order"""
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+        suggestions = []
+        seen = set()
+        with self._lock:
+            at = bisect.bisect_left(self._prefixes, (prefix,))
+            while at < len(self._prefixes) and len(suggestions) < limit:
+                value, position, doc_id = self._prefixes[at]
+                if not value.startswith(prefix):
+                    break
+                if value not in seen:
+                    seen.add(value)
+                    suggestions.append({"value": self._display[doc_id][position], "field": self.fields[position]})
+                at += 1
+        return suggestions
+
+    def stats(self) -> Dict[str, int]:
+        """Get document, trigram and prefix entry counts"""
+        with self._lock:
+            return {
+                "documents": len(self._values),
+                "trigrams": len(self._postings),
+                "prefix_entries": len(self._prefixes)
+            }
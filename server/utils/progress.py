@@ -0,0 +1,33 @@
+"""
+Progress reporting from long-running work to whoever started it.
+
+Code doing the work calls ``report_progress(**counts)`` at convenient points;
+it is a no-op unless the caller installed a sink with ``progress_sink``. The
+sink is held in a context variable, so concurrent jobs in different threads
+report to their own sinks.
+"""
+
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+ProgressSink = Callable[[Dict[str, Any]], None]
+
+_sink: contextvars.ContextVar[Optional[ProgressSink]] = contextvars.ContextVar("progress_sink", default=None)
+
+
+def report_progress(**counts: Any) -> None:
+    """Send progress counts to the current sink, if any"""
+    sink = _sink.get()
+    if sink is not None:
+        sink(counts)
+
+
+@contextmanager
+def progress_sink(sink: ProgressSink) -> Iterator[None]:
+    """Route report_progress calls made inside the block to sink"""
+    token = _sink.set(sink)
+    try:
+        yield
+    finally:
+        _sink.reset(token)
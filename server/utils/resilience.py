@@ -0,0 +1,153 @@
+"""
+Failure handling primitives for calls to external services.
+
+``CircuitBreaker`` fails fast after consecutive failures and lets a single
+trial call through once its reset timeout has passed. ``RetryPolicy``
+computes full-jitter exponential backoff. ``Deadline`` bounds the total
+time spent on a call across retries; ``deadline_scope`` applies a tighter
+deadline to every call made inside a block.
+"""
+
+import contextvars
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a service whose circuit is open"""
+
+
+class DeadlineExceeded(Exception):
+    """Raised when no time is left to make or retry a call"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker (closed -> open -> half_open -> closed)"""
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.times_opened = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == "open" and time.monotonic() >= self._opened_at + self.reset_timeout:
+                return "half_open"
+            return self._state
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == "open"
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may be made now"""
+        with self._lock:
+            if self._state == "open":
+                if time.monotonic() < self._opened_at + self.reset_timeout:
+                    self.rejected += 1
+                    raise CircuitOpenError(f"{self.name} circuit is open")
+                self._state = "half_open"
+                self._trial_in_flight = False
+
+            if self._state == "half_open":
+                if self._trial_in_flight:
+                    self.rejected += 1
+                    raise CircuitOpenError(f"{self.name} circuit is half-open, trial call in progress")
+                self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = "closed"
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def abandon_call(self) -> None:
+        """Forget a call that ended without an outcome (e.g. cancelled), freeing the trial slot"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self, error: Any = None) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if error is not None:
+                self.last_error = str(error)
+            if self._state == "half_open" or self._failures >= self.failure_threshold:
+                if self._state != "open":
+                    self.times_opened += 1
+                self._state = "open"
+                self._opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        state = self.state
+        with self._lock:
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected,
+                "last_error": self.last_error
+            }
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter"""
+
+    def __init__(self, attempts: int = 3, base_delay: float = 0.5, max_delay: float = 5.0):
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait after the given failed attempt (1-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+
+class Deadline:
+    """Absolute point in time after which no more work should start"""
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def earliest(self, other: Optional["Deadline"]) -> "Deadline":
+        if other is not None and other.expires_at < self.expires_at:
+            return other
+        return self
+
+
+_scoped_deadline: contextvars.ContextVar = contextvars.ContextVar("scoped_deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Get the deadline set by the innermost deadline_scope, if any"""
+    return _scoped_deadline.get()
+
+
+@contextmanager
+def deadline_scope(seconds: float) -> Iterator[Deadline]:
+    """Bound every call made inside the block to a shared deadline"""
+    deadline = Deadline(seconds).earliest(current_deadline())
+    token = _scoped_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _scoped_deadline.reset(token)
@@ -0,0 +1,197 @@
+"""
+Fixed-size in-memory history of recent samples for many time series.
+
+``SeriesRingBuffer`` keeps the last ``slots`` samples of every
+(equipment_id, metric_name) series in two preallocated NumPy matrices, one
+row per series. Appending a batch and computing window aggregates (mean,
+p95, rate) are vectorized over all series at once, so reading current
+metrics for the whole fleet costs no database or Zabbix round trip.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+SeriesKey = Tuple[Hashable, str]
+
+
+class SeriesRingBuffer:
+    """Preallocated ring buffers of (timestamp, value) samples, one row per series"""
+
+    def __init__(self, slots: int = 16, initial_series: int = 1024):
+        self.slots = max(2, slots)
+        self._lock = threading.Lock()
+        self._index: Dict[SeriesKey, int] = {}
+        self._keys: List[SeriesKey] = []
+        self._by_owner: Dict[Hashable, List[int]] = {}
+        self._by_metric: Dict[str, List[int]] = {}
+        self._allocate(initial_series)
+        self.samples_appended = 0
+
+    def _allocate(self, rows: int) -> None:
+        self.values = np.full((rows, self.slots), np.nan, dtype=np.float64)
+        self.times = np.zeros((rows, self.slots), dtype=np.int64)
+        self.heads = np.zeros(rows, dtype=np.int64)  # total samples written per series
+
+    def _grow(self, needed: int) -> None:
+        rows = len(self.heads)
+        if needed <= rows:
+            return
+        new_rows = max(needed, rows * 2)
+        values, times, heads = self.values, self.times, self.heads
+        self._allocate(new_rows)
+        self.values[:rows] = values
+        self.times[:rows] = times
+        self.heads[:rows] = heads
+
+    def _row(self, key: SeriesKey) -> int:
+        row = self._index.get(key)
+        if row is None:
+            row = len(self._keys)
+            self._grow(row + 1)
+            self._index[key] = row
+            self._keys.append(key)
+            self._by_owner.setdefault(key[0], []).append(row)
+            self._by_metric.setdefault(key[1], []).append(row)
+        return row
+
+    def append_many(self, owners: Sequence[Hashable], metrics: Sequence[str],
+                    clocks: Sequence[int], values: Sequence[float]) -> None:
+        """Append one batch of samples; a series may appear several times, in time order"""
+        if not len(values):
+            return
+        with self._lock:
+            rows = np.fromiter((self._row(key) for key in zip(owners, metrics)), dtype=np.int64, count=len(values))
+            clocks = np.asarray(clocks, dtype=np.int64)
+            values = np.asarray(values, dtype=np.float64)
+
+            # Rank each sample among the batch's samples for the same series
+            order = np.argsort(rows, kind="stable")
+            sorted_rows = rows[order]
+            boundaries = np.flatnonzero(np.diff(sorted_rows)) + 1
+            starts = np.concatenate(([0], boundaries))
+            sizes = np.diff(np.concatenate((starts, [len(sorted_rows)])))
+            ranks = np.arange(len(sorted_rows)) - np.repeat(starts, sizes)
+            series_rows = sorted_rows[starts]
+
+            # Only the newest `slots` samples of a series can survive the batch
+            keep = ranks >= np.repeat(sizes, sizes) - self.slots
+            order, sorted_rows, ranks = order[keep], sorted_rows[keep], ranks[keep]
+
+            positions = (self.heads[sorted_rows] + ranks) % self.slots
+            self.values[sorted_rows, positions] = values[order]
+            self.times[sorted_rows, positions] = clocks[order]
+            self.heads[series_rows] += sizes
+            self.samples_appended += len(values)
+
+    def _window(self, rows: List[int], window: float, now: Optional[float]) -> Dict[str, np.ndarray]:
+        """Vectorized aggregates over samples newer than now - window for the given rows"""
+        rows = np.asarray(rows, dtype=np.int64)
+        cutoff = (time.time() if now is None else now) - window
+        times = self.times[rows]
+        values = self.values[rows]
+        mask = (times >= cutoff) & ~np.isnan(values)
+        counts = mask.sum(axis=1)
+
+        valid = counts > 0
+        rows, times, values, mask, counts = rows[valid], times[valid], values[valid], mask[valid], counts[valid]
+        windowed = np.where(mask, values, np.nan)
+
+        masked_times = np.where(mask, times, np.iinfo(np.int64).max)
+        first = masked_times.argmin(axis=1)
+        last = np.where(mask, times, np.iinfo(np.int64).min).argmax(axis=1)
+        index = np.arange(len(rows))
+        first_time, last_time = times[index, first], times[index, last]
+        elapsed = (last_time - first_time).astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rate = np.where(elapsed > 0, (values[index, last] - values[index, first]) / elapsed, np.nan)
+
+        # NaNs sort last, so each row's valid samples are its first `counts` columns;
+        # p95 interpolates linearly between closest ranks like np.percentile
+        ordered = np.sort(windowed, axis=1)
+        rank = 0.95 * (counts - 1)
+        lower = np.floor(rank).astype(np.int64)
+        upper = np.minimum(lower + 1, counts - 1)
+        fraction = rank - lower
+        p95 = ordered[index, lower] + (ordered[index, upper] - ordered[index, lower]) * fraction
+
+        return {
+            "rows": rows,
+            "count": counts,
+            "mean": np.where(mask, values, 0.0).sum(axis=1) / counts,
+            "p95": p95,
+            "min": ordered[index, 0],
+            "max": ordered[index, counts - 1],
+            "last": values[index, last],
+            "last_clock": last_time,
+            "rate": rate
+        }
+
+    def aggregate(self, metric: str, window: float, now: Optional[float] = None) -> Dict[Hashable, Dict[str, float]]:
+        """Get window aggregates of one metric for every owner that has recent samples"""
+        with self._lock:
+            rows = self._by_metric.get(metric)
+            if not rows:
+                return {}
+            result = self._window(rows, window, now)
+            owners = [self._keys[row][0] for row in result["rows"]]
+        return {owner: self._point(result, position) for position, owner in enumerate(owners)}
+
+    def summary(self, owner: Hashable, window: float, now: Optional[float] = None) -> Dict[str, Dict[str, float]]:
+        """Get window aggregates of every metric of one owner"""
+        with self._lock:
+            rows = self._by_owner.get(owner)
+            if not rows:
+                return {}
+            result = self._window(rows, window, now)
+            metrics = [self._keys[row][1] for row in result["rows"]]
+        return {metric: self._point(result, position) for position, metric in enumerate(metrics)}
+
+    def fleet_summary(self, window: float, now: Optional[float] = None) -> Dict[str, Dict[str, float]]:
+        """Get, per metric, aggregates over all recent samples of all owners"""
+        with self._lock:
+            metrics = list(self._by_metric.items())
+            cutoff = (time.time() if now is None else now) - window
+            summary = {}
+            for metric, rows in metrics:
+                rows = np.asarray(rows, dtype=np.int64)
+                values = self.values[rows]
+                mask = (self.times[rows] >= cutoff) & ~np.isnan(values)
+                samples = values[mask]
+                if not samples.size:
+                    continue
+                summary[metric] = {
+                    "series": int(mask.any(axis=1).sum()),
+                    "samples": int(samples.size),
+                    "mean": float(samples.mean()),
+                    "p95": float(np.percentile(samples, 95)),
+                    "max": float(samples.max())
+                }
+        return summary
+
+    @staticmethod
+    def _point(result: Dict[str, np.ndarray], position: int) -> Dict[str, Any]:
+        rate = result["rate"][position]
+        return {
+            "count": int(result["count"][position]),
+            "mean": float(result["mean"][position]),
+            "p95": float(result["p95"][position]),
+            "min": float(result["min"][position]),
+            "max": float(result["max"][position]),
+            "last": float(result["last"][position]),
+            "last_clock": int(result["last_clock"][position]),
+            "rate": None if np.isnan(rate) else float(rate)
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Get series count, capacity and memory footprint"""
+        with self._lock:
+            return {
+                "series": len(self._keys),
+                "capacity": len(self.heads),
+                "slots": self.slots,
+                "samples_appended": self.samples_appended,
+                "bytes": int(self.values.nbytes + self.times.nbytes + self.heads.nbytes)
+            }
@@ -0,0 +1,111 @@
+"""
+Coalescing of identical in-flight calls.
+
+The first caller for a key runs the call; callers that arrive while it is
+still running wait for it and receive the same result (or the same
+exception). Results are shared between callers and must not be mutated.
+"""
+
+import asyncio
+import json
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+def request_key(method: str, params: Dict[str, Any] = None) -> str:
+    """Build a canonical key for a JSON-RPC method and its params"""
+    return method + ":" + json.dumps(params or {}, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Thread-based single-flight group"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.issued = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run fn for key, or wait for the call already running for key"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.issued += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        """Get issued/coalesced counters"""
+        with self._lock:
+            return {
+                "issued": self.issued,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls)
+            }
+
+
+class AsyncSingleFlight:
+    """asyncio-based single-flight group"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.issued = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await fn() for key, or wait for the call already running for key"""
+        task = self._calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self.issued += 1
+            task.add_done_callback(lambda t: self._forget(key, t))
+
+        # Shielded so a cancelled caller does not cancel the call for the others
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved when every waiter went away
+
+    def stats(self) -> Dict[str, int]:
+        """Get issued/coalesced counters"""
+        return {
+            "issued": self.issued,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls)
+        }
@@ -0,0 +1,35 @@
+"""
+Dialect-specific ``INSERT ... ON CONFLICT`` support.
+
+PostgreSQL and SQLite both implement ``ON CONFLICT DO UPDATE`` with an
+``excluded`` pseudo-table; ``upsert_insert`` returns the matching insert
+construct, or None so callers can fall back to a slower generic path.
+"""
+
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func
+
+
+def upsert_insert(dialect_name: str) -> Optional[Callable]:
+    """Get the insert() that supports on_conflict_do_update for a dialect"""
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    return None
+
+
+def least_greatest(dialect_name: str) -> Tuple[Any, Any]:
+    """Get the two-argument min/max SQL functions for a dialect"""
+    if dialect_name == "sqlite":
+        return func.min, func.max
+    return func.least, func.greatest
+
+
+def chunked(rows: List[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Split rows into lists of at most size rows"""
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
@@ -0,0 +1,608 @@
+"""
+Local Zabbix JSON-RPC simulator for load and failure testing.
+
+The synthetic fleet is derived arithmetically from a few counts, so 100k
+hosts and millions of events cost no memory until a response is built.
+The simulator can be attached in-process to ``ZabbixService`` (requests
+adapter) or ``AsyncZabbixService`` (httpx transport), or served over HTTP:
+
+    python -m server.utils.zabbix_simulator serve --hosts 100000 --port 8081
+    python -m server.utils.zabbix_simulator bench --hosts 100000 --events 2000000
+
+Latency, JSON-RPC errors, HTTP 5xx responses and session expiry can be
+injected, and every call is counted per method.
+"""
+
+import argparse
+import itertools
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import requests
+from requests.adapters import BaseAdapter
+
+SIMULATOR_URL = "http://zabbix-simulator/api_jsonrpc.php"
+
+SESSION_TERMINATED = {"code": -32602, "message": "Invalid params.", "data": "Session terminated, re-login, please."}
+
+
+@dataclass
+class FleetConfig:
+    hosts: int = 1000
+    triggers_per_host: int = 5
+    items_per_host: int = 10
+    events: int = 100000
+    event_interval: float = 1.0  # seconds between consecutive synthetic events
+    events_end: Optional[int] = None  # clock of the newest event, defaults to now
+    item_interval: int = 60  # seconds between history samples
+    disabled_every: int = 50  # every Nth host is disabled (status 1)
+    seed: int = 42
+
+
+@dataclass
+class FaultConfig:
+    latency: float = 0.0  # seconds added to every call
+    latency_jitter: float = 0.0  # extra uniform random latency
+    method_latency: Dict[str, float] = field(default_factory=dict)
+    error_rate: float = 0.0  # probability of a JSON-RPC error
+    http_error_rate: float = 0.0  # probability of an HTTP 503
+    session_ttl: Optional[float] = None  # sessions expire after this many seconds
+
+
+class SimulatedHttpError(Exception):
+    """Raised by ZabbixSimulator.handle when an HTTP-level failure is injected"""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class ZabbixSimulator:
+    """In-memory implementation of the Zabbix API methods used by this project"""
+
+    def __init__(self, fleet: FleetConfig = None, faults: FaultConfig = None):
+        self.fleet = fleet or FleetConfig()
+        self.faults = faults or FaultConfig()
+        self.events_end = self.fleet.events_end or int(time.time())
+        self._random = random.Random(self.fleet.seed)
+        self._lock = threading.Lock()
+        self.sessions: Dict[str, float] = {}
+        self.acknowledged: Dict[str, List[str]] = {}
+        self.calls: Dict[str, int] = {}
+        self.errors_injected = 0
+        self.bytes_sent = 0
+
+    # -- fleet ---------------------------------------------------------------
+
+    def _hostid(self, index: int) -> str:
+        return str(10001 + index)
+
+    def _host_index(self, hostid: str) -> Optional[int]:
+        index = int(hostid) - 10001
+        return index if 0 <= index < self.fleet.hosts else None
+
+    def _host(self, index: int, params: Dict[str, Any]) -> Dict[str, Any]:
+        host = {
+            "hostid": self._hostid(index),
+            "host": f"host-{index:06d}",
+            "name": f"Host {index:06d}",
+            "status": "1" if self.fleet.disabled_every and index % self.fleet.disabled_every == 0 else "0",
+            "available": "2" if index % 97 == 0 else "1"
+        }
+        host = self._select_output(host, params.get("output"))
+        if "selectInterfaces" in params:
+            host["interfaces"] = [{"ip": f"10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}", "port": "10050", "type": "1"}]
+        if "selectGroups" in params:
+            host["groups"] = [{"name": f"Client {index % 40:02d}"}]
+        if "selectTags" in params:
+            host["tags"] = [{"tag": "site", "value": f"site-{index % 12}"}]
+        if "selectItems" in params:
+            host["items"] = [self._item(index * self.fleet.items_per_host + n, {}) for n in range(self.fleet.items_per_host)]
+        if "selectTriggers" in params:
+            host["triggers"] = [self._trigger(index * self.fleet.triggers_per_host + n, {}) for n in range(self.fleet.triggers_per_host)]
+        return host
+
+    def _trigger_count(self) -> int:
+        return self.fleet.hosts * self.fleet.triggers_per_host
+
+    def _trigger_value(self, index: int) -> str:
+        return "1" if index % 23 == 0 else "0"
+
+    def _trigger(self, index: int, params: Dict[str, Any]) -> Dict[str, Any]:
+        host_index = index // self.fleet.triggers_per_host
+        trigger = {
+            "triggerid": str(20001 + index),
+            "description": f"Problem {index % self.fleet.triggers_per_host} on host-{host_index:06d}",
+            "expression": f"{{{30001 + index}}}>0",
+            "priority": str(index % 6),
+            "value": self._trigger_value(index),
+            "lastchange": str(self.events_end - index % 86400)
+        }
+        trigger = self._select_output(trigger, params.get("output"))
+        if "selectHosts" in params:
+            trigger["hosts"] = [{"hostid": self._hostid(host_index), "name": f"Host {host_index:06d}"}]
+        if "selectItems" in params:
+            trigger["items"] = [{"itemid": str(40001 + index), "name": f"Item {index}"}]
+        return trigger
+
+    def _item(self, index: int, params: Dict[str, Any]) -> Dict[str, Any]:
+        kind = index % self.fleet.items_per_host
+        value_type = "3" if kind % 3 == 1 else "0"
+        item = {
+            "itemid": str(40001 + index),
+            "hostid": self._hostid(index // self.fleet.items_per_host),
+            "name": f"Metric {kind}",
+            "key_": f"metric.{kind}",
+            "value_type": value_type,
+            "units": "%" if value_type == "0" else "bps",
+            "status": "0",
+            "lastvalue": str(self._sample(index, self.events_end)),
+            "lastclock": str(self.events_end)
+        }
+        return self._select_output(item, params.get("output"))
+
+    def _sample(self, item_index: int, clock: int) -> float:
+        return round(50 + 40 * math.sin(clock / 3600.0 + item_index), 4)
+
+    def _event(self, index: int) -> Dict[str, Any]:
+        # Events alternate problem / recovery per trigger, newest event last
+        trigger_index = index % self._trigger_count()
+        problem = (index // self._trigger_count()) % 2 == 0
+        recovery = index + self._trigger_count()
+        return {
+            "eventid": str(index + 1),
+            "source": "0",
+            "object": "0",
+            "objectid": str(20001 + trigger_index),
+            "clock": str(self._event_clock(index)),
+            "value": "1" if problem else "0",
+            "acknowledged": "1" if str(index + 1) in self.acknowledged else "0",
+            "name": f"Problem {trigger_index % self.fleet.triggers_per_host} on host-{trigger_index // self.fleet.triggers_per_host:06d}",
+            "severity": str(trigger_index % 6),
+            "r_eventid": str(recovery + 1) if problem and recovery < self.fleet.events else "0"
+        }
+
+    def _event_clock(self, index: int) -> int:
+        return int(self.events_end - (self.fleet.events - 1 - index) * self.fleet.event_interval)
+
+    def _event_index_range(self, time_from: Optional[int], time_till: Optional[int]) -> Tuple[int, int]:
+        """Half-open index range of events whose clock is within [time_from, time_till]"""
+        interval = self.fleet.event_interval
+        start, stop = 0, self.fleet.events
+        if time_from is not None:
+            start = max(start, math.ceil(self.fleet.events - 1 - (self.events_end - int(time_from)) / interval))
+        if time_till is not None:
+            stop = min(stop, math.floor(self.fleet.events - 1 - (self.events_end - int(time_till)) / interval) + 1)
+        while start < stop and self._event_clock(start) < int(time_from or 0):
+            start += 1
+        return start, max(start, stop)
+
+    @staticmethod
+    def _select_output(record: Dict[str, Any], output: Any) -> Dict[str, Any]:
+        if isinstance(output, list):
+            return {key: record[key] for key in output if key in record}
+        return record
+
+    @staticmethod
+    def _limited(records: Iterator[Dict[str, Any]], params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        limit = params.get("limit")
+        return list(itertools.islice(records, int(limit)) if limit else records)
+
+    # -- API methods ---------------------------------------------------------
+
+    def user_login(self, params: Dict[str, Any], auth: Optional[str]) -> str:
+        token = uuid.uuid4().hex
+        with self._lock:
+            self.sessions[token] = time.time()
+        return token
+
+    def user_logout(self, params: Any, auth: Optional[str]) -> bool:
+        with self._lock:
+            self.sessions.pop(auth, None)
+        return True
+
+    def user_checkAuthentication(self, params: Dict[str, Any], auth: Optional[str]) -> Dict[str, Any]:
+        self._require_session(params.get("sessionid") or params.get("token"))
+        return {"userid": "1", "username": "simulator", "sessionid": params.get("sessionid")}
+
+    def apiinfo_version(self, params: Any, auth: Optional[str]) -> str:
+        return "6.0.0"
+
+    def host_get(self, params: Dict[str, Any], auth: Optional[str]) -> List[Dict[str, Any]]:
+        if params.get("hostids"):
+            indexes = sorted(i for i in (self._host_index(h) for h in params["hostids"]) if i is not None)
+        else:
+            indexes = range(self.fleet.hosts)
+        if params.get("sortorder") == "DESC":
+            indexes = reversed(indexes)
+        return self._limited((self._host(i, params) for i in indexes), params)
+
+    def trigger_get(self, params: Dict[str, Any], auth: Optional[str]) -> List[Dict[str, Any]]:
+        per_host = self.fleet.triggers_per_host
+        if params.get("triggerids"):
+            indexes = sorted(int(t) - 20001 for t in params["triggerids"] if 0 <= int(t) - 20001 < self._trigger_count())
+        elif params.get("hostids"):
+            indexes = (
+                host_index * per_host + n
+                for host_index in sorted(i for i in (self._host_index(h) for h in params["hostids"]) if i is not None)
+                for n in range(per_host)
+            )
+        else:
+            indexes = range(self._trigger_count())
+        if params.get("only_true"):
+            indexes = (i for i in indexes if self._trigger_value(i) == "1")
+        return self._limited((self._trigger(i, params) for i in indexes), params)
+
+    def event_get(self, params: Dict[str, Any], auth: Optional[str]) -> List[Dict[str, Any]]:
+        start, stop = self._event_index_range(params.get("time_from"), params.get("time_till"))
+        if params.get("eventid_from"):
+            start = max(start, int(params["eventid_from"]) - 1)
+        if params.get("eventid_till"):
+            stop = min(stop, int(params["eventid_till"]))
+        indexes = range(start, stop)
+        if params.get("sortorder") == "DESC":
+            indexes = reversed(indexes)
+        events = (self._event(i) for i in indexes)
+        if params.get("objectids"):
+            objectids = set(params["objectids"])
+            events = (event for event in events if event["objectid"] in objectids)
+        if params.get("eventids"):
+            eventids = {str(eventid) for eventid in params["eventids"]}
+            events = (event for event in events if event["eventid"] in eventids)
+        output = params.get("output")
+        events = (self._select_output(event, output) for event in events)
+        if "selectHosts" in params:
+            events = (self._with_event_hosts(event) for event in events)
+        return self._limited(events, params)
+
+    def _open_problem_index(self, trigger_index: int) -> Optional[int]:
+        """Index of the trigger's newest event if that event is an unresolved problem"""
+        triggers = self._trigger_count()
+        if trigger_index >= self.fleet.events:
+            return None
+        index = trigger_index + (self.fleet.events - 1 - trigger_index) // triggers * triggers
+        return index if (index // triggers) % 2 == 0 else None
+
+    def problem_get(self, params: Dict[str, Any], auth: Optional[str]) -> List[Dict[str, Any]]:
+        per_host = self.fleet.triggers_per_host
+        if params.get("objectids"):
+            triggers = sorted(int(t) - 20001 for t in params["objectids"] if 0 <= int(t) - 20001 < self._trigger_count())
+        elif params.get("hostids"):
+            triggers = [
+                host_index * per_host + n
+                for host_index in sorted(i for i in (self._host_index(h) for h in params["hostids"]) if i is not None)
+                for n in range(per_host)
+            ]
+        else:
+            triggers = range(self._trigger_count())
+        indexes = sorted(i for i in (self._open_problem_index(t) for t in triggers) if i is not None)
+        if params.get("eventids"):
+            eventids = {int(e) for e in params["eventids"]}
+            indexes = [i for i in indexes if i + 1 in eventids]
+        if params.get("sortorder") == "DESC":
+            indexes = reversed(indexes)
+        output = params.get("output")
+        problems = (self._select_output(
+            {key: value for key, value in self._event(i).items() if key != "value"}, output
+        ) for i in indexes)
+        return self._limited(problems, params)
+
+    def _with_event_hosts(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        host_index = (int(event["objectid"]) - 20001) // self.fleet.triggers_per_host
+        return {**event, "hosts": [{"hostid": self._hostid(host_index)}]}
+
+    def event_acknowledge(self, params: Dict[str, Any], auth: Optional[str]) -> Dict[str, Any]:
+        with self._lock:
+            for eventid in params.get("eventids", []):
+                self.acknowledged.setdefault(str(eventid), []).append(params.get("message", ""))
+        return {"eventids": [int(e) for e in params.get("eventids", [])]}
+
+    def item_get(self, params: Dict[str, Any], auth: Optional[str]) -> List[Dict[str, Any]]:
+        per_host = self.fleet.items_per_host
+        host_indexes = (
+            [i for i in (self._host_index(h) for h in params["hostids"]) if i is not None]
+            if params.get("hostids") else range(self.fleet.hosts)
+        )
+        items = (self._item(h * per_host + n, params) for h in host_indexes for n in range(per_host))
+        keys = (params.get("search") or {}).get("key_")
+        if keys:
+            keys = [keys] if isinstance(keys, str) else keys
+            items = (item for item in items if any(key in item.get("key_", "") for key in keys))
+        return self._limited(items, params)
+
+    def _item_indexes(self, params: Dict[str, Any]) -> List[int]:
+        return [int(itemid) - 40001 for itemid in params.get("itemids", [])]
+
+    def history_get(self, params: Dict[str, Any], auth: Optional[str]) -> List[Dict[str, Any]]:
+        history = str(params.get("history", 3))
+        time_till = int(params.get("time_till") or self.events_end)
+        time_from = int(params.get("time_from") or time_till - 3600)
+        step = self.fleet.item_interval
+        first = time_from + (-time_from) % step
+        rows = []
+        for index in self._item_indexes(params):
+            if self._item(index, {})["value_type"] != history:
+                continue
+            for clock in range(first, time_till + 1, step):
+                value = self._sample(index, clock)
+                rows.append({
+                    "itemid": str(40001 + index),
+                    "clock": str(clock),
+                    "value": str(int(value) if history == "3" else value),
+                    "ns": "0"
+                })
+        if params.get("sortfield") == "clock":
+            rows.sort(key=lambda row: int(row["clock"]), reverse=params.get("sortorder") == "DESC")
+        return self._limited(iter(rows), params)
+
+    def trend_get(self, params: Dict[str, Any], auth: Optional[str]) -> List[Dict[str, Any]]:
+        time_till = int(params.get("time_till") or self.events_end)
+        time_from = int(params.get("time_from") or time_till - 86400)
+        first = time_from - time_from % 3600
+        rows = []
+        for index in self._item_indexes(params):
+            for clock in range(first, time_till + 1, 3600):
+                samples = [self._sample(index, clock + offset) for offset in range(0, 3600, 600)]
+                rows.append({
+                    "itemid": str(40001 + index),
+                    "clock": str(clock),
+                    "num": str(len(samples)),
+                    "value_min": str(min(samples)),
+                    "value_avg": str(round(sum(samples) / len(samples), 4)),
+                    "value_max": str(max(samples))
+                })
+        return self._limited(iter(rows), params)
+
+    # -- dispatch ------------------------------------------------------------
+
+    def _require_session(self, auth: Optional[str]) -> None:
+        with self._lock:
+            created = self.sessions.get(auth)
+            if created is None:
+                raise _RpcError(SESSION_TERMINATED)
+            if self.faults.session_ttl is not None and time.time() - created > self.faults.session_ttl:
+                del self.sessions[auth]
+                raise _RpcError(SESSION_TERMINATED)
+
+    def expire_sessions(self) -> None:
+        """Terminate every session, as a Zabbix restart or auto-logout would"""
+        with self._lock:
+            self.sessions.clear()
+
+    def handle(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute one JSON-RPC request and build its response"""
+        method = payload.get("method", "")
+        request_id = payload.get("id")
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            roll = self._random.random()
+            jitter = self._random.random() * self.faults.latency_jitter
+
+        delay = self.faults.latency + jitter + self.faults.method_latency.get(method, 0.0)
+        if delay:
+            time.sleep(delay)
+
+        if roll < self.faults.http_error_rate:
+            with self._lock:
+                self.errors_injected += 1
+            raise SimulatedHttpError(503)
+        if roll < self.faults.http_error_rate + self.faults.error_rate:
+            with self._lock:
+                self.errors_injected += 1
+            return {"jsonrpc": "2.0", "error": {"code": -32500, "message": "Application error.", "data": "Injected failure"}, "id": request_id}
+
+        handler = getattr(self, method.replace(".", "_"), None)
+        if handler is None:
+            return {"jsonrpc": "2.0", "error": {"code": -32601, "message": "Method not found.", "data": method}, "id": request_id}
+
+        try:
+            if method not in ("user.login", "user.checkAuthentication", "apiinfo.version"):
+                self._require_session(payload.get("auth"))
+            result = handler(payload.get("params") or {}, payload.get("auth"))
+        except _RpcError as e:
+            return {"jsonrpc": "2.0", "error": e.error, "id": request_id}
+
+        return {"jsonrpc": "2.0", "result": result, "id": request_id}
+
+    def handle_bytes(self, body: bytes) -> Tuple[int, bytes]:
+        """Execute a raw JSON-RPC body, returning (status code, response body)"""
+        try:
+            response = self.handle(json.loads(body))
+        except SimulatedHttpError as e:
+            return e.status_code, b"Service Unavailable"
+        data = json.dumps(response, separators=(",", ":")).encode()
+        with self._lock:
+            self.bytes_sent += len(data)
+        return 200, data
+
+    def stats(self) -> Dict[str, Any]:
+        """Get request accounting"""
+        with self._lock:
+            return {
+                "calls": dict(self.calls),
+                "total_calls": sum(self.calls.values()),
+                "errors_injected": self.errors_injected,
+                "bytes_sent": self.bytes_sent,
+                "open_sessions": len(self.sessions)
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.calls.clear()
+            self.errors_injected = 0
+            self.bytes_sent = 0
+
+
+class _RpcError(Exception):
+    def __init__(self, error: Dict[str, Any]):
+        super().__init__(error.get("data"))
+        self.error = error
+
+
+class SimulatorAdapter(BaseAdapter):
+    """requests transport adapter that answers from a ZabbixSimulator"""
+
+    def __init__(self, simulator: ZabbixSimulator):
+        super().__init__()
+        self.simulator = simulator
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        status_code, body = self.simulator.handle_bytes(request.body or b"{}")
+        response = requests.Response()
+        response.status_code = status_code
+        response.headers["Content-Type"] = "application/json"
+        response.raw = _BytesRaw(body)
+        response.url = request.url
+        response.request = request
+        response.encoding = "utf-8"
+        return response
+
+    def close(self):
+        pass
+
+
+class _BytesRaw:
+    """Minimal urllib3-like raw body for requests.Response"""
+
+    def __init__(self, body: bytes):
+        self._body = body
+        self._pos = 0
+
+    def read(self, amt: int = None, decode_content: bool = True) -> bytes:
+        end = len(self._body) if amt is None else self._pos + amt
+        chunk = self._body[self._pos:end]
+        self._pos += len(chunk)
+        return chunk
+
+    def stream(self, amt: int = 65536, decode_content: bool = True) -> Iterator[bytes]:
+        while True:
+            chunk = self.read(amt)
+            if not chunk:
+                return
+            yield chunk
+
+    def close(self) -> None:
+        pass
+
+    def release_conn(self) -> None:
+        pass
+
+
+def attach(service, simulator: ZabbixSimulator) -> None:
+    """Point a ZabbixService at the simulator without any network access"""
+    service.url = SIMULATOR_URL
+    service.session.mount("http://zabbix-simulator/", SimulatorAdapter(simulator))
+
+
+def attach_async(service, simulator: ZabbixSimulator) -> None:
+    """Point an AsyncZabbixService at the simulator without any network access"""
+    import httpx
+
+    def handler(request: "httpx.Request") -> "httpx.Response":
+        status_code, body = simulator.handle_bytes(request.content)
+        return httpx.Response(status_code, content=body, headers={"Content-Type": "application/json"})
+
+    service.url = SIMULATOR_URL
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def create_app(simulator: ZabbixSimulator):
+    """Build an ASGI app serving the simulator at /api_jsonrpc.php"""
+    import asyncio
+    from fastapi import FastAPI, Request, Response
+
+    app = FastAPI(title="Zabbix API simulator")
+
+    @app.post("/api_jsonrpc.php")
+    async def api_jsonrpc(request: Request):
+        body = await request.body()
+        status_code, data = await asyncio.get_running_loop().run_in_executor(None, simulator.handle_bytes, body)
+        return Response(content=data, status_code=status_code, media_type="application/json-rpc")
+
+    @app.get("/stats")
+    async def simulator_stats():
+        return simulator.stats()
+
+    @app.post("/expire-sessions")
+    async def expire_sessions():
+        simulator.expire_sessions()
+        return {"message": "Sessions expired"}
+
+    return app
+
+
+def _timed(label: str, fn) -> Any:
+    started = time.perf_counter()
+    result = fn()
+    print(f"{label:<32} {time.perf_counter() - started:8.3f}s")
+    return result
+
+
+def _bench(simulator: ZabbixSimulator) -> None:
+    from ..services.zabbix_service import ZabbixService
+
+    service = ZabbixService()
+    attach(service, simulator)
+
+    hosts = _timed("get_hosts", service.get_hosts)
+    batches = _timed("iter_hosts", lambda: sum(len(batch) for batch in service.iter_hosts()))
+    events = _timed("get_events (24h)", lambda: len(service.get_events()))
+    metrics = _timed("get_host_metrics (1h)", lambda: service.get_host_metrics(simulator._hostid(0)))
+    print(f"hosts={len(hosts)} iter_hosts={batches} events={events} series={len(metrics)}")
+    print(json.dumps(simulator.stats(), indent=2))
+
+
+def _build_simulator(args: argparse.Namespace) -> ZabbixSimulator:
+    fleet = FleetConfig(
+        hosts=args.hosts,
+        triggers_per_host=args.triggers_per_host,
+        items_per_host=args.items_per_host,
+        events=args.events,
+        event_interval=args.event_interval,
+        seed=args.seed
+    )
+    faults = FaultConfig(
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        error_rate=args.error_rate,
+        http_error_rate=args.http_error_rate,
+        session_ttl=args.session_ttl
+    )
+    return ZabbixSimulator(fleet, faults)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Zabbix JSON-RPC simulator")
+    parser.add_argument("command", choices=["serve", "bench"])
+    parser.add_argument("--hosts", type=int, default=1000)
+    parser.add_argument("--triggers-per-host", type=int, default=5)
+    parser.add_argument("--items-per-host", type=int, default=10)
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--event-interval", type=float, default=1.0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--http-error-rate", type=float, default=0.0)
+    parser.add_argument("--session-ttl", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    args = parser.parse_args()
+
+    simulator = _build_simulator(args)
+    if args.command == "bench":
+        _bench(simulator)
+        return
+
+    import uvicorn
+    uvicorn.run(create_app(simulator), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Shared fixtures: a database migrated to head and seeded with a large fleet.
+
+Tests run against TEST_DATABASE_URL when set (a throwaway PostgreSQL
+database: its public schema is dropped and recreated) and otherwise against
+a SQLite file in a temporary directory. Zabbix is the in-process simulator.
+"""
+
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+_tmp = tempfile.mkdtemp(prefix="zabbix-monitor-tests-")
+os.environ["DATABASE_URL"] = os.environ.get("TEST_DATABASE_URL", f"sqlite:///{_tmp}/test.db")
+os.environ.setdefault("ZABBIX_URL", "http://zabbix.invalid/api_jsonrpc.php")
+os.environ.setdefault("ZABBIX_USER", "Admin")
+os.environ.setdefault("ZABBIX_PASSWORD", "zabbix")
+os.environ["DEBUG"] = "false"
+os.environ["SCHEDULER_ENABLED"] = "false"
+os.environ["RESPONSE_CACHE_BACKEND"] = "none"
+
+import pytest
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import sessionmaker
+
+from server.database import SessionLocal, engine, init_db
+from server.migrations import upgrade
+from server.models import Alarm, Documentation, Equipment, MetricRollup1h, MetricRollup1m, MonitoringMetrics
+from server.services.equipment_service import EquipmentService
+from server.services.search_service import equipment_search
+from server.services.zabbix_service import zabbix_service
+from server.utils.upsert import chunked
+from server.utils.zabbix_simulator import FleetConfig, ZabbixSimulator, attach
+
+# Large enough that a sequential scan costs more than any index path
+SEED_HOSTS = 5000
+SEED_ALARMS = 50000
+SEED_METRICS = 100000
+SEED_DOCUMENTS = 5000
+SEED_EVENTS = 2000
+
+
+def _reset_database() -> None:
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as connection:
+            connection.execute(text("DROP SCHEMA public CASCADE"))
+            connection.execute(text("CREATE SCHEMA public"))
+
+
+def _seed(db) -> dict:
+    rng = random.Random(7)
+    now = datetime.now(timezone.utc)
+    equipment_ids = [row.id for row in db.query(Equipment.id).order_by(Equipment.id)]
+
+    alarms = []
+    for index in range(SEED_ALARMS):
+        created_at = now - timedelta(minutes=index)
+        status = rng.choices(["resolved", "active", "acknowledged"], weights=[90, 7, 3])[0]
+        alarms.append({
+            "zabbix_event_id": f"seed-{index}",
+            "equipment_id": rng.choice(equipment_ids),
+            "alarm_type": rng.choice(["critical", "warning", "info"]),
+            "severity": rng.choice(["high", "medium", "low"]),
+            "title": f"Seeded alarm {index}",
+            "description": "",
+            "status": status,
+            "resolved_at": created_at + timedelta(minutes=5) if status == "resolved" else None,
+            "created_at": created_at
+        })
+    for chunk in chunked(alarms, 5000):
+        db.execute(insert(Alarm), chunk)
+
+    metrics = [
+        {
+            "equipment_id": rng.choice(equipment_ids),
+            "metric_name": rng.choice(["cpu", "memory", "latency", "packet_loss"]),
+            "metric_value": rng.random() * 100,
+            "unit": "%",
+            "timestamp": now - timedelta(seconds=index * 5)
+        }
+        for index in range(SEED_METRICS)
+    ]
+    for chunk in chunked(metrics, 5000):
+        db.execute(insert(MonitoringMetrics), chunk)
+
+    for model, step in ((MetricRollup1m, timedelta(minutes=1)), (MetricRollup1h, timedelta(hours=1))):
+        rollups = [
+            {
+                "equipment_id": equipment_id,
+                "metric_name": "cpu",
+                "bucket": now - step * offset,
+                "min_value": 1.0, "max_value": 2.0, "sum_value": 3.0, "count": 2,
+                "last_value": 2.0, "last_timestamp": now - step * offset
+            }
+            for equipment_id in equipment_ids[:200] for offset in range(24)
+        ]
+        db.execute(insert(model), rollups)
+
+    documents = [
+        {"equipment_id": rng.choice(equipment_ids), "title": f"Runbook {index}", "content": "", "doc_type": "procedure"}
+        for index in range(SEED_DOCUMENTS)
+    ]
+    db.execute(insert(Documentation), documents)
+    db.commit()
+
+    # Planner statistics, as autovacuum would have them. SQLite is left without
+    # them: it then takes any usable index, so a table scan means there is none
+    if engine.dialect.name == "postgresql":
+        db.execute(text("ANALYZE"))
+        db.commit()
+
+    return {
+        "equipment_id": equipment_ids[len(equipment_ids) // 2],
+        "zabbix_host_id": db.get(Equipment, equipment_ids[len(equipment_ids) // 2]).zabbix_host_id,
+        "alarm_id": db.query(Alarm.id).filter(Alarm.zabbix_event_id == "seed-100").scalar(),
+        "zabbix_event_id": "seed-100"
+    }
+
+
+@pytest.fixture(scope="session")
+def simulator():
+    simulator = ZabbixSimulator(FleetConfig(hosts=SEED_HOSTS, events=SEED_EVENTS))
+    attach(zabbix_service, simulator)
+    return simulator
+
+
+@pytest.fixture(scope="session")
+def seeded(simulator):
+    """IDs of a few seeded rows; the database behind SessionLocal holds the whole fleet"""
+    _reset_database()
+    init_db()
+    db = SessionLocal()
+    try:
+        EquipmentService.sync_with_zabbix(db)
+        seed = _seed(db)
+        # The in-process search index is built once, outside the queries under test
+        if equipment_search.backend(db) == "memory":
+            equipment_search.index(db)
+        return seed
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def db(seeded):
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
+@pytest.fixture
+def scratch_db(tmp_path, simulator, monkeypatch):
+    """Session on an empty SQLite database migrated to head, for tests that write freely"""
+    # Rows of this database must not reach the search index of the seeded one
+    monkeypatch.setattr(equipment_search, "_index", None)
+    scratch_engine = create_engine(f"sqlite:///{tmp_path}/scratch.db")
+    upgrade(scratch_engine)
+    session = sessionmaker(bind=scratch_engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        scratch_engine.dispose()
@@ -0,0 +1,93 @@
+"""
+Event replay of AlarmService.sync_alarms_with_zabbix against a scratch
+database and the simulator.
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from server.config import settings
+from server.migrations import upgrade
+from server.models import Alarm
+from server.services.alarm_service import AlarmService
+from server.services.equipment_service import EquipmentService
+from server.services.zabbix_auth import ZabbixTokenManager
+from server.services.zabbix_service import zabbix_service
+from server.utils.cache import LocalCacheBackend
+from server.utils.zabbix_simulator import FleetConfig, ZabbixSimulator, attach
+
+
+def test_events_of_unsynced_hosts_are_retried(scratch_db, simulator, monkeypatch):
+    monkeypatch.setattr(settings, "alarm_sync_max_pending_events", 100000)
+    first = AlarmService.sync_alarms_with_zabbix(scratch_db)
+    assert first["created"] == 0
+    assert first["pending"] == first["skipped"] > 0
+    assert scratch_db.query(Alarm).count() == 0
+
+    # The watermark moves past the unmatched events instead of holding below them
+    watermark = AlarmService.get_sync_watermark(scratch_db)
+    assert int(watermark.last_event_id) == simulator.fleet.events
+    assert len(watermark.pending_events) == first["pending"]
+
+    EquipmentService.sync_with_zabbix(scratch_db)
+    second = AlarmService.sync_alarms_with_zabbix(scratch_db)
+    assert second["created"] == first["pending"]
+    assert second["pending"] == 0
+
+    # Nothing is left behind: a further run finds no new alarms
+    third = AlarmService.sync_alarms_with_zabbix(scratch_db)
+    assert third["created"] == 0
+    assert scratch_db.query(Alarm).count() == second["created"]
+    assert AlarmService.get_sync_watermark(scratch_db).pending_events is None
+
+
+def test_pending_events_are_capped_to_the_newest(scratch_db, simulator, monkeypatch):
+    monkeypatch.setattr(settings, "alarm_sync_max_pending_events", 5)
+    first = AlarmService.sync_alarms_with_zabbix(scratch_db)
+    assert first["pending"] == 5
+    assert first["dropped"] == first["skipped"] - 5
+    pending = AlarmService.get_sync_watermark(scratch_db).pending_events
+    assert sorted(pending, key=int) == [str(event_id) for event_id in range(simulator.fleet.events - 4,
+                                                                              simulator.fleet.events + 1)]
+
+    EquipmentService.sync_with_zabbix(scratch_db)
+    second = AlarmService.sync_alarms_with_zabbix(scratch_db)
+    assert second["created"] == 5
+    assert sorted(alarm.zabbix_event_id for alarm in scratch_db.query(Alarm)) == sorted(pending)
+
+
+@pytest.fixture
+def small_fleet(simulator, monkeypatch):
+    """A fleet small enough that events recover, attached in place of the session simulator"""
+    monkeypatch.setattr(zabbix_service, "tokens", ZabbixTokenManager(store=LocalCacheBackend(max_entries=1)))
+    small = ZabbixSimulator(FleetConfig(hosts=10, events=240, event_interval=60))
+    attach(zabbix_service, small)
+    try:
+        yield small
+    finally:
+        attach(zabbix_service, simulator)
+
+
+def test_retried_events_end_like_a_direct_sync(scratch_db, small_fleet, tmp_path):
+    # Retried: alarm sync before the hosts exist, then again after
+    AlarmService.sync_alarms_with_zabbix(scratch_db)
+    EquipmentService.sync_with_zabbix(scratch_db)
+    retried = AlarmService.sync_alarms_with_zabbix(scratch_db)
+    assert retried["created"] > 0 and retried["pending"] == 0
+
+    # Direct: hosts first
+    direct_engine = create_engine(f"sqlite:///{tmp_path}/direct.db")
+    upgrade(direct_engine)
+    direct_db = sessionmaker(bind=direct_engine)()
+    try:
+        EquipmentService.sync_with_zabbix(direct_db)
+        AlarmService.sync_alarms_with_zabbix(direct_db)
+        expected = {(alarm.zabbix_event_id, alarm.status) for alarm in direct_db.query(Alarm)}
+    finally:
+        direct_db.close()
+        direct_engine.dispose()
+
+    stored = {(alarm.zabbix_event_id, alarm.status) for alarm in scratch_db.query(Alarm)}
+    assert stored == expected
+    assert {status for _, status in stored} == {"active", "resolved"}
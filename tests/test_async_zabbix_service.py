@@ -0,0 +1,24 @@
+"""
+AsyncZabbixService against the simulator.
+"""
+
+import asyncio
+
+from server.services.async_zabbix_service import AsyncZabbixService
+from server.services.zabbix_service import zabbix_service
+from server.utils.zabbix_simulator import attach_async
+
+
+def test_async_events_carry_their_host(simulator):
+    async def scenario():
+        service = AsyncZabbixService()
+        attach_async(service, simulator)
+        try:
+            return await service.get_events()
+        finally:
+            await service.aclose()
+
+    events = asyncio.run(scenario())
+    assert events
+    assert all(event.hostid for event in events)
+    assert events == zabbix_service.get_events()
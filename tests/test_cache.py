@@ -0,0 +1,72 @@
+"""
+Cache backends: Redis fails fast when unreachable, and the module-level
+services only create their backends on first use.
+"""
+
+import socket
+import time
+
+from server.config import settings
+from server.services.zabbix_auth import ZabbixTokenManager
+from server.services.zabbix_cache import CachedZabbixService
+from server.services.zabbix_service import zabbix_service
+from server.utils.cache import LocalCacheBackend, RedisCacheBackend, create_cache_backend
+
+
+def test_redis_client_has_connect_and_read_timeouts(monkeypatch):
+    monkeypatch.setattr(settings, "redis_connect_timeout", 0.25)
+    monkeypatch.setattr(settings, "redis_socket_timeout", 0.5)
+    backend = RedisCacheBackend("redis://localhost:6379/0", "test")
+    kwargs = backend.client.connection_pool.connection_kwargs
+    assert kwargs["socket_connect_timeout"] == 0.25
+    assert kwargs["socket_timeout"] == 0.5
+
+
+def test_silent_redis_falls_back_to_local_within_the_timeout(monkeypatch):
+    # A listener that never answers: the connect succeeds, PING's reply never comes
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    port = server.getsockname()[1]
+    monkeypatch.setattr(settings, "redis_url", f"redis://127.0.0.1:{port}/0")
+    monkeypatch.setattr(settings, "redis_socket_timeout", 0.2)
+    try:
+        started = time.monotonic()
+        backend = create_cache_backend("redis", "test")
+        assert isinstance(backend, LocalCacheBackend)
+        assert time.monotonic() - started < 5
+    finally:
+        server.close()
+
+
+def test_backends_are_created_on_first_use(monkeypatch):
+    created = []
+    monkeypatch.setattr("server.services.zabbix_cache.create_cache_backend",
+                        lambda *args, **kwargs: created.append(args) or LocalCacheBackend())
+    monkeypatch.setattr("server.services.zabbix_auth.create_cache_backend",
+                        lambda *args, **kwargs: created.append(args) or LocalCacheBackend())
+
+    cache = CachedZabbixService(zabbix_service)
+    tokens = ZabbixTokenManager()
+    assert created == []
+
+    assert cache.get_cache_stats()["backend"] == "local"
+    assert tokens.current() is None
+    assert [namespace for _, namespace in created] == ["zabbix", "zabbix-auth"]
+
+
+def test_host_status_is_cached_until_invalidated(simulator):
+    cache = CachedZabbixService(zabbix_service, backend=LocalCacheBackend())
+    hostid = "10001"
+    calls = lambda: simulator.calls.get("host.get", 0)
+
+    first = cache.get_host_status(hostid)
+    assert first["hostid"] == hostid
+    before = calls()
+    assert cache.get_host_status(hostid) == first
+    assert calls() == before
+
+    assert cache.invalidate("get_host_status") == 1
+    assert cache.get_host_status(hostid) == first
+    assert calls() == before + 1
+    assert cache.get_cache_stats()["ttls"] == {"get_host_status": settings.zabbix_cache_host_status_ttl}
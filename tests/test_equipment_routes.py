@@ -0,0 +1,47 @@
+"""
+Equipment list endpoint: search against /equipment/search, and cursor pages.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from server.main import app
+
+
+@pytest.fixture(scope="module")
+def client():
+    # Not entered as a context manager: the lifespan (scheduler, collectors) stays off
+    return TestClient(app)
+
+
+def _ids(items):
+    return [item["id"] for item in items]
+
+
+@pytest.mark.parametrize("term", ["Host 0012", "host-004", "hst 0012"])
+def test_list_search_matches_the_search_endpoint(seeded, client, term):
+    listed = client.get("/api/v1/equipment/", params={"search": term, "limit": 20}).json()
+    searched = client.get(f"/api/v1/equipment/search/{term}", params={"limit": 20}).json()
+    assert _ids(listed["items"]) == _ids(searched)
+    assert listed["total"] == len(searched)
+
+
+def test_list_search_applies_the_filters_before_the_limit(seeded, client):
+    searched = client.get("/api/v1/equipment/search/Host", params={"limit": 200}).json()
+    offline = [item["id"] for item in searched if item["status"] == "offline"]
+    assert 0 < len(offline) < 200
+
+    listed = client.get("/api/v1/equipment/", params={"search": "Host", "status": "offline", "limit": 5}).json()
+    assert len(listed["items"]) == 5
+    assert all(item["status"] == "offline" for item in listed["items"])
+
+    none = client.get("/api/v1/equipment/", params={"search": "Host", "client_name": "no such client"}).json()
+    assert none["items"] == []
+
+
+def test_cursor_pages_leave_page_unset(seeded, client):
+    first = client.get("/api/v1/equipment/", params={"limit": 10}).json()
+    assert first["page"] == 1 and first["next_cursor"]
+    second = client.get("/api/v1/equipment/", params={"limit": 10, "cursor": first["next_cursor"]}).json()
+    assert second["page"] is None
+    assert not set(_ids(first["items"])) & set(_ids(second["items"]))
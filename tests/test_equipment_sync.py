@@ -0,0 +1,33 @@
+"""
+EquipmentService.sync_with_zabbix against a scratch database and the simulator.
+"""
+
+import pytest
+
+from server.models import Equipment
+from server.services import equipment_service
+from server.services.equipment_service import EquipmentService
+
+
+@pytest.mark.parametrize("upsert", [True, False], ids=["upsert", "generic"])
+def test_resync_keeps_user_edited_columns(scratch_db, simulator, monkeypatch, upsert):
+    if not upsert:
+        monkeypatch.setattr(equipment_service, "upsert_insert", lambda dialect_name: None)
+    EquipmentService.sync_with_zabbix(scratch_db)
+
+    equipment = scratch_db.query(Equipment).order_by(Equipment.id).first()
+    equipment.location = "Lima"
+    equipment.client_name = "Acme"
+    # A host renamed in Zabbix since the last sync
+    name = equipment.name
+    equipment.name = "renamed"
+    equipment.zabbix_fingerprint = "stale"
+    scratch_db.commit()
+
+    result = EquipmentService.sync_with_zabbix(scratch_db)
+    assert result["updated"] == 1
+
+    scratch_db.expire_all()
+    equipment = scratch_db.get(Equipment, equipment.id)
+    assert equipment.name == name
+    assert (equipment.location, equipment.client_name) == ("Lima", "Acme")
@@ -0,0 +1,88 @@
+"""
+Incremental decoding of JSON-RPC result arrays, fed in chunks of every size
+so that each value is also split at every possible position.
+"""
+
+import json
+
+import pytest
+
+from server.utils.json_stream import JsonRpcError, iter_result_items
+
+RESULT = [
+    {"eventid": "1", "name": "Quote \" backslash \\ slash / controls \b\f\n\r\t\x00", "hosts": [{"hostid": "10"}]},
+    {"name": "Non-ASCII é 中", "emoji": "😀 😀"},
+    {"nested": {"a": [1, [2, [3, {}]], []], "b": {"c": {"d": None}}}, "flags": [True, False, None]},
+    "plain string", "", [], {},
+    0, -0, 7, 12345678901234567890, -42, 1.5, -0.25, 1e3, 2.5E-3, -1e+10,
+    True, False, None,
+]
+
+
+def _body(result, separators=(", ", ": "), ensure_ascii=False) -> bytes:
+    document = json.dumps({"jsonrpc": "2.0", "result": result, "id": 1},
+                          separators=separators, ensure_ascii=ensure_ascii)
+    return document.encode()
+
+
+def _chunks(body: bytes, size: int):
+    return (body[start:start + size] for start in range(0, len(body), size))
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 64, 1 << 20])
+def test_values_split_across_chunks(size):
+    # Raw UTF-8 split inside multi-byte characters, and \uXXXX escapes
+    for body in (_body(RESULT), _body(RESULT, separators=(",", ":")), _body(RESULT, ensure_ascii=True)):
+        assert list(iter_result_items(_chunks(body, size))) == RESULT
+
+
+def test_escaped_surrogate_pairs_decode_to_one_character():
+    body = b'{"jsonrpc": "2.0", "result": ["\\ud83d\\ude00", "\\u00e9"], "id": 1}'
+    for size in range(1, 12):
+        assert list(iter_result_items(_chunks(body, size))) == ["\U0001F600", "é"]
+
+
+@pytest.mark.parametrize("number", ["12", "1.5", "1e3", "-2.5E-3", "123456"])
+def test_numbers_at_chunk_boundaries_are_not_cut(number):
+    body = f'{{"jsonrpc": "2.0", "result": [{number}, {number}], "id": 1}}'.encode()
+    for size in range(1, len(body)):
+        assert list(iter_result_items(_chunks(body, size))) == [json.loads(number)] * 2
+
+
+def test_empty_result_and_whitespace():
+    assert list(iter_result_items([b'{"jsonrpc": "2.0", "result": [], "id": 1}'])) == []
+    body = b'{ "jsonrpc" : "2.0" , "result" : [ \n {"a": 1} ,\n\t{"b": 2} \r\n] , "id": 1}'
+    assert list(iter_result_items(_chunks(body, 3))) == [{"a": 1}, {"b": 2}]
+
+
+def test_error_response_raises():
+    body = b'{"jsonrpc": "2.0", "error": {"code": -32602, "message": "Invalid params."}, "id": 1}'
+    with pytest.raises(JsonRpcError) as excinfo:
+        list(iter_result_items(_chunks(body, 5)))
+    assert excinfo.value.error["code"] == -32602
+
+
+def test_non_array_result_is_yielded_whole():
+    body = b'{"jsonrpc": "2.0", "result": "7.0.0", "id": 1}'
+    assert list(iter_result_items([body])) == ["7.0.0"]
+
+
+@pytest.mark.parametrize("cut", [
+    b'{"jsonrpc": "2.0", "result": [{"a": 1}',
+    b'{"jsonrpc": "2.0", "result": [{"a": 1}, {"b"',
+    b'{"jsonrpc": "2.0", "result": [{"a": "unterminated',
+    b'{"jsonrpc": "2.0", "result": [1.',
+    b'{"jsonrpc": "2.0", "result": [tr',
+])
+def test_truncated_input_raises(cut):
+    for size in (1, 4, len(cut)):
+        with pytest.raises(ValueError):
+            list(iter_result_items(_chunks(cut, size)))
+
+
+def test_items_are_yielded_before_the_body_ends():
+    body = _body([{"n": index} for index in range(3)])
+    chunks = iter(_chunks(body, 16))
+    items = iter_result_items(chunks)
+    assert next(items) == {"n": 0}
+    assert list(chunks), "the first item should be decoded before the body is consumed"
@@ -0,0 +1,30 @@
+"""
+MetricsCollector backpressure when the writer falls behind.
+"""
+
+import queue
+import time
+
+from server.config import settings
+from server.services.metrics_service import MetricsCollector
+from server.utils.ring_buffer import SeriesRingBuffer
+
+
+def test_full_queue_stalls_a_collection_once(seeded, scratch_db, monkeypatch):
+    monkeypatch.setattr(settings, "metrics_enqueue_timeout", 0.2)
+    collector = MetricsCollector(bind=scratch_db.get_bind(), live=SeriesRingBuffer())
+    collector.queue = queue.Queue(maxsize=5)
+
+    started = time.monotonic()
+    enqueued = collector.collect_once()
+    elapsed = time.monotonic() - started
+
+    assert enqueued == 5
+    assert collector.rows_dropped > 100
+    # Without a writer every sample after the fifth would wait the full timeout
+    assert elapsed < 0.2 + 5
+    assert collector.live.stats()["samples_appended"] == 5
+
+    # Dropped samples are collected again on the next pass
+    collector.queue = queue.Queue()
+    assert collector.collect_once() == collector.rows_dropped
@@ -0,0 +1,69 @@
+"""
+Migrations against scratch SQLite databases: a fresh database migrated to
+head matches the models, and one made by an earlier release's create_all is
+upgraded in place.
+"""
+
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import MetaData, create_engine, inspect
+
+from server.database import Base
+from server.migrations import alembic_config, object_filter, upgrade
+
+FIRST_RELEASE_TABLES = ("equipment", "alarms", "documentation", "monitoring_metrics", "users")
+LATER_INDEXES = (
+    "ix_monitoring_metrics_timestamp", "ix_equipment_created_at_id", "ix_alarms_created_at_id",
+    "ix_alarms_resolved_at", "ix_alarms_status_type_created_at", "ix_alarms_equipment_id_status",
+    "ix_monitoring_metrics_series_timestamp", "ix_equipment_status", "ix_documentation_equipment_id",
+    "ix_documentation_alarm_id"
+)
+
+HEAD = ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+def _drift(engine):
+    with engine.connect() as connection:
+        context = MigrationContext.configure(connection, opts={
+            "include_object": object_filter(connection.dialect.name)
+        })
+        return compare_metadata(context, Base.metadata)
+
+
+def _revision(engine):
+    with engine.connect() as connection:
+        return MigrationContext.configure(connection).get_current_revision()
+
+
+def test_fresh_database_matches_models(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/fresh.db")
+    upgrade(engine)
+    assert _revision(engine) == HEAD
+    assert _drift(engine) == []
+
+
+def test_create_all_database_upgrades_in_place(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/legacy.db")
+    # The first release's tables: what create_all made, less what later revisions added
+    legacy = MetaData()
+    for name in FIRST_RELEASE_TABLES:
+        Base.metadata.tables[name].to_metadata(legacy)
+    for name in ("equipment", "alarms"):
+        legacy.tables[name].c.created_at.nullable = True
+    legacy.create_all(engine)
+    with engine.begin() as connection:
+        for index in LATER_INDEXES:
+            connection.exec_driver_sql(f"DROP INDEX IF EXISTS {index}")
+        connection.exec_driver_sql("ALTER TABLE equipment DROP COLUMN zabbix_fingerprint")
+        connection.exec_driver_sql("CREATE INDEX ix_alarms_created_at ON alarms (created_at)")
+        connection.exec_driver_sql("INSERT INTO equipment (name, created_at) VALUES ('legacy', NULL)")
+        connection.exec_driver_sql("INSERT INTO alarms (title, equipment_id, created_at) VALUES ('legacy', 1, NULL)")
+
+    upgrade(engine)
+    assert _revision(engine) == HEAD
+    assert "zabbix_fingerprint" in {column["name"] for column in inspect(engine).get_columns("equipment")}
+    assert _drift(engine) == []
+    with engine.connect() as connection:
+        for table in ("equipment", "alarms"):
+            assert connection.exec_driver_sql(f"SELECT count(*) FROM {table} WHERE created_at IS NULL").scalar() == 0
@@ -0,0 +1,136 @@
+"""
+NgramIndex substring, fuzzy and prefix lookups, checked against brute force.
+"""
+
+import random
+
+import pytest
+
+from server.utils.ngram_index import NgramIndex, similarity, trigrams
+
+FIELDS = ("name", "hostname", "ip_address", "client_name")
+WEIGHTS = {"name": 1.0, "hostname": 0.9, "ip_address": 0.8, "client_name": 0.7}
+CLIENTS = ["Acme Corp", "Banco Andino", "Telecom Sur", "Minera Norte", None]
+SITES = ["bogota", "lima", "quito", "santiago", "caracas"]
+
+
+def _documents(count: int, seed: int = 3):
+    rng = random.Random(seed)
+    for doc_id in range(1, count + 1):
+        site = rng.choice(SITES)
+        kind = rng.choice(["core-router", "edge-switch", "firewall"])
+        yield doc_id, {
+            "name": f"{kind}-{site}-{doc_id:04d}",
+            "hostname": f"{kind[:4]}{doc_id}.{site}.example.net",
+            "ip_address": f"10.{doc_id // 256}.{doc_id % 256}.1",
+            "client_name": rng.choice(CLIENTS)
+        }
+
+
+@pytest.fixture(scope="module")
+def documents():
+    return dict(_documents(600))
+
+
+@pytest.fixture
+def index(documents):
+    index = NgramIndex(FIELDS, WEIGHTS, prefix_fields=("name", "hostname", "client_name"))
+    index.load(documents.items())
+    return index
+
+
+def _containing(documents, term, fields=FIELDS):
+    term = term.lower()
+    return {doc_id for doc_id, values in documents.items()
+            if any(term in (values[field] or "").lower() for field in fields)}
+
+
+def test_trigrams_are_padded_like_pg_trgm():
+    assert trigrams("ab") == {"  a", " ab", "ab "}
+    assert trigrams("abcd", padded=False) == {"abc", "bcd"}
+    assert similarity(trigrams("lima"), trigrams("lima")) == 1.0
+    assert similarity(set(), trigrams("lima")) == 0.0
+
+
+@pytest.mark.parametrize("term", ["bogota", "SWITCH", "0042", "10.1.", ".example", "andino", "corp", "edge-switch-q"])
+def test_substring_search_matches_brute_force(index, documents, term):
+    expected = _containing(documents, term)
+    results = index.search(term, limit=len(documents), fuzzy=False)
+    assert {doc_id for doc_id, _ in results} == expected
+    scores = [score for _, score in results]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_search_is_limited_to_the_given_fields(index, documents):
+    results = index.search("andino", limit=1000, fields=("client_name",), fuzzy=False)
+    assert {doc_id for doc_id, _ in results} == _containing(documents, "andino", ("client_name",))
+    assert index.search("andino", limit=10, fields=("name",), fuzzy=False) == []
+
+
+def test_exact_and_prefix_matches_rank_first(index, documents):
+    name = documents[42]["name"]
+    assert index.search(name, limit=3)[0] == (42, 1.0)
+    top, score = index.search(name[:-1], limit=1)[0]
+    assert documents[top]["name"].startswith(name[:-1]) and 0.75 < score < 1.0
+
+
+def test_short_terms_match_prefixes_only(index, documents):
+    results = index.search("fi", limit=1000, fuzzy=False)
+    assert results
+    assert all(
+        any((documents[doc_id][field] or "").lower().startswith("fi") for field in ("name", "hostname"))
+        for doc_id, _ in results
+    )
+
+
+def test_typos_fall_back_to_fuzzy_matches(index, documents):
+    assert index.search("bogta", limit=5, fuzzy=False) == []
+    results = index.search("bogta", limit=5)
+    assert results
+    assert all("bogota" in documents[doc_id]["name"] for doc_id, _ in results)
+    assert all(score <= 0.5 for _, score in results)
+    assert index.search("zzzzqqqq", limit=5) == []
+
+
+def test_updates_and_removals_keep_postings_consistent(index, documents):
+    index.add(7, {**documents[7], "name": "renamed-host", "client_name": "Nuevo Cliente"})
+    assert [doc_id for doc_id, _ in index.search("renamed-host", limit=5)] == [7]
+    assert 7 not in {doc_id for doc_id, _ in index.search(documents[7]["name"], limit=50, fuzzy=False)}
+    assert index.complete("nuevo", 5) == [{"value": "Nuevo Cliente", "field": "client_name"}]
+
+    index.remove(7)
+    index.remove(7)
+    assert index.search("renamed-host", limit=5) == []
+    assert index.complete("nuevo", 5) == []
+    assert len(index) == len(documents) - 1
+
+    fresh = NgramIndex(FIELDS, WEIGHTS, prefix_fields=("name", "hostname", "client_name"))
+    fresh.load((doc_id, values) for doc_id, values in documents.items() if doc_id != 7)
+    assert index.stats() == fresh.stats()
+
+
+def test_removing_every_document_empties_the_index(documents):
+    index = NgramIndex(FIELDS, WEIGHTS)
+    for doc_id, values in documents.items():
+        index.add(doc_id, values)
+    for doc_id in documents:
+        index.remove(doc_id)
+    assert index.stats() == {"documents": 0, "trigrams": 0, "prefix_entries": 0}
+
+
+def test_completions_are_distinct_and_ordered(index, documents):
+    suggestions = index.complete("Banco", 10)
+    assert suggestions == [{"value": "Banco Andino", "field": "client_name"}]
+
+    values = [suggestion["value"] for suggestion in index.complete("core-router-l", 5)]
+    assert len(values) == 5
+    assert values == sorted(values)
+    assert all(value.startswith("core-router-lima") for value in values)
+    assert index.complete("", 5) == []
+
+
+def test_unselective_queries_are_capped():
+    index = NgramIndex(FIELDS, WEIGHTS, max_candidates=50)
+    index.load(_documents(600))
+    results = index.search("example", limit=1000, fuzzy=False)
+    assert len(results) == 50
@@ -0,0 +1,64 @@
+"""
+Cursor encoding and keyset pagination over the seeded database.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from server.models import Alarm, Equipment
+from server.utils.pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_page
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 10, 17, 12, 30, 5, 123456, tzinfo=timezone.utc)
+    cursor = encode_cursor(created_at, 42)
+    assert "=" not in cursor and "/" not in cursor and "+" not in cursor
+    assert decode_cursor(cursor) == (created_at, 42)
+    assert decode_cursor(encode_cursor(None, 7)) == (None, 7)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", "W10", "WyJ4IiwgMV0", "eyJhIjogMX0"])
+def test_invalid_cursors_raise(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+def _walk(query, model, limit):
+    rows, cursor = keyset_page(query, model, limit)
+    pages = [rows]
+    while cursor:
+        rows, cursor = keyset_page(query, model, limit, cursor)
+        pages.append(rows)
+    return pages
+
+
+def test_pages_cover_every_row_once_in_order(db):
+    query = db.query(Alarm).filter(Alarm.status == "acknowledged")
+    expected = [alarm.id for alarm in query.order_by(Alarm.created_at.desc(), Alarm.id.desc())]
+
+    pages = _walk(query, Alarm, limit=97)
+    assert all(len(page) == 97 for page in pages[:-1])
+    assert 0 < len(pages[-1]) <= 97
+    assert [alarm.id for page in pages for alarm in page] == expected
+
+
+def test_rows_sharing_a_timestamp_are_split_by_id(db):
+    ids = [row.id for row in db.query(Equipment.id).order_by(Equipment.id).limit(7)]
+    same = datetime(2000, 1, 1, tzinfo=timezone.utc)
+    db.query(Equipment).filter(Equipment.id.in_(ids)).update({"created_at": same}, synchronize_session=False)
+    query = db.query(Equipment).filter(Equipment.id.in_(ids))
+
+    pages = _walk(query, Equipment, limit=3)
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [equipment.id for page in pages for equipment in page] == sorted(ids, reverse=True)
+
+
+def test_cursor_of_a_deleted_row_still_pages(db):
+    query = db.query(Alarm).filter(Alarm.status == "active")
+    first, cursor = keyset_page(query, Alarm, 10)
+    second, _ = keyset_page(query, Alarm, 10, cursor)
+
+    db.query(Alarm).filter(Alarm.id == first[-1].id).delete(synchronize_session=False)
+    again, _ = keyset_page(query, Alarm, 10, cursor)
+    assert [alarm.id for alarm in again] == [alarm.id for alarm in second]
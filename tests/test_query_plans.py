@@ -0,0 +1,279 @@
+"""
+Query plan regression tests.
+
+Every public method of AlarmService and EquipmentService is called against
+the seeded database while the SQL it sends is recorded. Each recorded
+SELECT, UPDATE and DELETE is then EXPLAINed, and the test fails if the plan
+reads a whole table instead of using an index:
+
+- PostgreSQL: a ``Seq Scan`` node, planned with ``enable_seqscan = off`` so
+  that one only appears when no index can serve the query.
+- SQLite: a bare ``SCAN <table>`` step of EXPLAIN QUERY PLAN.
+
+On PostgreSQL, the hot list filters must also be served by the index made
+for them (``EXPECTED_INDEXES``).
+
+A new service method fails ``test_every_service_method_is_covered`` until
+it gets a case here.
+"""
+
+import inspect
+import json
+import re
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+
+import pytest
+from sqlalchemy import event
+
+from server.database import engine
+from server.schemas import AlarmCreate, AlarmUpdate, EquipmentCreate, EquipmentUpdate
+from server.services.alarm_service import AlarmService
+from server.services.equipment_service import EquipmentService
+
+# Tables that may be read whole, with the reason
+FULL_SCANS_ALLOWED = {
+    "stats_counters": "a handful of rows, read whole by design"
+}
+
+# Cases that read a whole table on purpose, with the reason
+CASE_FULL_SCANS_ALLOWED = {
+    "EquipmentService.sync_with_zabbix": {"equipment": "diffs every synced row against the Zabbix host list"}
+}
+
+# Cases SQLite cannot serve from an index, with the reason
+SQLITE_FULL_SCANS_ALLOWED = {
+    "EquipmentService.count_equipment[client_name]": {
+        "equipment": "substring match; PostgreSQL serves it from ix_equipment_client_name_trgm"
+    },
+    "EquipmentService.get_equipment_page[client_name]": {
+        "equipment": "substring match; PostgreSQL serves it from ix_equipment_client_name_trgm"
+    }
+}
+
+# Index each hot filter must be read through on PostgreSQL
+EXPECTED_INDEXES = {
+    "AlarmService.get_alarms[status and type]": "ix_alarms_status_type_created_at",
+    "AlarmService.count_alarms[status]": "ix_alarms_status_type_created_at",
+    "AlarmService.get_alarms[equipment]": "ix_alarms_equipment_id_status",
+    "AlarmService.get_alarms_by_equipment[status]": "ix_alarms_equipment_id_status",
+    "EquipmentService.count_equipment[status]": "ix_equipment_status",
+    "EquipmentService.count_equipment[client_name]": "ix_equipment_client_name_trgm",
+    "EquipmentService.get_equipment_page[client_name]": "ix_equipment_client_name_trgm",
+    "EquipmentService.get_equipment_page[second page]": "ix_equipment_created_at_id"
+}
+
+SQLITE_TABLE_SCAN = re.compile(r"SCAN (?:TABLE )?(\w+)(?: AS \w+)?")
+
+
+class QueryRecorder:
+    """Collects the statements an engine sends while active"""
+
+    def __init__(self):
+        self.statements: List[Tuple[str, Any]] = []
+
+    def __enter__(self):
+        event.listen(engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(engine, "before_cursor_execute", self._record)
+
+    def _record(self, connection, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().split(None, 1)[0].upper() in ("SELECT", "UPDATE", "DELETE"):
+            self.statements.append((statement, parameters[0] if executemany else parameters))
+
+
+def _plan_nodes(node: Dict[str, Any]):
+    yield node
+    for child in node.get("Plans", ()):
+        yield from _plan_nodes(child)
+
+
+def postgresql_plan(statement: str, parameters: Any) -> List[Dict[str, Any]]:
+    """Nodes of a statement's PostgreSQL plan, made with sequential scans off"""
+    with engine.connect() as connection:
+        connection.exec_driver_sql("SET enable_seqscan = off")
+        plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return list(_plan_nodes(plan[0]["Plan"]))
+
+
+def full_scans(statement: str, parameters: Any) -> List[str]:
+    """Tables a statement's plan reads sequentially"""
+    if engine.dialect.name == "postgresql":
+        return [node["Relation Name"] for node in postgresql_plan(statement, parameters)
+                if node["Node Type"] == "Seq Scan"]
+
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+        return [match.group(1) for *_, detail in rows for match in [SQLITE_TABLE_SCAN.fullmatch(detail)] if match]
+
+
+def _new_alarm(db, seed, suffix: str) -> int:
+    alarm = AlarmService.create_alarm(db, AlarmCreate(
+        equipment_id=seed["equipment_id"], zabbix_event_id=f"plan-test-{suffix}",
+        alarm_type="warning", severity="medium", title="Plan test", description=""
+    ))
+    return alarm.id
+
+
+def _new_equipment(db, suffix: str) -> int:
+    equipment = EquipmentService.create_equipment(db, EquipmentCreate(
+        name=f"plan-test-{suffix}", hostname=f"plan-test-{suffix}", ip_address="192.0.2.10",
+        equipment_type="router", location="", client_name="Plan Test", zabbix_host_id=f"plan-test-{suffix}"
+    ))
+    return equipment.id
+
+
+def _second_alarm_page(db, seed):
+    _, cursor = AlarmService.get_alarms_page(db, limit=50, status="active")
+    return AlarmService.get_alarms_page(db, limit=50, cursor=cursor, status="active")
+
+
+def _second_equipment_page(db, seed):
+    _, cursor = EquipmentService.get_equipment_page(db, limit=50)
+    return EquipmentService.get_equipment_page(db, limit=50, cursor=cursor)
+
+
+# (service method, case name, call); a method may have several cases
+CASES: List[Tuple[str, str, Callable]] = [
+    ("AlarmService.get_alarms", "status and type",
+     lambda db, seed: AlarmService.get_alarms(db, skip=100, limit=50, status="active", alarm_type="critical")),
+    ("AlarmService.get_alarms", "equipment",
+     lambda db, seed: AlarmService.get_alarms(db, equipment_id=seed["equipment_id"])),
+    ("AlarmService.get_alarms_page", "second page", _second_alarm_page),
+    ("AlarmService.count_alarms", "status",
+     lambda db, seed: AlarmService.count_alarms(db, status="active")),
+    ("AlarmService.get_alarm_by_id", "",
+     lambda db, seed: AlarmService.get_alarm_by_id(db, seed["alarm_id"])),
+    ("AlarmService.get_alarm_by_zabbix_event_id", "",
+     lambda db, seed: AlarmService.get_alarm_by_zabbix_event_id(db, seed["zabbix_event_id"])),
+    ("AlarmService.create_alarm", "",
+     lambda db, seed: _new_alarm(db, seed, "create")),
+    ("AlarmService.update_alarm", "",
+     lambda db, seed: AlarmService.update_alarm(db, _new_alarm(db, seed, "update"), AlarmUpdate(status="resolved"))),
+    ("AlarmService.delete_alarm", "",
+     lambda db, seed: AlarmService.delete_alarm(db, _new_alarm(db, seed, "delete"))),
+    ("AlarmService.acknowledge_alarm", "",
+     lambda db, seed: AlarmService.acknowledge_alarm(db, _new_alarm(db, seed, "ack"), "operator")),
+    ("AlarmService.resolve_alarm", "",
+     lambda db, seed: AlarmService.resolve_alarm(db, _new_alarm(db, seed, "resolve"))),
+    ("AlarmService.get_sync_watermark", "",
+     lambda db, seed: AlarmService.get_sync_watermark(db)),
+    ("AlarmService.reset_sync_watermark", "",
+     lambda db, seed: AlarmService.reset_sync_watermark(db)),
+    ("AlarmService.sync_alarms_with_zabbix", "",
+     lambda db, seed: AlarmService.sync_alarms_with_zabbix(db)),
+    ("AlarmService.reconcile_alarms_with_zabbix", "",
+     lambda db, seed: AlarmService.reconcile_alarms_with_zabbix(db)),
+    ("AlarmService.get_alarm_stats", "",
+     lambda db, seed: AlarmService.get_alarm_stats(db)),
+    ("AlarmService.get_alarms_by_equipment", "status",
+     lambda db, seed: AlarmService.get_alarms_by_equipment(db, seed["equipment_id"], status="active")),
+    ("AlarmService.get_recent_alarms", "",
+     lambda db, seed: AlarmService.get_recent_alarms(db, hours=1)),
+    ("AlarmService.get_alarm_trends", "",
+     lambda db, seed: AlarmService.get_alarm_trends(db, days=1)),
+
+    ("EquipmentService.get_equipment", "offset",
+     lambda db, seed: EquipmentService.get_equipment(db, skip=100, limit=50)),
+    ("EquipmentService.get_equipment_page", "second page", _second_equipment_page),
+    ("EquipmentService.get_equipment_page", "client_name",
+     lambda db, seed: EquipmentService.get_equipment_page(db, limit=50, client_name="Plan")),
+    ("EquipmentService.count_equipment", "status",
+     lambda db, seed: EquipmentService.count_equipment(db, status="offline")),
+    ("EquipmentService.count_equipment", "client_name",
+     lambda db, seed: EquipmentService.count_equipment(db, client_name="Plan")),
+    ("EquipmentService.get_equipment_by_id", "",
+     lambda db, seed: EquipmentService.get_equipment_by_id(db, seed["equipment_id"])),
+    ("EquipmentService.get_equipment_by_zabbix_id", "",
+     lambda db, seed: EquipmentService.get_equipment_by_zabbix_id(db, seed["zabbix_host_id"])),
+    ("EquipmentService.create_equipment", "",
+     lambda db, seed: _new_equipment(db, "create")),
+    ("EquipmentService.update_equipment", "",
+     lambda db, seed: EquipmentService.update_equipment(db, _new_equipment(db, "update"), EquipmentUpdate(location="Lima"))),
+    ("EquipmentService.delete_equipment", "",
+     lambda db, seed: EquipmentService.delete_equipment(db, _new_equipment(db, "delete"))),
+    ("EquipmentService.sync_with_zabbix", "",
+     lambda db, seed: EquipmentService.sync_with_zabbix(db)),
+    ("EquipmentService.get_equipment_with_alarms", "",
+     lambda db, seed: EquipmentService.get_equipment_with_alarms(db, seed["equipment_id"])),
+    ("EquipmentService.get_equipment_stats", "",
+     lambda db, seed: EquipmentService.get_equipment_stats(db)),
+    ("EquipmentService.get_equipment_by_client", "",
+     lambda db, seed: EquipmentService.get_equipment_by_client(db, "Plan", limit=20)),
+    ("EquipmentService.get_equipment_health", "",
+     lambda db, seed: EquipmentService.get_equipment_health(db, seed["equipment_id"])),
+    ("EquipmentService.get_equipment_zabbix_status", "",
+     lambda db, seed: EquipmentService.get_equipment_zabbix_status(db, seed["equipment_id"])),
+    ("EquipmentService.get_equipment_metrics", "",
+     lambda db, seed: EquipmentService.get_equipment_metrics(db, seed["equipment_id"], hours=1)),
+    ("EquipmentService.get_equipment_metric_history", "",
+     lambda db, seed: EquipmentService.get_equipment_metric_history(db, seed["equipment_id"], hours=24)),
+    ("EquipmentService.search_equipment", "text",
+     lambda db, seed: EquipmentService.search_equipment(db, "Host 0012", limit=20)),
+    ("EquipmentService.search_equipment", "hostid",
+     lambda db, seed: EquipmentService.search_equipment(db, seed["zabbix_host_id"])),
+    ("EquipmentService.autocomplete_equipment", "",
+     lambda db, seed: EquipmentService.autocomplete_equipment(db, "Host 001")),
+]
+
+
+def case_id(method: str, name: str) -> str:
+    return f"{method}[{name}]" if name else method
+
+
+CASES_BY_ID = {case_id(method, name): (method, call) for method, name, call in CASES}
+
+
+def _public_methods(service) -> List[str]:
+    return [
+        f"{service.__name__}.{name}" for name, _ in inspect.getmembers(service, inspect.isfunction)
+        if not name.startswith("_")
+    ]
+
+
+def test_every_service_method_is_covered():
+    covered = {method for method, _, _ in CASES}
+    missing = [method for service in (AlarmService, EquipmentService)
+               for method in _public_methods(service) if method not in covered]
+    assert not missing, f"Add query plan cases for: {missing}"
+
+
+def test_expected_indexes_name_existing_cases():
+    assert not EXPECTED_INDEXES.keys() - CASES_BY_ID.keys()
+    assert not (CASE_FULL_SCANS_ALLOWED.keys() | SQLITE_FULL_SCANS_ALLOWED.keys()) - CASES_BY_ID.keys()
+
+
+@pytest.mark.parametrize("method,name,call", CASES, ids=[case_id(method, name) for method, name, _ in CASES])
+def test_queries_use_indexes(db, seeded, method, name, call):
+    with QueryRecorder() as recorder:
+        call(db, seeded)
+    if not recorder.statements:
+        pytest.skip(f"{method} was answered without querying the database")
+
+    allowed = FULL_SCANS_ALLOWED.keys() | CASE_FULL_SCANS_ALLOWED.get(case_id(method, name), {}).keys()
+    if engine.dialect.name == "sqlite":
+        allowed |= SQLITE_FULL_SCANS_ALLOWED.get(case_id(method, name), {}).keys()
+    offending = []
+    for statement, parameters in recorder.statements:
+        tables = [table for table in full_scans(statement, parameters) if table not in allowed]
+        if tables:
+            offending.append(f"{', '.join(tables)}: {' '.join(statement.split())}")
+    assert not offending, f"{method} reads whole tables:\n" + "\n".join(offending)
+
+
+@pytest.mark.skipif(engine.dialect.name != "postgresql", reason="index choice is checked on PostgreSQL")
+@pytest.mark.parametrize("case", sorted(EXPECTED_INDEXES))
+def test_hot_filters_use_their_index(db, seeded, case):
+    method, call = CASES_BY_ID[case]
+    with QueryRecorder() as recorder:
+        call(db, seeded)
+
+    used = {
+        node["Index Name"] for statement, parameters in recorder.statements
+        for node in postgresql_plan(statement, parameters) if "Index Name" in node
+    }
+    assert EXPECTED_INDEXES[case] in used, f"{case} reads through {sorted(used)}"
@@ -0,0 +1,143 @@
+"""
+CircuitBreaker state transitions, RetryPolicy delays and Deadline scoping,
+and how the async Zabbix client drives the breaker.
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from server.services.async_zabbix_service import AsyncZabbixService
+from server.utils.resilience import (
+    CircuitBreaker, CircuitOpenError, Deadline, RetryPolicy, current_deadline, deadline_scope
+)
+
+
+def _half_open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure("down")
+    breaker.record_failure("down")
+    time.sleep(0.06)
+    return breaker
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=60)
+    breaker.record_failure("a")
+    breaker.record_failure("b")
+    breaker.record_success()
+    breaker.record_failure("c")
+    breaker.record_failure("d")
+    assert breaker.state == "closed"
+
+    breaker.record_failure("e")
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.stats()["rejected"] == 1
+    assert breaker.stats()["times_opened"] == 1
+    assert breaker.stats()["last_error"] == "e"
+
+
+def test_breaker_lets_one_trial_through_when_half_open():
+    breaker = _half_open_breaker()
+    assert breaker.state == "half_open"
+
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+    breaker.before_call()
+
+
+def test_failed_trial_reopens_the_breaker():
+    breaker = _half_open_breaker()
+    breaker.before_call()
+    breaker.record_failure("still down")
+    assert breaker.state == "open"
+    assert breaker.stats()["times_opened"] == 2
+
+
+def test_abandoned_trial_frees_the_slot():
+    breaker = _half_open_breaker()
+    breaker.before_call()
+    breaker.abandon_call()
+    assert breaker.state == "half_open"
+    breaker.before_call()
+
+
+def _service(handler) -> AsyncZabbixService:
+    service = AsyncZabbixService()
+    service.breaker = _half_open_breaker()
+    service.retry_policy = RetryPolicy(attempts=1)
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return service
+
+
+def test_cancelled_half_open_trial_does_not_wedge_the_breaker():
+    async def hang(request):
+        await asyncio.sleep(10)
+
+    async def scenario():
+        service = _service(hang)
+        trial = asyncio.create_task(service._post("host.get", {}))
+        await asyncio.sleep(0.01)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+
+        assert service.breaker.state == "half_open"
+        service.breaker.before_call()
+        await service._client.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_unexpected_error_in_trial_reopens_the_breaker():
+    async def broken(request):
+        raise RuntimeError("bug")
+
+    async def scenario():
+        service = _service(broken)
+        with pytest.raises(RuntimeError):
+            await service._post("host.get", {})
+        assert service.breaker.state == "open"
+        await service._client.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_retry_delay_is_capped_full_jitter():
+    policy = RetryPolicy(attempts=5, base_delay=0.5, max_delay=2.0)
+    for attempt, ceiling in ((1, 0.5), (2, 1.0), (3, 2.0), (6, 2.0)):
+        delays = [policy.delay(attempt) for _ in range(200)]
+        assert all(0 <= delay <= ceiling for delay in delays)
+        assert max(delays) > ceiling / 2
+    assert RetryPolicy(attempts=0).attempts == 1
+
+
+def test_deadline_expires():
+    deadline = Deadline(0.02)
+    assert not deadline.expired
+    assert 0 < deadline.remaining() <= 0.02
+    time.sleep(0.03)
+    assert deadline.expired
+    assert deadline.remaining() == 0.0
+
+
+def test_deadline_scope_keeps_the_tighter_deadline():
+    assert current_deadline() is None
+    with deadline_scope(0.5) as outer:
+        with deadline_scope(60) as inner:
+            assert inner is outer
+            assert current_deadline() is outer
+        with deadline_scope(0.1) as tighter:
+            assert tighter is not outer
+            assert current_deadline() is tighter
+        assert current_deadline() is outer
+    assert current_deadline() is None
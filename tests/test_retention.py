@@ -0,0 +1,43 @@
+"""
+Alarm retention: only old, resolved, undocumented alarms are purged.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert
+
+from server.config import settings
+from server.models import Alarm, Documentation
+from server.services.retention_service import RetentionService
+
+
+def test_purge_keeps_open_recent_and_documented_alarms(scratch_db, monkeypatch):
+    monkeypatch.setattr(settings, "alarm_retention_days", 30)
+    monkeypatch.setattr(settings, "retention_batch_size", 2)
+    monkeypatch.setattr(settings, "retention_batch_pause", 0)
+    now = datetime.now(timezone.utc)
+    old, recent = now - timedelta(days=40), now - timedelta(days=5)
+
+    rows = {
+        "old resolved": ("resolved", old, old),
+        "old resolved 2": ("resolved", old, old),
+        "old resolved 3": ("resolved", old, old),
+        "old but resolved lately": ("resolved", old, recent),
+        "old open": ("active", old, None),
+        "recent resolved": ("resolved", recent, recent),
+        "old documented": ("resolved", old, old)
+    }
+    scratch_db.execute(insert(Alarm.__table__), [
+        {"title": title, "status": status, "created_at": created_at, "resolved_at": resolved_at}
+        for title, (status, created_at, resolved_at) in rows.items()
+    ])
+    documented = scratch_db.query(Alarm.id).filter(Alarm.title == "old documented").scalar()
+    scratch_db.add(Documentation(title="Runbook", alarm_id=documented))
+    scratch_db.commit()
+
+    report = RetentionService(bind=scratch_db.get_bind()).purge_alarms(now)
+    assert report["rows_deleted"] == 3
+    assert report["vacuumed"] is False  # PostgreSQL only
+    assert sorted(title for title, in scratch_db.query(Alarm.title)) == sorted(
+        set(rows) - {"old resolved", "old resolved 2", "old resolved 3"}
+    )
@@ -0,0 +1,133 @@
+"""
+SeriesRingBuffer checked against a plain per-series deque model.
+"""
+
+import random
+from collections import deque
+
+import numpy as np
+import pytest
+
+from server.utils.ring_buffer import SeriesRingBuffer
+
+
+class Model:
+    """Reference: the last `slots` samples of each series in a deque"""
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self.series = {}
+
+    def append(self, owner, metric, clock, value):
+        self.series.setdefault((owner, metric), deque(maxlen=self.slots)).append((clock, value))
+
+    def window(self, key, window, now):
+        return [(clock, value) for clock, value in self.series.get(key, ()) if clock >= now - window]
+
+
+def _expected(samples):
+    clocks, values = zip(*samples)
+    first, last = clocks.index(min(clocks)), clocks.index(max(clocks))
+    elapsed = clocks[last] - clocks[first]
+    return {
+        "count": len(values),
+        "mean": np.mean(values),
+        "p95": np.percentile(values, 95),
+        "min": min(values),
+        "max": max(values),
+        "last": values[last],
+        "last_clock": clocks[last],
+        "rate": (values[last] - values[first]) / elapsed if elapsed else None
+    }
+
+
+def _assert_point(point, expected):
+    for field, value in expected.items():
+        if value is None:
+            assert point[field] is None, field
+        else:
+            assert point[field] == pytest.approx(value), field
+
+
+@pytest.mark.parametrize("slots", [2, 5, 16])
+def test_batches_match_the_deque_model(slots):
+    rng = random.Random(slots)
+    buffer = SeriesRingBuffer(slots=slots, initial_series=2)
+    model = Model(slots)
+    keys = [(owner, metric) for owner in range(12) for metric in ("cpu", "memory")]
+    clock = 1_000_000
+    appended = 0
+
+    for _ in range(40):
+        # Batches repeat series, sometimes more often than there are slots
+        batch = []
+        for _ in range(rng.randint(0, 3 * slots * 4)):
+            clock += 1
+            owner, metric = rng.choice(keys)
+            batch.append((owner, metric, clock, rng.uniform(0, 100)))
+        owners, metrics, clocks, values = (list(column) for column in zip(*batch)) if batch else ([], [], [], [])
+        buffer.append_many(owners, metrics, clocks, values)
+        appended += len(batch)
+        for sample in batch:
+            model.append(*sample)
+
+    now = clock
+    for window in (5, 50, 10_000):
+        for metric in ("cpu", "memory"):
+            aggregates = buffer.aggregate(metric, window, now=now)
+            assert set(aggregates) == {
+                owner for owner, name in model.series if name == metric and model.window((owner, name), window, now)
+            }
+            for owner, point in aggregates.items():
+                _assert_point(point, _expected(model.window((owner, metric), window, now)))
+
+        for owner in range(12):
+            for metric, point in buffer.summary(owner, window, now=now).items():
+                _assert_point(point, _expected(model.window((owner, metric), window, now)))
+
+    assert buffer.stats()["series"] == len(model.series)
+    assert buffer.stats()["samples_appended"] == appended
+
+
+def test_batch_longer_than_the_ring_keeps_the_newest_samples():
+    buffer = SeriesRingBuffer(slots=3)
+    buffer.append_many([1] * 7, ["cpu"] * 7, list(range(100, 107)), [float(v) for v in range(7)])
+    point = buffer.summary(1, window=1000, now=106)["cpu"]
+    assert (point["count"], point["min"], point["max"], point["last"]) == (3, 4.0, 6.0, 6.0)
+
+    # Wrapping further continues from the right slot
+    buffer.append_many([1, 1], ["cpu", "cpu"], [107, 108], [7.0, 8.0])
+    point = buffer.summary(1, window=1000, now=108)["cpu"]
+    assert (point["count"], point["min"], point["last"]) == (3, 6.0, 8.0)
+
+
+def test_p95_interpolates_like_numpy_percentile():
+    buffer = SeriesRingBuffer(slots=32)
+    values = [3.0, 1.0, 4.0, 1.0, 5.0, 9.0, 2.0, 6.0, 5.0, 3.0, 5.0]
+    buffer.append_many(["a"] * len(values), ["latency"] * len(values), list(range(len(values))), values)
+    point = buffer.aggregate("latency", window=100, now=len(values))["a"]
+    assert point["p95"] == pytest.approx(np.percentile(values, 95))
+
+    buffer.append_many(["b"], ["latency"], [5], [42.0])
+    single = buffer.aggregate("latency", window=100, now=10)["b"]
+    assert single["p95"] == 42.0 and single["rate"] is None
+
+
+def test_window_excludes_old_samples_and_nan_values():
+    buffer = SeriesRingBuffer(slots=8)
+    buffer.append_many(["a"] * 4, ["cpu"] * 4, [10, 20, 30, 40], [1.0, float("nan"), 3.0, 4.0])
+    point = buffer.summary("a", window=25, now=40)["cpu"]
+    assert point["count"] == 2
+    assert point["mean"] == pytest.approx(3.5)
+    assert point["rate"] == pytest.approx(0.1)
+    assert buffer.summary("a", window=5, now=100) == {}
+    assert buffer.aggregate("memory", window=5) == {}
+
+
+def test_fleet_summary_pools_every_series():
+    buffer = SeriesRingBuffer(slots=4)
+    buffer.append_many(["a", "a", "b"], ["cpu", "cpu", "cpu"], [1, 2, 3], [10.0, 20.0, 60.0])
+    summary = buffer.fleet_summary(window=100, now=3)["cpu"]
+    assert summary["series"] == 2 and summary["samples"] == 3
+    assert summary["mean"] == pytest.approx(30.0)
+    assert summary["p95"] == pytest.approx(np.percentile([10.0, 20.0, 60.0], 95))
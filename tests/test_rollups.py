@@ -0,0 +1,118 @@
+"""
+Rollup aggregation: aggregate_rows against brute force, and merging
+partials in several batches through the upsert and read-modify-write paths.
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from server.models import MetricRollup1m
+from server.services import rollup_service
+from server.services.rollup_service import aggregate_rows, bucket_start
+
+START = datetime(2026, 10, 17, 11, 58, 30, tzinfo=timezone.utc)
+
+
+def _rows(count: int, seed: int = 11):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        timestamp = START + timedelta(seconds=rng.randint(0, 600))
+        rows.append({
+            "equipment_id": rng.choice([1, 2, None]),
+            "metric_name": rng.choice(["cpu", "memory"]),
+            "metric_value": None if rng.random() < 0.05 else rng.uniform(-5, 100),
+            # Naive timestamps are UTC, as read back from SQLite
+            "timestamp": timestamp.replace(tzinfo=None) if rng.random() < 0.5 else timestamp
+        })
+    return rows
+
+
+def _brute_force(rows, seconds):
+    groups = {}
+    for row in rows:
+        if row["metric_value"] is None or row["equipment_id"] is None:
+            continue
+        timestamp = row["timestamp"] if row["timestamp"].tzinfo else row["timestamp"].replace(tzinfo=timezone.utc)
+        key = (row["equipment_id"], row["metric_name"], bucket_start(timestamp, seconds))
+        groups.setdefault(key, []).append((timestamp, row["metric_value"]))
+    return {
+        key: {
+            "min_value": min(value for _, value in samples),
+            "max_value": max(value for _, value in samples),
+            "sum_value": sum(value for _, value in samples),
+            "count": len(samples),
+            # Last in input order among the newest timestamp
+            "last_value": [value for timestamp, value in samples if timestamp == max(t for t, _ in samples)][-1],
+            "last_timestamp": max(timestamp for timestamp, _ in samples)
+        }
+        for key, samples in groups.items()
+    }
+
+
+def _assert_fields(actual, expected, context):
+    for field, value in expected.items():
+        if isinstance(value, float):
+            assert actual[field] == pytest.approx(value), (context, field)
+        else:
+            assert actual[field] == value, (context, field)
+
+
+def test_bucket_start():
+    assert bucket_start(START, 60) == START.replace(second=0)
+    assert bucket_start(START, 3600) == START.replace(minute=0, second=0)
+    assert bucket_start(START.replace(tzinfo=None), 86400) == START.replace(hour=0, minute=0, second=0)
+    bogota = START.astimezone(timezone(timedelta(hours=-5)))
+    assert bucket_start(bogota, 3600) == START.replace(minute=0, second=0)
+
+
+@pytest.mark.parametrize("seconds", [60, 3600, 86400])
+def test_aggregate_rows_matches_brute_force(seconds):
+    rows = _rows(2000)
+    partials = aggregate_rows(rows, seconds)
+    expected = _brute_force(rows, seconds)
+    assert set(partials) == set(expected)
+    for key, partial in partials.items():
+        assert (partial["equipment_id"], partial["metric_name"], partial["bucket"]) == key
+        _assert_fields(partial, expected[key], key)
+
+
+def _stored(connection):
+    table = MetricRollup1m.__table__
+    stored = {}
+    for row in connection.execute(select(table)).mappings():
+        bucket = row["bucket"].replace(tzinfo=timezone.utc) if row["bucket"].tzinfo is None else row["bucket"]
+        last_timestamp = row["last_timestamp"]
+        if last_timestamp.tzinfo is None:
+            last_timestamp = last_timestamp.replace(tzinfo=timezone.utc)
+        stored[(row["equipment_id"], row["metric_name"], bucket)] = {
+            "min_value": row["min_value"], "max_value": row["max_value"], "sum_value": row["sum_value"],
+            "count": row["count"], "last_value": row["last_value"], "last_timestamp": last_timestamp
+        }
+    return stored
+
+
+@pytest.mark.parametrize("upsert", [True, False], ids=["upsert", "merge"])
+def test_partials_merged_in_batches_equal_one_aggregate(scratch_db, monkeypatch, upsert):
+    if not upsert:
+        monkeypatch.setattr(rollup_service, "upsert_insert", lambda dialect_name: None)
+    # Distinct timestamps per series, so "last" does not depend on batch order
+    rows = [row for row in _rows(1500) if row["equipment_id"] is not None]
+    for index, row in enumerate(rows):
+        row["timestamp"] = START + timedelta(milliseconds=index * 250)
+    random.Random(5).shuffle(rows)
+
+    with scratch_db.get_bind().begin() as connection:
+        for start in range(0, len(rows), 400):
+            partials = list(aggregate_rows(rows[start:start + 400], 60).values())
+            rollup_service._upsert_partials(connection, MetricRollup1m, partials)
+
+    with scratch_db.get_bind().connect() as connection:
+        stored = _stored(connection)
+    expected = _brute_force(rows, 60)
+    assert set(stored) == set(expected)
+    for key, values in stored.items():
+        _assert_fields(values, expected[key], key)
@@ -0,0 +1,130 @@
+"""
+Coalescing of identical in-flight calls by SingleFlight and AsyncSingleFlight.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from server.utils.singleflight import AsyncSingleFlight, SingleFlight, request_key
+
+
+def test_request_key_ignores_param_order():
+    assert request_key("host.get", {"a": 1, "b": [1, 2]}) == request_key("host.get", {"b": [1, 2], "a": 1})
+    assert request_key("host.get") == request_key("host.get", {})
+    assert request_key("host.get", {"a": 1}) != request_key("item.get", {"a": 1})
+
+
+def _run_concurrently(group: SingleFlight, key, fn, callers: int):
+    results, errors = [], []
+    barrier = threading.Barrier(callers)
+
+    def caller():
+        barrier.wait()
+        try:
+            results.append(group.do(key, fn))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=caller) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results, errors
+
+
+def test_concurrent_callers_share_one_call():
+    group = SingleFlight()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"value": 42}
+
+    results, errors = _run_concurrently(group, "key", fn, callers=8)
+    assert not errors
+    assert len(calls) == 1
+    assert len(results) == 8 and all(result is results[0] for result in results)
+    assert group.stats() == {"issued": 1, "coalesced": 7, "in_flight": 0}
+
+
+def test_waiters_receive_the_leaders_exception():
+    group = SingleFlight()
+
+    def fn():
+        time.sleep(0.1)
+        raise RuntimeError("zabbix down")
+
+    results, errors = _run_concurrently(group, "key", fn, callers=4)
+    assert not results
+    assert len(errors) == 4 and all(isinstance(error, RuntimeError) for error in errors)
+    assert group.stats()["in_flight"] == 0
+
+
+def test_finished_calls_are_not_reused():
+    group = SingleFlight()
+    values = iter(range(10))
+    assert group.do("key", lambda: next(values)) == 0
+    assert group.do("key", lambda: next(values)) == 1
+    assert group.do("other", lambda: next(values)) == 2
+    assert group.stats() == {"issued": 3, "coalesced": 0, "in_flight": 0}
+
+
+def test_async_callers_share_one_call():
+    async def scenario():
+        group = AsyncSingleFlight()
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return [1, 2, 3]
+
+        results = await asyncio.gather(*(group.do("key", fn) for _ in range(5)))
+        assert len(calls) == 1
+        assert all(result is results[0] for result in results)
+        assert group.stats() == {"issued": 1, "coalesced": 4, "in_flight": 0}
+
+        assert await group.do("key", fn) == [1, 2, 3]
+        assert len(calls) == 2
+
+    asyncio.run(scenario())
+
+
+def test_async_cancelled_caller_does_not_cancel_the_others():
+    async def scenario():
+        group = AsyncSingleFlight()
+
+        async def fn():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        first = asyncio.create_task(group.do("key", fn))
+        second = asyncio.create_task(group.do("key", fn))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        assert await second == "done"
+        assert group.stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_async_waiters_receive_the_exception():
+    async def scenario():
+        group = AsyncSingleFlight()
+
+        async def fn():
+            await asyncio.sleep(0.01)
+            raise ValueError("bad response")
+
+        results = await asyncio.gather(*(group.do("key", fn) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert group.stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
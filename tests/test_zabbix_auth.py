@@ -0,0 +1,55 @@
+"""
+Zabbix session ownership: who may end a session with user.logout.
+"""
+
+import pytest
+
+from server.services.zabbix_auth import SESSION_KEY, ZabbixTokenManager
+from server.services.zabbix_service import zabbix_service
+from server.utils.cache import LocalCacheBackend
+
+
+class SharedStore:
+    """Stands in for a store other workers read too, like the Redis backend"""
+
+    def __init__(self):
+        self._local = LocalCacheBackend(max_entries=1)
+
+    def get(self, key):
+        return self._local.get(key)
+
+    def set(self, key, value, ttl, grace=0):
+        self._local.set(key, value, ttl, grace)
+
+    def delete_prefix(self, prefix):
+        return self._local.delete_prefix(prefix)
+
+
+@pytest.fixture
+def logouts(simulator):
+    return lambda: simulator.calls.get("user.logout", 0)
+
+
+def test_shared_session_is_not_logged_out(simulator, monkeypatch, logouts):
+    tokens = ZabbixTokenManager(store=SharedStore())
+    monkeypatch.setattr(zabbix_service, "tokens", tokens)
+    assert zabbix_service.authenticate()
+    session = tokens.current()
+    before = logouts()
+
+    zabbix_service.logout()
+    assert logouts() == before
+    assert tokens.current() == session
+    assert tokens.stats()["shared"] is True
+
+
+def test_process_local_session_is_logged_out(simulator, monkeypatch, logouts):
+    tokens = ZabbixTokenManager(store=LocalCacheBackend(max_entries=1))
+    monkeypatch.setattr(zabbix_service, "tokens", tokens)
+    assert zabbix_service.authenticate()
+    before = logouts()
+
+    zabbix_service.logout()
+    assert logouts() == before + 1
+    assert tokens.current() is None
+    assert tokens.store.get(SESSION_KEY) is None